@@ -14,6 +14,9 @@ from langchain_openai import OpenAIEmbeddings
 from langchain_community.vectorstores import Chroma
 
 import config
+from class_server_imports import optional
+
+course_store, = optional("services.course_store", "course_store", feature="Indexed course store")
 
 class DocumentService:
     """Service for processing documents and generating courses."""
@@ -107,6 +110,15 @@ class DocumentService:
              # Convert course to dictionary and validate structure
             course_dict = self._validate_and_prepare_course(final_course, course_title)
             
+            if course_store is not None:
+                # Indexed store: append the new course without rewriting the others
+                course_dict = self._ensure_unique_title(course_dict, course_store.list_courses())
+                course_dict['course_id'] = course_store.next_course_id()
+                course_store.put_course(course_dict)
+                logging.info(f"Course generation completed successfully! Course ID: {course_dict['course_id']}")
+                logging.info(f"Total courses in database: {len(course_store)}")
+                return course_dict
+            
             # Load existing courses and append new course
             existing_courses = self._load_existing_courses()
             next_course_id = self._get_next_course_id(existing_courses)
@@ -268,9 +280,14 @@ class DocumentService:
                 if 'modules' not in course:
                     raise ValueError(f"Course {i} missing modules")
             
-            # Always save as array format for consistency
-            with open(config.OUTPUT_JSON_PATH, 'w', encoding='utf-8') as f:
+            # Always save as array format for consistency; written beside the
+            # old file and renamed over it so a crash never leaves half a database
+            tmp_path = f"{config.OUTPUT_JSON_PATH}.tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as f:
                 json.dump(courses, f, indent=4, ensure_ascii=False)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, config.OUTPUT_JSON_PATH)
             
             logging.info(f"Successfully saved {len(courses)} courses to {config.OUTPUT_JSON_PATH}")
             
@@ -6,6 +6,9 @@ from openai import AsyncOpenAI
 from typing import AsyncGenerator
 import config
 
+# Returned (or streamed) in place of a response when the LLM call fails
+LLM_ERROR_RESPONSE = "I apologize, but I couldn't generate a response at the moment."
+
 class LLMService:
     """Service for OpenAI LLM interactions."""
     
@@ -75,7 +78,7 @@ class LLMService:
             return response.choices[0].message.content
         except Exception as e:
             print(f"Error generating LLM response: {e}")
-            return "I apologize, but I couldn't generate a response at the moment."
+            return LLM_ERROR_RESPONSE
     
     async def generate_response_stream(self, prompt: str, temperature: float = 0.7) -> AsyncGenerator[str, None]:
         """Stream response generation from the LLM."""
@@ -97,4 +100,4 @@ class LLMService:
                     
         except Exception as e:
             print(f"Error in streaming LLM response: {e}")
-            yield "I apologize, but I couldn't generate a response at the moment."
\ No newline at end of file
+            yield LLM_ERROR_RESPONSE
\ No newline at end of file
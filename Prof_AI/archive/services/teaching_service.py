@@ -5,7 +5,24 @@ Teaching Service - Converts course content into proper teaching format with stre
 import logging
 import asyncio
 from typing import Dict, Any, Optional, AsyncGenerator
-from services.llm_service import LLMService
+from class_server_imports import optional
+from services.llm_service import LLM_ERROR_RESPONSE, LLMService
+
+teaching_cache, = optional("services.teaching_cache", "teaching_cache", feature="Teaching script cache")
+iter_sentences, = optional("services.sentence_pipeline", "iter_sentences", feature="Sentence pipeline")
+
+# Bump when the teaching prompt changes so cached scripts are regenerated
+TEACHING_PROMPT_VERSION = 1
+CLOSING_LINE = "Thank you for your attention. Feel free to ask any questions about this topic."
+
+
+def _cacheable(script: str) -> bool:
+    """LLM error text must not be cached as the lesson."""
+    return LLM_ERROR_RESPONSE not in script
+
+async def _single(text: str) -> AsyncGenerator[str, None]:
+    yield text
+
 
 class TeachingService:
     """Service for converting course content into teaching-friendly format."""
@@ -40,9 +57,17 @@ class TeachingService:
             
             logging.info(f"Starting streaming content generation for: {sub_topic_title}")
             
-            # Stream teaching content using LLM
-            async for chunk in self.llm_service.generate_response_stream(teaching_prompt):
-                if chunk.strip():  # Only yield non-empty chunks
+            # Stream teaching content using LLM (or the cached script in the same chunks)
+            if teaching_cache is not None:
+                stream = teaching_cache.stream(
+                    teaching_cache.key(teaching_prompt, language, TEACHING_PROMPT_VERSION), language,
+                    lambda: self.llm_service.generate_response_stream(teaching_prompt), _cacheable
+                )
+            else:
+                stream = self.llm_service.generate_response_stream(teaching_prompt)
+            async for chunk in stream:
+                # Whitespace-only chunks ("\n\n") are paragraph and word breaks; pass them on
+                if chunk:
                     yield chunk
             
             logging.info(f"Completed streaming content generation for: {sub_topic_title}")
@@ -53,12 +78,71 @@ class TeachingService:
             fallback_content = self._create_fallback_content(module_title, sub_topic_title, raw_content)
             yield fallback_content
 
+    async def generate_teaching_sentences(
+        self,
+        module_title: str,
+        sub_topic_title: str,
+        raw_content: str,
+        language: str = "en-IN",
+        first_sentence_timeout: float = 6.0,
+        min_segment_chars: int = 80,
+        idle_timeout: float = 5.0
+    ) -> AsyncGenerator[str, None]:
+        """
+        Stream the lesson as TTS-ready segments while the LLM is still writing it.
+        
+        The first sentence is yielded as soon as it is complete; after that,
+        short sentences are joined into segments of at least min_segment_chars.
+        Joined together the segments match _format_for_tts of the whole script.
+        If no sentence arrives within first_sentence_timeout, the fallback
+        content is used (a cached generation keeps running for the next class);
+        if the stream stalls for idle_timeout later on, the lesson is closed
+        after what has been taught so far.
+        """
+        if iter_sentences is None:
+            yield await self.generate_teaching_content(module_title, sub_topic_title, raw_content, language)
+            return
+        
+        if len(raw_content) > 6000:
+            raw_content = raw_content[:5500] + "..."
+        sentences = iter_sentences(self.generate_teaching_content_stream(
+            module_title, sub_topic_title, raw_content, language
+        ))
+        try:
+            first = await asyncio.wait_for(sentences.__anext__(), timeout=first_sentence_timeout)
+        except (asyncio.TimeoutError, StopAsyncIteration):
+            logging.warning(f"No teaching sentence within {first_sentence_timeout}s for: {sub_topic_title}")
+            await sentences.aclose()
+            fallback_content = self._create_fallback_content(module_title, sub_topic_title, raw_content)
+            sentences = iter_sentences(_single(fallback_content))
+            first = await sentences.__anext__()
+        
+        yield self._format_sentence_for_tts(*first)
+        segment = ""
+        while True:
+            try:
+                sentence, ends_paragraph = await asyncio.wait_for(sentences.__anext__(), timeout=idle_timeout)
+            except StopAsyncIteration:
+                break
+            except asyncio.TimeoutError:
+                # Restarting with the fallback content would repeat the lesson's opening
+                logging.warning(f"Teaching stream stalled for {idle_timeout}s for: {sub_topic_title}; closing the lesson")
+                await sentences.aclose()
+                break
+            segment += self._format_sentence_for_tts(sentence, ends_paragraph)
+            if len(segment) >= min_segment_chars:
+                yield segment
+                segment = ""
+        yield segment + CLOSING_LINE
+
     async def generate_teaching_content(
         self, 
         module_title: str, 
         sub_topic_title: str, 
         raw_content: str,
-        language: str = "en-IN"
+        language: str = "en-IN",
+        timeout: float = 5.0,
+        fallback: bool = True
     ) -> str:
         """
         Convert raw course content into a proper teaching format with timeout handling.
@@ -68,6 +152,9 @@ class TeachingService:
             sub_topic_title: The specific sub-topic title
             raw_content: Raw content from the course JSON
             language: Language for the teaching content
+            timeout: Seconds to wait for the LLM before using fallback content
+            fallback: If False, raise instead of returning the fallback content
+                (for callers that have something better to do than serve it)
             
         Returns:
             Formatted teaching content ready for TTS
@@ -83,11 +170,18 @@ class TeachingService:
                 module_title, sub_topic_title, raw_content, language
             )
             
-            # Generate teaching content using LLM with timeout
-            teaching_content = await asyncio.wait_for(
-                self.llm_service.generate_response(teaching_prompt, temperature=0.7),
-                timeout=5.0  # 5 second timeout for LLM generation
-            )
+            # Generate teaching content using LLM with timeout; with the cache, concurrent
+            # requests share one generation, which outlives a timed-out caller
+            if teaching_cache is not None:
+                generation = teaching_cache.generate(
+                    teaching_cache.key(teaching_prompt, language, TEACHING_PROMPT_VERSION), language,
+                    lambda: self.llm_service.generate_response(teaching_prompt, temperature=0.7), _cacheable
+                )
+            else:
+                generation = self.llm_service.generate_response(teaching_prompt, temperature=0.7)
+            teaching_content = await asyncio.wait_for(generation, timeout=timeout)
+            if not fallback and not _cacheable(teaching_content):
+                raise RuntimeError("LLM returned an error response")
             
             # Post-process the content for better TTS delivery
             formatted_content = self._format_for_tts(teaching_content)
@@ -97,9 +191,13 @@ class TeachingService:
             
         except asyncio.TimeoutError:
             logging.warning(f"Teaching content generation timeout for: {sub_topic_title}")
+            if not fallback:
+                raise
             return self._create_fallback_content(module_title, sub_topic_title, raw_content)
         except Exception as e:
             logging.error(f"Error generating teaching content: {e}")
+            if not fallback:
+                raise
             # Fallback to basic format if LLM fails
             return self._create_fallback_content(module_title, sub_topic_title, raw_content)
     
@@ -184,10 +282,18 @@ Begin the lesson:"""
             content += "."
         
         # Add a natural ending
-        content += " ... Thank you for your attention. Feel free to ask any questions about this topic."
+        content += " ... " + CLOSING_LINE
         
         return content
     
+    def _format_sentence_for_tts(self, sentence: str, ends_paragraph: bool) -> str:
+        """_format_for_tts for one complete sentence of a streamed script."""
+        sentence = sentence.replace(". ", ". ... ").replace("? ", "? ... ").replace("! ", "! ... ")
+        sentence = sentence.replace("\n\n", " ... ... ")
+        if not sentence.endswith(('.', '!', '?')):
+            sentence += "."
+        return sentence + (" ... ... " if ends_paragraph else " ... ")
+    
     def _create_fallback_content(
         self, 
         module_title: str, 
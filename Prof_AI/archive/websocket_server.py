@@ -7,17 +7,32 @@ import threading
 import time
 import json
 import logging
+import os
+import sys
 from datetime import datetime
 from typing import Dict, Optional
 import websockets
 from websockets.exceptions import ConnectionClosed, ConnectionClosedOK, ConnectionClosedError
 
+# This tree's config/services/utils, with the class server's own modules wired in
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from class_server_imports import optional, wire
+wire()
+
 # Import ProfAI services
 from services.chat_service import ChatService
 from services.audio_service import AudioService
 from services.teaching_service import TeachingService
 import config
 
+course_cache, = optional("services.course_cache", "course_cache", feature="Indexed course store")
+lesson_renders, = optional("services.lesson_renders", "lesson_renders", feature="Pre-rendered lessons")
+LessonPrefetcher, PrefetchedLesson, split_head = optional(
+    "services.lesson_prefetch", "LessonPrefetcher", "PrefetchedLesson", "split_head", feature="Lesson prefetching"
+)
+teaching_cache, = optional("services.teaching_cache", "teaching_cache", feature="Teaching script cache")
+ordered_synthesis, = optional("services.sentence_pipeline", "ordered_synthesis", feature="Sentence pipeline")
+
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 
@@ -29,6 +44,11 @@ def log(*args):
     """Enhanced logging with timestamp"""
     print(f"[{ts()}][WebSocket]", *args, flush=True)
 
+async def _iter_chunks(chunks):
+    """Stored audio as an async stream, like the live TTS stream it replaces."""
+    for chunk in chunks:
+        yield chunk
+
 def is_normal_closure(exception) -> bool:
     """Check if a WebSocket exception represents a normal closure (codes 1000, 1001)."""
     if isinstance(exception, ConnectionClosedOK):
@@ -199,6 +219,11 @@ class ProfAIAgent:
         self.current_language = "en-IN"
         self.current_course_context = None
         
+        # Next sub-topic prepared in the background while the current one plays
+        self.lesson_prefetcher = None
+        if LessonPrefetcher is not None and config.LESSON_PREFETCH_ENABLED:
+            self.lesson_prefetcher = LessonPrefetcher(self._prefetch_lesson)
+        
         log(f"ProfAI agent initialized for client {self.client_id} - Services: {self.services_available}")
 
     async def process_messages(self):
@@ -517,7 +542,7 @@ class ProfAIAgent:
             # Load and validate course content with timeout
             try:
                 import os
-                if not os.path.exists(config.OUTPUT_JSON_PATH):
+                if course_cache is None and not os.path.exists(config.OUTPUT_JSON_PATH):
                     await self.websocket.send({
                         "type": "error",
                         "error": "Course content not found"
@@ -548,6 +573,7 @@ class ProfAIAgent:
                     return
                     
                 sub_topic = module["sub_topics"][sub_topic_index]
+                lesson_key = (str(course_data.get("course_id", course_id)), module_index, sub_topic_index, language)
                 
                 # Send course info
                 await self.websocket.send({
@@ -576,18 +602,35 @@ class ProfAIAgent:
                 return
             
             # Generate teaching content with reduced timeout and better fallback
+            render = None
+            prefetched = None
+            stream_sentences = False
             try:
-                raw_content = sub_topic.get('content', '')
-                if not raw_content:
-                    raw_content = f"This topic covers {sub_topic['title']} as part of {module['title']}."
+                raw_content = await self._load_raw_content(module, sub_topic)
+                render = await self._lookup_render(lesson_key, raw_content)
+                if render is None and self.lesson_prefetcher is not None:
+                    # Never slower than the live path's first sentence
+                    prefetched = await self.lesson_prefetcher.take(
+                        lesson_key, timeout=config.CLASS_FIRST_SENTENCE_TIMEOUT_S
+                    )
                 
                 # Truncate content if too long to avoid timeout
                 if len(raw_content) > 8000:
                     raw_content = raw_content[:7500] + "..."
                     log(f"Truncated content to 7500 chars for faster processing")
                 
+                if render is not None:
+                    log(f"Serving pre-rendered lesson ({len(render.audio)} bytes of audio)")
+                    teaching_content = render.script
+                elif prefetched is not None:
+                    log(f"Serving prefetched lesson ({len(prefetched.audio_chunks)} audio chunks ready)")
+                    teaching_content = prefetched.teaching_content
+                elif self._sentence_streaming_available():
+                    # Generated while the audio plays: each sentence goes to TTS as it completes
+                    stream_sentences = True
+                    teaching_content = ""
                 # Check if teaching service is available
-                if not self.services_available.get("teaching", False):
+                elif not self.services_available.get("teaching", False):
                     log("Teaching service not available, using direct content")
                     teaching_content = self._create_simple_teaching_content(
                         module['title'], sub_topic['title'], raw_content
@@ -610,22 +653,23 @@ class ProfAIAgent:
                             module['title'], sub_topic['title'], raw_content
                         )
                 
-                if not teaching_content or len(teaching_content.strip()) == 0:
+                if not stream_sentences and (not teaching_content or len(teaching_content.strip()) == 0):
                     # Final fallback content
                     teaching_content = self._create_simple_teaching_content(
                         module['title'], sub_topic['title'], raw_content
                     )
                 
-                # Send teaching content
-                await self.websocket.send({
-                    "type": "teaching_content",
-                    "content": teaching_content[:500] + "..." if len(teaching_content) > 500 else teaching_content,
-                    "content_length": len(teaching_content),
-                    "message": "Teaching content ready, starting audio...",
-                    "request_id": data.get("request_id", "")
-                })
-                
-                log(f"Teaching content ready: {len(teaching_content)} characters")
+                # Send teaching content (streamed lessons send it with their first sentence)
+                if not stream_sentences:
+                    await self.websocket.send({
+                        "type": "teaching_content",
+                        "content": teaching_content[:500] + "..." if len(teaching_content) > 500 else teaching_content,
+                        "content_length": len(teaching_content),
+                        "message": "Teaching content ready, starting audio...",
+                        "request_id": data.get("request_id", "")
+                    })
+                    
+                    log(f"Teaching content ready: {len(teaching_content)} characters")
                 
             except Exception as e:
                 log(f"Error generating teaching content: {e}")
@@ -642,6 +686,9 @@ class ProfAIAgent:
                     "request_id": data.get("request_id", "")
                 })
             
+            # Prepare the likely next sub-topic while this one streams
+            self._schedule_prefetch(course_data, lesson_key)
+            
             # Generate audio with streaming
             await self.websocket.send({
                 "type": "audio_generation_started",
@@ -657,7 +704,18 @@ class ProfAIAgent:
                 
                 log(f"🚀 Starting REAL-TIME class audio streaming for: {teaching_content[:50]}...")
                 
-                async for audio_chunk in self.audio_service.stream_audio_from_text(teaching_content, language, self.websocket):
+                if render is not None:
+                    audio_stream = _iter_chunks(render.audio_chunks())
+                elif prefetched is not None and prefetched.audio_chunks:
+                    audio_stream = self._prefetched_audio(prefetched, language)
+                elif stream_sentences:
+                    audio_stream = self._stream_lesson_audio(
+                        module, sub_topic, raw_content, language, data.get("request_id", "")
+                    )
+                else:
+                    audio_stream = self.audio_service.stream_audio_from_text(teaching_content, language, self.websocket)
+                
+                async for audio_chunk in audio_stream:
                     if audio_chunk and len(audio_chunk) > 0:
                         chunk_count += 1
                         total_audio_size += len(audio_chunk)
@@ -891,6 +949,140 @@ class ProfAIAgent:
             # On error, assume disconnected for safety
             return False
 
+    async def _load_raw_content(self, module, sub_topic) -> str:
+        """Sub-topic content to teach (placeholder text if the course has none)."""
+        # Outlines from the course store carry a content_ref; read only this sub-topic
+        if course_cache is not None and 'content_ref' in sub_topic:
+            raw_content = await asyncio.to_thread(course_cache.load_content, sub_topic)
+        else:
+            raw_content = sub_topic.get('content', '')
+        if not raw_content:
+            raw_content = f"This topic covers {sub_topic['title']} as part of {module['title']}."
+        return raw_content
+
+    async def _lookup_render(self, lesson_key, raw_content):
+        """Lesson rendered ahead of time (prerender_lessons.py), which needs neither the LLM nor TTS."""
+        if lesson_renders is None:
+            return None
+        try:
+            return await asyncio.to_thread(lesson_renders.lookup, *lesson_key, raw_content)
+        except Exception as e:
+            log(f"Pre-rendered lesson lookup failed, generating live: {e}")
+            return None
+
+    def _schedule_prefetch(self, course_data, lesson_key):
+        """Prefetch the sub-topic after this one (and optionally the next module's first)."""
+        if self.lesson_prefetcher is None:
+            return
+        course_id, module_index, sub_topic_index, language = lesson_key
+        modules = course_data.get("modules", [])
+        keys = []
+        if sub_topic_index + 1 < len(modules[module_index].get("sub_topics", [])):
+            keys.append((course_id, module_index, sub_topic_index + 1, language))
+        if module_index + 1 < len(modules) and modules[module_index + 1].get("sub_topics"):
+            if not keys or config.LESSON_PREFETCH_NEXT_MODULE:
+                keys.append((course_id, module_index + 1, 0, language))
+        self.lesson_prefetcher.schedule(keys)
+
+    async def _prefetch_lesson(self, lesson_key, audio_budget_bytes):
+        """Teaching script and opening audio of a lesson, prepared in the background."""
+        course_id, module_index, sub_topic_index, language = lesson_key
+        course_data = await self._load_course_data_async(course_id)
+        module = course_data["modules"][module_index]
+        sub_topic = module["sub_topics"][sub_topic_index]
+        raw_content = await self._load_raw_content(module, sub_topic)
+        if await self._lookup_render(lesson_key, raw_content) is not None:
+            return None
+        if len(raw_content) > 8000:
+            raw_content = raw_content[:7500] + "..."
+        
+        if not self.services_available.get("teaching", False):
+            return None
+        # Off the critical path, so the LLM gets longer than a live start_class allows.
+        # No fallback content: on failure start_class should try the LLM live instead
+        try:
+            teaching_content = await self.teaching_service.generate_teaching_content(
+                module_title=module['title'],
+                sub_topic_title=sub_topic['title'],
+                raw_content=raw_content,
+                language=language,
+                timeout=config.LESSON_PREFETCH_SCRIPT_TIMEOUT_S,
+                fallback=False
+            )
+        except Exception as e:
+            log(f"Prefetch of {lesson_key} got no teaching script: {e}")
+            return None
+        if not teaching_content or not teaching_content.strip():
+            return None
+        
+        head_text, _ = split_head(teaching_content, config.LESSON_PREFETCH_AUDIO_S)
+        audio_chunks = []
+        if self.services_available.get("audio", False):
+            audio_size = 0
+            async for audio_chunk in self.audio_service.stream_audio_from_text(head_text, language):
+                audio_chunks.append(audio_chunk)
+                audio_size += len(audio_chunk)
+                if audio_size > audio_budget_bytes:
+                    # Partial audio of the head cannot be resumed; keep only the script
+                    audio_chunks = []
+                    break
+        
+        log(f"Prefetched lesson {lesson_key}: {len(teaching_content)} chars, {len(audio_chunks)} audio chunks")
+        return PrefetchedLesson(teaching_content, head_text, audio_chunks)
+
+    def _sentence_streaming_available(self) -> bool:
+        return (
+            ordered_synthesis is not None
+            and config.CLASS_SENTENCE_STREAMING_ENABLED
+            and self.services_available.get("teaching", False)
+            and self.services_available.get("audio", False)
+        )
+
+    async def _stream_lesson_audio(self, module, sub_topic, raw_content, language, request_id):
+        """Class audio while the script is still being written: sentences go to TTS as they complete."""
+        started = time.time()
+        script_length = 0
+        
+        async def segments():
+            nonlocal script_length
+            async for segment in self.teaching_service.generate_teaching_sentences(
+                module_title=module['title'],
+                sub_topic_title=sub_topic['title'],
+                raw_content=raw_content,
+                language=language,
+                first_sentence_timeout=config.CLASS_FIRST_SENTENCE_TIMEOUT_S,
+                min_segment_chars=config.CLASS_TTS_MIN_SEGMENT_CHARS,
+                idle_timeout=config.CLASS_SENTENCE_IDLE_TIMEOUT_S
+            ):
+                if script_length == 0:
+                    log(f"First teaching sentence ready in {(time.time() - started) * 1000:.0f}ms")
+                    await self.websocket.send({
+                        "type": "teaching_content",
+                        "content": segment,
+                        "streaming": True,
+                        "message": "Teaching content streaming, starting audio...",
+                        "request_id": request_id
+                    })
+                script_length += len(segment)
+                yield segment
+        
+        async for audio_chunk in ordered_synthesis(
+            segments(),
+            lambda segment: self.audio_service.stream_audio_from_text(segment, language, self.websocket),
+            lookahead=config.CLASS_TTS_LOOKAHEAD
+        ):
+            yield audio_chunk
+        log(f"Streamed teaching content: {script_length} characters")
+
+    async def _prefetched_audio(self, prefetched, language):
+        """Buffered opening audio, then the rest of the script synthesized live."""
+        for audio_chunk in prefetched.audio_chunks:
+            yield audio_chunk
+        rest_text = prefetched.rest_text.strip()
+        if rest_text:
+            async for audio_chunk in self.audio_service.stream_audio_from_text(rest_text, language, self.websocket):
+                yield audio_chunk
+
     async def _load_course_data_async(self, course_id=None):
         """Load course data asynchronously with proper error handling."""
         try:
@@ -898,10 +1090,23 @@ class ProfAIAgent:
             import json
             import config
             
+            # Shared course cache: parsed once per process, read-only views per request
+            if course_cache is not None:
+                course_obj = await course_cache.get_async(course_id) if course_id is not None else None
+                if course_obj is None:
+                    first_course_id = await asyncio.to_thread(course_cache.first_course_id)
+                    if first_course_id is not None:
+                        course_obj = await course_cache.get_async(first_course_id)
+                if course_obj is not None:
+                    return course_obj
+            
             # Load from the same path as the HTTP endpoints use
             if os.path.exists(config.OUTPUT_JSON_PATH):
-                with open(config.OUTPUT_JSON_PATH, 'r', encoding='utf-8') as f:
-                    loaded = json.load(f)
+                # Read and parse off the event loop
+                def _read_courses():
+                    with open(config.OUTPUT_JSON_PATH, 'r', encoding='utf-8') as f:
+                        return json.load(f)
+                loaded = await asyncio.to_thread(_read_courses)
                 
                 # Handle both single course (dict) and multi-course (list) formats
                 course_obj = None
@@ -1100,6 +1305,9 @@ class ProfAIAgent:
                     "message_count": self.websocket.message_count
                 },
                 "performance_metrics": self.conversation_metrics,
+                "course_cache": course_cache.stats() if course_cache is not None else None,
+                "lesson_prefetch": self.lesson_prefetcher.stats() if self.lesson_prefetcher is not None else None,
+                "teaching_cache": await asyncio.to_thread(teaching_cache.stats) if teaching_cache is not None else None,
                 "timestamp": time.time()
             }
             
@@ -1122,6 +1330,10 @@ class ProfAIAgent:
             session_duration = time.time() - self.session_start_time
             log(f"Cleaning up client {self.client_id} after {session_duration:.2f}s")
             
+            if self.lesson_prefetcher is not None:
+                self.lesson_prefetcher.cancel_all()
+                log(f"Lesson prefetch for {self.client_id}: {self.lesson_prefetcher.stats()}")
+            
             # Log final metrics
             log(f"Final metrics for {self.client_id}: {self.conversation_metrics}")
             
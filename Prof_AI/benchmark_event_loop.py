@@ -0,0 +1,254 @@
+#!/usr/bin/env python3
+"""
+Event Loop Benchmark - compare the asyncio and uvloop loops under voice load
+
+Each loop runs a SimpleAudioServer in its own process, wired to the offline
+replay fakes (no provider calls). A load generator on the stdlib loop - the
+same for every run - opens N concurrent sessions that stream 20ms PCM frames
+and get a synthetic conversation back: speech, a final transcript, a short
+LLM reply and a timed TTS stream every few seconds.
+
+Reported per loop:
+  frames_per_s      audio frames in + out across all sessions
+  cpu_pct_per_session  server CPU time / wall time / sessions
+  send_latency_ms   TTS chunk produced by the fake -> received by the client
+                    (p50/p95/p99; both processes read CLOCK_MONOTONIC)
+
+    python benchmark_event_loop.py --sessions 50 --duration 30
+    python benchmark_event_loop.py --frame-interval 0 --report loops.json
+
+uvloop is skipped if it is not installed.
+"""
+
+import argparse
+import asyncio
+import base64
+import importlib.util
+import json
+import os
+import random
+import signal
+import struct
+import subprocess
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import websockets
+
+from services.replay_fakes import ReplayClock, ReplaySTTService, ReplayVoiceService
+from utils.metrics import RollingWindow
+
+LOOPS = ("asyncio", "uvloop")
+FRAME_BYTES = 640  # 20ms of 16kHz mono PCM16
+TURN_INTERVAL_S = 3.0
+# One synthetic reply: LLM after 200ms, then 40 x 20ms TTS chunks at real time
+LLM_TIMING = {"first_token_s": 0.2, "total_s": 0.4, "text": "Sure, here is a short answer."}
+TTS_TIMELINE = [(i * 0.02, 1280) for i in range(40)]
+SERVER_HISTOGRAMS = ["turn_first_audio_ms", "loop_lag_ms"]
+
+_STAMP = struct.Struct("<d")
+
+
+# --- Server side (runs in a child process per loop) ---
+
+def _conversation(duration: float):
+    """Per-session STT events: one utterance every TURN_INTERVAL_S, with jitter."""
+    events = []
+    t = random.uniform(0.5, TURN_INTERVAL_S)
+    while t < duration:
+        events += [
+            (t, {"type": "speech_started"}),
+            (t + 0.3, {"type": "partial", "text": "what is"}),
+            (t + 0.8, {"type": "final", "text": "what is a transformer", "language": "en"}),
+            (t + 0.85, {"type": "utterance_end"}),
+        ]
+        t += TURN_INTERVAL_S
+    return events
+
+
+class StampedVoiceService(ReplayVoiceService):
+    """Replay fake whose TTS chunks carry the monotonic time they were produced."""
+
+    async def text_to_speech_stream(self, text: str):
+        async for chunk in super().text_to_speech_stream(text):
+            yield _STAMP.pack(time.monotonic()) + chunk[_STAMP.size:]
+
+
+def _started_clock() -> ReplayClock:
+    clock = ReplayClock()
+    clock.start()
+    return clock
+
+
+async def serve(duration: float):
+    """Serve on an ephemeral port until SIGTERM, then print a JSON stats line."""
+    import config
+    from run_simple_audio_server import SimpleAudioServer
+    from utils.metrics import metrics
+
+    config.SESSION_RECORDING_ENABLED = False
+    turns = [{"text": "what is a transformer", "llm": LLM_TIMING, "tts": TTS_TIMELINE}] * (
+        int(duration / TURN_INTERVAL_S) + 2
+    )
+    server = SimpleAudioServer(
+        host="127.0.0.1",
+        port=0,
+        service_factory=lambda: StampedVoiceService(turns, ReplayClock()),
+        stt_factory=lambda **kwargs: ReplaySTTService(_conversation(duration), _started_clock(), **kwargs),
+    )
+
+    stop = asyncio.Event()
+    asyncio.get_running_loop().add_signal_handler(signal.SIGTERM, stop.set)
+    async with websockets.serve(server.handle_client, "127.0.0.1", 0, max_size=16 * 1024 * 1024) as ws_server:
+        server.idle.start()
+        server.watchdog.start()
+        port = ws_server.sockets[0].getsockname()[1]
+        loop_type = type(asyncio.get_running_loop()).__module__.split(".")[0]
+        metrics.reset()
+        cpu_started, wall_started = time.process_time(), time.monotonic()
+        print(f"READY {port} {loop_type}", flush=True)
+
+        await stop.wait()
+        cpu_s, wall_s = time.process_time() - cpu_started, time.monotonic() - wall_started
+        await server.watchdog.stop()
+        server.idle.stop()
+
+    histograms = metrics.snapshot()["histograms"]
+    print(json.dumps({
+        "loop": loop_type,
+        "cpu_s": cpu_s,
+        "wall_s": wall_s,
+        "server": {name: histograms[name] for name in SERVER_HISTOGRAMS if name in histograms},
+    }), flush=True)
+
+
+# --- Load generator (parent process, stdlib loop) ---
+
+async def _session(port: int, duration: float, frame_interval: float, stats: dict, latency: RollingWindow):
+    frame = base64.b64encode(bytes(FRAME_BYTES)).decode("utf-8")
+    async with websockets.connect(f"ws://127.0.0.1:{port}", max_size=16 * 1024 * 1024) as ws:
+        while json.loads(await ws.recv()).get("type") != "connection_ready":
+            pass
+        await ws.send(json.dumps({"type": "stt_stream_start", "sample_rate": 16000, "language": "en"}))
+
+        async def receive():
+            async for message in ws:
+                data = json.loads(message)
+                if data.get("type") == "audio_chunk" and not data.get("filler"):
+                    received = time.monotonic()
+                    (produced,) = _STAMP.unpack_from(base64.b64decode(data["audio"]))
+                    latency.add((received - produced) * 1000)
+                    stats["frames_out"] += 1
+
+        receiver = asyncio.create_task(receive())
+        deadline = time.monotonic() + duration
+        next_send = time.monotonic()
+        while time.monotonic() < deadline and not receiver.done():
+            await ws.send(json.dumps({"type": "stt_audio_chunk", "audio": frame}))
+            stats["frames_in"] += 1
+            next_send += frame_interval
+            await asyncio.sleep(max(0.0, next_send - time.monotonic()))
+        receiver.cancel()
+        await ws.send(json.dumps({"type": "disconnect"}))
+
+
+async def drive(port: int, sessions: int, duration: float, frame_interval: float):
+    stats = {"frames_in": 0, "frames_out": 0}
+    latency = RollingWindow(size=1_000_000)
+    started = time.monotonic()
+    results = await asyncio.gather(
+        *[_session(port, duration, frame_interval, stats, latency) for _ in range(sessions)],
+        return_exceptions=True,
+    )
+    elapsed = time.monotonic() - started
+    errors = [r for r in results if isinstance(r, Exception)]
+    return stats, latency, elapsed, errors
+
+
+def run_loop(loop: str, sessions: int, duration: float, frame_interval: float) -> dict:
+    env = dict(os.environ, EVENT_LOOP=loop, LOG_LEVEL="WARNING", SESSION_RECORDING_ENABLED="False")
+    child = subprocess.Popen(
+        [sys.executable, os.path.abspath(__file__), "--serve", "--duration", str(duration)],
+        stdout=subprocess.PIPE, env=env, text=True,
+    )
+    try:
+        ready = child.stdout.readline().split()
+        if not ready or ready[0] != "READY":
+            raise RuntimeError(f"{loop} server failed to start")
+        port, loop_type = int(ready[1]), ready[2]
+        stats, latency, elapsed, errors = asyncio.run(drive(port, sessions, duration, frame_interval))
+    finally:
+        child.send_signal(signal.SIGTERM)
+    server = json.loads(child.stdout.read().strip().splitlines()[-1])
+    child.wait()
+
+    return {
+        "loop": loop_type,
+        "sessions": sessions,
+        "duration_s": round(elapsed, 2),
+        "frame_interval_s": frame_interval,
+        "frames_in": stats["frames_in"],
+        "frames_out": stats["frames_out"],
+        "frames_per_s": (stats["frames_in"] + stats["frames_out"]) / elapsed,
+        "cpu_s": server["cpu_s"],
+        "cpu_pct_per_session": server["cpu_s"] / server["wall_s"] / sessions * 100,
+        "send_latency_ms": latency.summary(),
+        "server": server["server"],
+        "session_errors": len(errors),
+    }
+
+
+def _ms(value):
+    return "-" if value is None else f"{value:.2f}"
+
+
+def print_comparison(results):
+    print(f"\n{'loop':<8} {'frames/s':>10} {'cpu%/sess':>10} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'errors':>7}")
+    for r in results:
+        lat = r["send_latency_ms"]
+        print(f"{r['loop']:<8} {r['frames_per_s']:>10.0f} {r['cpu_pct_per_session']:>10.3f} "
+              f"{_ms(lat['p50']):>8} {_ms(lat['p95']):>8} {_ms(lat['p99']):>8} {r['session_errors']:>7}")
+    if len(results) == 2:
+        base, alt = results
+        if base["cpu_s"] and base["send_latency_ms"]["p99"] and alt["send_latency_ms"]["p99"]:
+            print(f"\n{alt['loop']} vs {base['loop']}: "
+                  f"CPU {(alt['cpu_s'] / base['cpu_s'] - 1) * 100:+.1f}%, "
+                  f"p99 send latency {alt['send_latency_ms']['p99'] - base['send_latency_ms']['p99']:+.2f}ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare event loop implementations under synthetic voice load")
+    parser.add_argument("--sessions", type=int, default=50, help="Concurrent voice sessions")
+    parser.add_argument("--duration", type=float, default=20.0, help="Seconds of load per loop")
+    parser.add_argument("--frame-interval", type=float, default=0.02,
+                        help="Seconds between inbound audio frames per session (0 = as fast as possible)")
+    parser.add_argument("--loops", default=",".join(LOOPS), help="Comma-separated loops to compare")
+    parser.add_argument("--report", help="Write the comparison to this JSON file")
+    parser.add_argument("--serve", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.serve:
+        from utils.event_loop import install_event_loop
+        install_event_loop()
+        asyncio.run(serve(args.duration))
+        return
+
+    results = []
+    for loop in [name.strip() for name in args.loops.split(",") if name.strip()]:
+        if loop == "uvloop" and importlib.util.find_spec("uvloop") is None:
+            print("⏭️  uvloop is not installed (pip install uvloop), skipping")
+            continue
+        print(f"⏱️  {loop}: {args.sessions} sessions for {args.duration:.0f}s ...", flush=True)
+        results.append(run_loop(loop, args.sessions, args.duration, args.frame_interval))
+    print_comparison(results)
+
+    if args.report:
+        with open(args.report, "w", encoding="utf-8") as f:
+            json.dump({"python": sys.version.split()[0], "results": results}, f, indent=2)
+        print(f"\n💾 Report saved to {args.report}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,182 @@
+#!/usr/bin/env python3
+"""
+Intent Router Benchmark - accuracy on labeled utterances and per-turn cost
+
+Runs the router over a labeled set of caller utterances (including ordinary
+admissions questions that the old keyword check short-circuited) and reports
+accuracy, per-intent precision/recall and the matching cost per turn next to
+the previous substring-keyword check. Exits non-zero if accuracy drops below
+--min-accuracy, so it can gate changes to the patterns:
+
+    python benchmark_intent_router.py
+    python benchmark_intent_router.py --iterations 20000 --min-accuracy 0.95
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from services.intent_router import intent_router
+
+# (utterance, expected intent or None for "goes to the LLM")
+LABELED = [
+    # tech_stack
+    ("What tech stack are you built on?", "tech_stack"),
+    ("What's your technology stack?", "tech_stack"),
+    ("Which LLM do you use?", "tech_stack"),
+    ("So what model does your AI use for answers?", "tech_stack"),
+    ("What language model powers you?", "tech_stack"),
+    ("What model are you running on?", "tech_stack"),
+    ("How were you built?", "tech_stack"),
+    ("How are you developed", "tech_stack"),
+    ("What are you built with?", "tech_stack"),
+    ("what frameworks does this assistant use", "tech_stack"),
+    ("Are you ChatGPT?", "tech_stack"),
+    ("Is this bot using GPT-4?", "tech_stack"),
+    ("Are you powered by OpenAI?", "tech_stack"),
+    ("Tell me about your architecture.", "tech_stack"),
+    ("What powers you?", "tech_stack"),
+    ("Which database does this app use?", "tech_stack"),
+    ("Are you an LLM?", "tech_stack"),
+    ("what tools were you made with", "tech_stack"),
+    # identity
+    ("Who are you?", "identity"),
+    ("Hey, who are you exactly?", "identity"),
+    ("Am I talking to a real person?", "identity"),
+    ("Are you a robot?", "identity"),
+    ("Are you human?", "identity"),
+    ("What's your name?", "identity"),
+    ("Hi, who am I speaking with?", "identity"),
+    # farewell
+    ("Bye.", "farewell"),
+    ("Okay, goodbye!", "farewell"),
+    ("Thanks, bye bye", "farewell"),
+    ("That's all for now.", "farewell"),
+    ("see you later", "farewell"),
+    # Admissions questions that must reach the LLM
+    ("Which programming language will I learn in computer science?", None),
+    ("Do you offer foreign language courses?", None),
+    ("What language requirements do international students have?", None),
+    ("Is there a tool to check my application status?", None),
+    ("What tools does the library provide for research?", None),
+    ("Is there an API for the course catalog?", None),
+    ("What platform do online classes use?", None),
+    ("Which software do engineering students need?", None),
+    ("Do you have a Python programming course?", None),
+    ("How was the university developed over the years?", None),
+    ("What models of financial aid are available?", None),
+    ("Tell me about the database management class.", None),
+    ("What technology programs do you have?", None),
+    ("How do I apply for admission?", None),
+    ("What is the tuition for out of state students?", None),
+    ("Can you tell me about student housing?", None),
+    ("When is the application deadline for fall?", None),
+    ("Are you open on weekends?", None),
+    ("Who is the dean of the business school?", None),
+    ("I want to say goodbye to my old school and start at AUM.", None),
+    ("Is there a bus that goes to campus?", None),
+    ("What is the name of the nursing program?", None),
+    ("Does the campus have a react native club?", None),
+    ("What backend skills does the IT program teach?", None),
+    ("How are classes scheduled for working adults?", None),
+    ("What GPA do I need to get in?", None),
+    ("Are scholarships available for transfer students?", None),
+    # "you" meaning the university, not the assistant
+    ("What platform do you use for online classes?", None),
+    ("What software do you use for registration?", None),
+    ("Which tools do you use for tutoring?", None),
+    ("What database do you use for transcripts?", None),
+    ("What programming languages do you use in CS101?", None),
+    ("Who are you hiring for the fall?", None),
+    ("Who are you accepting for spring?", None),
+]
+
+_LEGACY_KEYWORDS = [
+    'tech stack', 'technology stack', 'tech-stack', 'techstack',
+    'framework', 'frameworks', 'tool', 'tools', 'technology', 'technologies',
+    'platform', 'platforms', 'software', 'library', 'libraries',
+    'programming language', 'language', 'languages', 'built with',
+    'using what', 'made with', 'developed with', 'created with',
+    'which technology', 'what technology', 'what tools', 'which tools',
+    'what framework', 'which framework', 'what platform', 'which platform',
+    'how are you built', 'how were you built', 'what are you built on',
+    'how were you developed', 'how are you developed', 'developed',
+    'what powers you', 'backend', 'frontend', 'database', 'api',
+    'openai', 'gpt', 'llm', 'model', 'ai model', 'language model',
+    'elevenlabs', 'websocket', 'python', 'javascript', 'react', 'node'
+]
+
+
+def legacy_route(text):
+    """The substring check the router replaced (tech stack only)."""
+    message_lower = text.lower()
+    return "tech_stack" if any(keyword in message_lower for keyword in _LEGACY_KEYWORDS) else None
+
+
+def router_route(text):
+    intent = intent_router.match(text)
+    return intent.name if intent else None
+
+
+def evaluate(route):
+    correct, stats, misses = 0, {}, []
+    for text, expected in LABELED:
+        got = route(text)
+        if got == expected:
+            correct += 1
+        else:
+            misses.append((text, expected, got))
+        for name in {expected, got} - {None}:
+            counts = stats.setdefault(name, {"tp": 0, "fp": 0, "fn": 0})
+            if got == expected:
+                counts["tp"] += 1
+            elif got == name:
+                counts["fp"] += 1
+            else:
+                counts["fn"] += 1
+    return correct / len(LABELED), stats, misses
+
+
+def per_turn_us(route, iterations):
+    texts = [text for text, _ in LABELED]
+    started = time.perf_counter()
+    for _ in range(iterations):
+        for text in texts:
+            route(text)
+    return (time.perf_counter() - started) / (iterations * len(texts)) * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Intent router accuracy and cost benchmark")
+    parser.add_argument("--iterations", type=int, default=2000, help="Passes over the labeled set for timing")
+    parser.add_argument("--min-accuracy", type=float, default=0.95, help="Fail below this router accuracy")
+    args = parser.parse_args()
+
+    print(f"🧭 {len(LABELED)} labeled utterances\n")
+    print(f"{'matcher':<10} {'accuracy':>9} {'us/turn':>9}")
+    results = {}
+    for name, route in (("legacy", legacy_route), ("router", router_route)):
+        accuracy, stats, misses = evaluate(route)
+        results[name] = (accuracy, stats, misses)
+        print(f"{name:<10} {accuracy:>9.1%} {per_turn_us(route, args.iterations):>9.2f}")
+
+    accuracy, stats, misses = results["router"]
+    print(f"\n{'intent':<12} {'precision':>10} {'recall':>8}")
+    for name, counts in sorted(stats.items()):
+        predicted, actual = counts["tp"] + counts["fp"], counts["tp"] + counts["fn"]
+        precision = counts["tp"] / predicted if predicted else 0.0
+        recall = counts["tp"] / actual if actual else 0.0
+        print(f"{name:<12} {precision:>10.1%} {recall:>8.1%}")
+    for text, expected, got in misses:
+        print(f"  ❌ '{text}': expected {expected}, got {got}")
+
+    if accuracy < args.min_accuracy:
+        print(f"\n❌ Router accuracy {accuracy:.1%} is below {args.min_accuracy:.0%}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
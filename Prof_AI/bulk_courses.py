@@ -0,0 +1,307 @@
+#!/usr/bin/env python3
+"""
+Bulk Course Operations - non-interactive maintenance over many course databases
+
+Runs one operation over every course database given (files, or directories
+searched for course_output.json), in parallel across a process pool, built
+on the same logic as manage_courses.py:
+
+    validate   validate_courses_database
+    repair     repair_courses_database, then re-validate
+    stats      course counts plus the indexed store's size and dedup savings
+    import     load each course_output.json into its course store
+    export     write each course store back out as JSON
+    dedupe     compact each course store (re-encoding content as shared blobs)
+    render     pre-render lessons for each store (prerender_lessons.py)
+
+Each database's store is <its directory>/store (config.COURSE_STORE_DIR for
+the configured database). Progress goes to stderr as databases finish; with
+--json, stdout is one JSON object per database followed by a summary line,
+for pipelines:
+
+    python bulk_courses.py validate /srv/envs --json | jq 'select(.status != "ok")'
+    python bulk_courses.py repair envs/*/data/courses/course_output.json
+
+Exit status: 0 all ok, 1 issues found (invalid data, lessons that failed to
+render), 2 an operation could not run.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Any, Callable, Dict, Iterator, List
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import config
+from manage_courses import backup_courses_file, repair_courses_database, validate_courses_database
+
+EXIT_OK = 0
+EXIT_INVALID = 1
+EXIT_ERROR = 2
+
+_EXIT_CODES = {"ok": EXIT_OK, "invalid": EXIT_INVALID, "error": EXIT_ERROR}
+
+
+def find_databases(paths: List[str]) -> List[str]:
+    """Course database files: the paths given, with directories searched recursively."""
+    name = os.path.basename(config.OUTPUT_JSON_PATH)
+    databases = []
+    for path in paths:
+        if os.path.isdir(path):
+            for root, dirs, files in os.walk(path):
+                dirs.sort()
+                if name in files:
+                    databases.append(os.path.join(root, name))
+        else:
+            databases.append(path)
+    return list(dict.fromkeys(os.path.abspath(path) for path in databases))
+
+
+def store_dir_for(db_path: str) -> str:
+    if os.path.abspath(db_path) == os.path.abspath(config.OUTPUT_JSON_PATH):
+        return config.COURSE_STORE_DIR
+    return os.path.join(os.path.dirname(db_path), "store")
+
+
+def _open_store(db_path: str, seed: bool = True):
+    from services.course_store import CourseStore
+    return CourseStore(store_dir_for(db_path), seed_json=db_path if seed else None)
+
+
+def _require(db_path: str):
+    if not os.path.exists(db_path):
+        raise FileNotFoundError(f"Course database file not found: {db_path}")
+
+
+# --- Operations (run in pool workers; each returns its part of the result) ---
+
+def _validate(db_path: str, options: Dict[str, Any]) -> Dict[str, Any]:
+    _require(db_path)
+    result = validate_courses_database(db_path)
+    return {
+        "status": "ok" if result["valid"] else "invalid",
+        "issues": result["issues"],
+        "stats": result["stats"],
+        "timing": result["timing"],
+    }
+
+
+def _repair(db_path: str, options: Dict[str, Any]) -> Dict[str, Any]:
+    _require(db_path)
+    before = validate_courses_database(db_path)
+    if before["valid"]:
+        return {"status": "ok", "repaired": False, "issues_before": 0, "issues": []}
+    if not repair_courses_database(db_path, backup=options["backup"]):
+        return {"status": "error", "error": "repair failed (see log)", "issues_before": len(before["issues"]),
+                "issues": before["issues"]}
+    after = validate_courses_database(db_path)
+    return {
+        "status": "ok" if after["valid"] else "invalid",
+        "repaired": True,
+        "issues_before": len(before["issues"]),
+        "issues": after["issues"],
+    }
+
+
+def _stats(db_path: str, options: Dict[str, Any]) -> Dict[str, Any]:
+    _require(db_path)
+    result = validate_courses_database(db_path)
+    if not result["stats"]:
+        # The file could not be read as a course list, so there is nothing to count
+        return {"status": "error", "error": "; ".join(result["issues"]), "issues": result["issues"]}
+    stats = dict(result["stats"])
+    stats.pop("course_ids", None)
+    report = {"status": "ok", "valid": result["valid"], "issue_count": len(result["issues"]),
+              "file_bytes": os.path.getsize(db_path), **stats}
+    store = _open_store(db_path, seed=False)
+    if os.path.exists(store.segment_path):
+        report["store"] = {**store.stats(), **store.dedup_stats()}
+        store.close()
+    return report
+
+
+def _import(db_path: str, options: Dict[str, Any]) -> Dict[str, Any]:
+    _require(db_path)
+    store = _open_store(db_path, seed=False)
+    try:
+        count = store.import_json(db_path)
+        return {"status": "ok", "courses": count, "store": store.directory}
+    finally:
+        store.close()
+
+
+def _export(db_path: str, options: Dict[str, Any]) -> Dict[str, Any]:
+    store = _open_store(db_path)
+    if options["output_dir"]:
+        # One file per database, named after its path below the databases' common directory
+        label = os.path.relpath(db_path, options["output_root"]).replace(os.sep, "__")
+        output = os.path.join(options["output_dir"], label)
+        os.makedirs(options["output_dir"], exist_ok=True)
+    else:
+        output = db_path
+    try:
+        backup = output == db_path and options["backup"]
+        if backup:
+            # The hard link keeps the old file; export_json renames the new one over it
+            backup_courses_file(db_path)
+        count = store.export_json(output)
+        result = {"status": "ok", "courses": count, "output": output}
+        if backup:
+            result["backup"] = f"{db_path}.backup"
+        return result
+    finally:
+        store.close()
+
+
+def _dedupe(db_path: str, options: Dict[str, Any]) -> Dict[str, Any]:
+    store = _open_store(db_path)
+    try:
+        before = store.dedup_stats()
+        compacted = store.compact()
+        after = store.dedup_stats()
+        return {"status": "ok", "before": before, "after": after, **compacted}
+    finally:
+        store.close()
+
+
+OPERATIONS: Dict[str, Callable[[str, Dict[str, Any]], Dict[str, Any]]] = {
+    "validate": _validate,
+    "repair": _repair,
+    "stats": _stats,
+    "import": _import,
+    "export": _export,
+    "dedupe": _dedupe,
+}
+
+
+def run_operation(operation: str, db_path: str, options: Dict[str, Any]) -> Dict[str, Any]:
+    """One operation on one database; failures become an "error" result, never an exception."""
+    started = time.perf_counter()
+    result: Dict[str, Any] = {"database": db_path, "operation": operation}
+    try:
+        result.update(OPERATIONS[operation](db_path, options))
+    except Exception as e:
+        result.update(status="error", error=f"{type(e).__name__}: {e}")
+    result["seconds"] = round(time.perf_counter() - started, 3)
+    return result
+
+
+def run_parallel(operation: str, databases: List[str], options: Dict[str, Any], workers: int) -> Iterator[Dict[str, Any]]:
+    """Results in completion order; databases are spread across the pool."""
+    if len(databases) == 1 or workers <= 1:
+        for db_path in databases:
+            yield run_operation(operation, db_path, options)
+        return
+    with ProcessPoolExecutor(max_workers=min(workers, len(databases))) as pool:
+        futures = {pool.submit(run_operation, operation, db_path, options): db_path for db_path in databases}
+        for future in as_completed(futures):
+            try:
+                yield future.result()
+            except Exception as e:
+                # The worker itself died (e.g. BrokenProcessPool); run_operation never raises
+                yield {"database": futures[future], "operation": operation, "status": "error",
+                       "error": f"{type(e).__name__}: {e}"}
+
+
+def run_render(databases: List[str], args) -> Iterator[Dict[str, Any]]:
+    """Lessons rendered one database at a time: provider concurrency is the limit, not CPU."""
+    from prerender_lessons import build_farm
+    languages = args.language or [lang.strip() for lang in config.LESSON_RENDER_LANGUAGES.split(",") if lang.strip()]
+    for db_path in databases:
+        started = time.perf_counter()
+        result: Dict[str, Any] = {"database": db_path, "operation": "render"}
+        try:
+            store = _open_store(db_path)
+            output = config.LESSON_RENDER_DIR if store.directory == config.COURSE_STORE_DIR \
+                else os.path.join(store.directory, "renders")
+            report = asyncio.run(build_farm(output, courses=store).run(languages, force=args.force))
+            store.close()
+            result.update(report, status="invalid" if report["failed"] else "ok", output=output)
+        except Exception as e:
+            result.update(status="error", error=f"{type(e).__name__}: {e}")
+        result["seconds"] = round(time.perf_counter() - started, 3)
+        yield result
+
+
+def _describe(result: Dict[str, Any]) -> str:
+    operation = result["operation"]
+    if result["status"] == "error":
+        return f"error: {result['error']}"
+    if operation in ("validate", "repair"):
+        issues = len(result.get("issues", []))
+        prefix = f"repaired {result['issues_before']} issue(s), " if result.get("repaired") else ""
+        return prefix + ("valid" if not issues else f"{issues} issue(s)")
+    if operation == "stats":
+        line = (f"{result.get('total_courses', 0)} courses, {result.get('total_modules', 0)} modules, "
+                f"{result.get('total_sub_topics', 0)} sub-topics")
+        if "store" in result:
+            line += f"; store {result['store']['segment_bytes'] / (1024 * 1024):.1f} MB ({result['store']['saved_pct']}% deduplicated)"
+        return line
+    if operation in ("import", "export"):
+        return f"{result['courses']} courses -> {result.get('output') or result.get('store')}"
+    if operation == "dedupe":
+        return (f"{result['before_bytes'] / (1024 * 1024):.1f} MB -> {result['after_bytes'] / (1024 * 1024):.1f} MB, "
+                f"{result['after']['saved_pct']}% of content deduplicated")
+    if operation == "render":
+        return f"{result['rendered']} rendered, {result['skipped']} up to date, {len(result['failed'])} failed"
+    return result["status"]
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Run a course maintenance operation over one or many course databases",
+        epilog="Exit status: 0 all ok, 1 issues found, 2 an operation could not run.",
+    )
+    parser.add_argument("operation", choices=sorted(list(OPERATIONS) + ["render"]))
+    parser.add_argument("databases", nargs="*",
+                        help="Course JSON files or directories to search (default: config.OUTPUT_JSON_PATH)")
+    parser.add_argument("--json", action="store_true", help="One JSON object per database on stdout, then a summary")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="Databases processed at once")
+    parser.add_argument("--no-backup", action="store_true", help="repair, export: do not keep a .backup of the old file")
+    parser.add_argument("--output-dir", help="export: write files here instead of over each database (which keeps a .backup)")
+    parser.add_argument("--language", action="append", help="render: language to render (repeatable)")
+    parser.add_argument("--force", action="store_true", help="render: re-render lessons that are up to date")
+    args = parser.parse_args()
+
+    databases = find_databases(args.databases or [config.OUTPUT_JSON_PATH])
+    if not databases:
+        print("No course databases found", file=sys.stderr)
+        sys.exit(EXIT_ERROR)
+
+    options = {
+        "backup": not args.no_backup,
+        "output_dir": args.output_dir,
+        "output_root": os.path.dirname(os.path.commonpath(databases)) if len(databases) == 1
+        else os.path.commonpath(databases),
+    }
+    if args.operation == "render":
+        results = run_render(databases, args)
+    else:
+        results = run_parallel(args.operation, databases, options, args.workers)
+
+    started = time.perf_counter()
+    counts = {"ok": 0, "invalid": 0, "error": 0}
+    for done, result in enumerate(results, 1):
+        counts[result["status"]] += 1
+        print(f"[{done}/{len(databases)}] {result['status'].upper():7} {result['database']}: {_describe(result)}",
+              file=sys.stderr, flush=True)
+        if args.json:
+            print(json.dumps(result, ensure_ascii=False), flush=True)
+
+    summary = {"operation": args.operation, "databases": len(databases), **counts,
+               "seconds": round(time.perf_counter() - started, 3)}
+    if args.json:
+        print(json.dumps({"summary": summary}), flush=True)
+    else:
+        print(f"\n{args.operation}: {counts['ok']} ok, {counts['invalid']} with issues, "
+              f"{counts['error']} failed in {summary['seconds']}s")
+    sys.exit(max(_EXIT_CODES[status] for status, count in counts.items() if count))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+"""
+Class Server Imports - one services/utils namespace for the class server
+
+The class server (archive/websocket_server.py) and the services it teaches
+with import ``services.X`` and ``utils.X`` both for their own modules
+(teaching_service, audio_service, chat_service, connection_monitor, ...)
+and for this tree's (course_cache, lesson_renders, teaching_cache, ...).
+Which ``services`` Python would find depends on the working directory and
+sys.path order, so wire() imports this tree's packages and appends the class
+server's directories to their __path__: every module then resolves the
+same way however the server (or prerender_lessons.py) was started. No
+module name exists in both trees.
+
+Features the class server can run without are imported with optional(),
+which logs a warning naming the feature it disables.
+"""
+
+import importlib
+import logging
+import os
+import sys
+from typing import Any, Tuple
+
+logger = logging.getLogger(__name__)
+
+ROOT_DIR = os.path.dirname(os.path.abspath(__file__))
+# The class server and its services/utils
+CLASS_SERVER_DIR = os.path.join(ROOT_DIR, "archive")
+
+
+def wire():
+    """Make ``services`` and ``utils`` this tree's packages, extended with the class server's modules."""
+    # Ahead of archive/: its utils is a regular package and would otherwise shadow ours
+    if ROOT_DIR in sys.path:
+        sys.path.remove(ROOT_DIR)
+    sys.path.insert(0, ROOT_DIR)
+    for name in ("services", "utils"):
+        package = importlib.import_module(name)
+        if os.path.dirname(os.path.abspath(getattr(package, "__file__", None) or "")) != os.path.join(ROOT_DIR, name):
+            raise ImportError(f"'{name}' was imported from {list(package.__path__)} before "
+                              f"class_server_imports.wire(); call it before importing services")
+        path = os.path.join(CLASS_SERVER_DIR, name)
+        if path not in package.__path__:
+            package.__path__.append(path)
+
+
+def optional(module: str, *names: str, feature: str) -> Tuple[Any, ...]:
+    """``names`` from ``module``, or all None (with a warning that ``feature`` is off) if it cannot be imported."""
+    try:
+        imported = importlib.import_module(module)
+        return tuple(getattr(imported, name) for name in names)
+    except (ImportError, AttributeError) as e:
+        logger.warning(f"⚠️ {feature} disabled: {e}")
+        return (None,) * len(names)
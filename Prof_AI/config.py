@@ -47,6 +47,99 @@ RETRIEVAL_SEARCH_TYPE = "similarity"
 
 # --- File Paths ---
 OUTPUT_JSON_PATH = os.path.join(COURSES_DIR, "course_output.json")
+# Indexed course store (course_output.json is imported into it on first use)
+COURSE_STORE_DIR = os.getenv("COURSE_STORE_DIR", os.path.join(COURSES_DIR, "store"))
+# Compact once superseded records are at least this share of the file and this size
+COURSE_STORE_COMPACT_RATIO = float(os.getenv("COURSE_STORE_COMPACT_RATIO", 0.5))
+COURSE_STORE_COMPACT_MIN_MB = float(os.getenv("COURSE_STORE_COMPACT_MIN_MB", 64))
+# courses.idx is rewritten once the journal has grown this much past it (and after compaction)
+COURSE_STORE_INDEX_INTERVAL_MB = float(os.getenv("COURSE_STORE_INDEX_INTERVAL_MB", 4))
+# Sub-topic text at least this long is checked for near-duplicates (MinHash) when saved
+COURSE_DEDUP_MIN_CHARS = int(os.getenv("COURSE_DEDUP_MIN_CHARS", 512))
+COURSE_DEDUP_NEAR_THRESHOLD = float(os.getenv("COURSE_DEDUP_NEAR_THRESHOLD", 0.8))
+# Sub-topic content kept in the class server's course cache (outlines are always cached)
+COURSE_CACHE_CONTENT_MB = float(os.getenv("COURSE_CACHE_CONTENT_MB", 64))
+# Pre-rendered class lessons (teaching script + audio per sub-topic, see prerender_lessons.py)
+LESSON_RENDER_DIR = os.getenv("LESSON_RENDER_DIR", os.path.join(COURSE_STORE_DIR, "renders"))
+LESSON_RENDER_LANGUAGES = os.getenv("LESSON_RENDER_LANGUAGES", "en-IN")
+# Sub-topics scripted / synthesized at once by a render run, and attempts per step
+LESSON_RENDER_LLM_CONCURRENCY = int(os.getenv("LESSON_RENDER_LLM_CONCURRENCY", 4))
+LESSON_RENDER_TTS_CONCURRENCY = int(os.getenv("LESSON_RENDER_TTS_CONCURRENCY", 2))
+LESSON_RENDER_RETRIES = int(os.getenv("LESSON_RENDER_RETRIES", 3))
+# Offline, so a teaching script may take far longer than a live start_class allows
+LESSON_RENDER_SCRIPT_TIMEOUT_S = float(os.getenv("LESSON_RENDER_SCRIPT_TIMEOUT_S", 120))
+# While a sub-topic plays, prepare the next one: its script and the first seconds of audio
+LESSON_PREFETCH_ENABLED = os.getenv("LESSON_PREFETCH_ENABLED", "True").lower() == "true"
+LESSON_PREFETCH_AUDIO_S = float(os.getenv("LESSON_PREFETCH_AUDIO_S", 15))
+# Also prefetch the first sub-topic of the next module (not only at the end of a module)
+LESSON_PREFETCH_NEXT_MODULE = os.getenv("LESSON_PREFETCH_NEXT_MODULE", "False").lower() == "true"
+LESSON_PREFETCH_BUDGET_MB = float(os.getenv("LESSON_PREFETCH_BUDGET_MB", 4))  # Per session
+LESSON_PREFETCH_SCRIPT_TIMEOUT_S = float(os.getenv("LESSON_PREFETCH_SCRIPT_TIMEOUT_S", 30))
+# Generated teaching scripts, shared by sessions and kept across restarts
+TEACHING_CACHE_ENABLED = os.getenv("TEACHING_CACHE_ENABLED", "True").lower() == "true"
+TEACHING_CACHE_PATH = os.getenv("TEACHING_CACHE_PATH", os.path.join(DATA_DIR, "teaching_cache.sqlite3"))
+TEACHING_CACHE_MAX_MB = float(os.getenv("TEACHING_CACHE_MAX_MB", 256))
+TEACHING_CACHE_TTL_S = float(os.getenv("TEACHING_CACHE_TTL_S", 30 * 24 * 3600))
+# start_class streams the script sentence by sentence into TTS instead of waiting for all of it
+CLASS_SENTENCE_STREAMING_ENABLED = os.getenv("CLASS_SENTENCE_STREAMING_ENABLED", "True").lower() == "true"
+CLASS_FIRST_SENTENCE_TIMEOUT_S = float(os.getenv("CLASS_FIRST_SENTENCE_TIMEOUT_S", 6))
+# A stream that stalls this long between sentences is abandoned for the fallback content
+CLASS_SENTENCE_IDLE_TIMEOUT_S = float(os.getenv("CLASS_SENTENCE_IDLE_TIMEOUT_S", 5))
+# After the first sentence, short sentences are joined into TTS requests of at least this length
+CLASS_TTS_MIN_SEGMENT_CHARS = int(os.getenv("CLASS_TTS_MIN_SEGMENT_CHARS", 80))
+# Sentences synthesized ahead of the one playing
+CLASS_TTS_LOOKAHEAD = int(os.getenv("CLASS_TTS_LOOKAHEAD", 2))
+
+# --- Logging ---
+# development (text, INFO) | debug (text, DEBUG) | production (JSON, hot-path sampling)
+LOG_PROFILE = os.getenv("LOG_PROFILE", "development")
+LOG_LEVEL = os.getenv("LOG_LEVEL", "")  # Overrides the profile's root level if set
+LOG_QUEUE_SIZE = int(os.getenv("LOG_QUEUE_SIZE", 10000))
+
+# --- Event Loop Watchdog ---
+LOOP_WATCHDOG_ENABLED = os.getenv("LOOP_WATCHDOG_ENABLED", "True").lower() == "true"
+LOOP_LAG_INTERVAL_S = float(os.getenv("LOOP_LAG_INTERVAL_S", 0.1))
+LOOP_STALL_THRESHOLD_S = float(os.getenv("LOOP_STALL_THRESHOLD_S", 0.1))
+LOOP_STALL_LOG_INTERVAL_S = float(os.getenv("LOOP_STALL_LOG_INTERVAL_S", 30))
+# Strict mode (tests): raise BlockingCallDetected when the watchdog stops
+LOOP_WATCHDOG_STRICT = os.getenv("LOOP_WATCHDOG_STRICT", "False").lower() == "true"
+# Event loop implementation: auto (uvloop if installed) | uvloop | asyncio
+EVENT_LOOP = os.getenv("EVENT_LOOP", "auto")
+
+# --- Session Resumption ---
+# A dropped client can reconnect with ?resume=<token> within the grace window
+SESSION_RESUME_ENABLED = os.getenv("SESSION_RESUME_ENABLED", "True").lower() == "true"
+SESSION_RESUME_TTL_S = float(os.getenv("SESSION_RESUME_TTL_S", 120))
+# A resume whose token is still held by a live (not yet timed-out) connection ends that connection;
+# how long to wait for it to park its session before starting fresh
+SESSION_TAKEOVER_TIMEOUT_S = float(os.getenv("SESSION_TAKEOVER_TIMEOUT_S", 5))
+# Where parked sessions live: memory (this node) | sqlite (file) | tcp (shared state server)
+SESSION_BACKEND = os.getenv("SESSION_BACKEND", "memory")
+SESSION_SQLITE_PATH = os.getenv("SESSION_SQLITE_PATH", os.path.join(DATA_DIR, "sessions.sqlite3"))
+SESSION_TCP_HOST = os.getenv("SESSION_TCP_HOST", "127.0.0.1")
+SESSION_TCP_PORT = int(os.getenv("SESSION_TCP_PORT", 8799))
+
+# --- Cluster ---
+NODE_ID = os.getenv("NODE_ID") or os.getenv("HOSTNAME", "node-1")
+# Sticky-routing peers, e.g. "node-a=ws://10.0.0.1:8766,node-b=ws://10.0.0.2:8766"
+CLUSTER_NODES = dict(
+    entry.split("=", 1) for entry in os.getenv("CLUSTER_NODES", "").split(",") if "=" in entry
+)
+DRAIN_TIMEOUT_S = float(os.getenv("DRAIN_TIMEOUT_S", 10))
+# How long a draining node lets an in-flight reply finish before migrating the client
+DRAIN_TURN_GRACE_S = float(os.getenv("DRAIN_TURN_GRACE_S", 8))
+# SIGUSR2 handoff: how long to wait for the new process to start serving
+HANDOFF_READY_TIMEOUT_S = float(os.getenv("HANDOFF_READY_TIMEOUT_S", 20))
+# Hand off even though parked sessions live in this process (SESSION_BACKEND=memory) and are lost
+HANDOFF_ALLOW_MEMORY_SESSIONS = os.getenv("HANDOFF_ALLOW_MEMORY_SESSIONS", "False").lower() == "true"
+# Written with the serving process's PID once it is ready (a handoff's new process takes it over);
+# signal that PID rather than whatever holds the port, which is both processes mid-handoff
+VOICE_PID_FILE = os.getenv("VOICE_PID_FILE", "")
+
+# --- Session Recording ---
+# Record every session for replay (clients can also send start_recording)
+SESSION_RECORDING_ENABLED = os.getenv("SESSION_RECORDING_ENABLED", "False").lower() == "true"
+SESSION_RECORDING_DIR = os.getenv("SESSION_RECORDING_DIR", os.path.join(DATA_DIR, "recordings"))
 
 # --- Audio Settings ---
 SARVAM_TTS_SPEAKER = "anushka"
@@ -57,6 +150,36 @@ ELEVENLABS_VOICE_ID = os.getenv("ELEVENLABS_VOICE_ID", "21m00Tcm4TlvDq8ikWAM")
 ELEVENLABS_MODEL = "eleven_flash_v2_5"  # Fast, low-latency model
 ELEVENLABS_AGENT_ID = os.getenv("ELEVENLABS_AGENT_ID")  # For Agents Platform
 
+# TTS hedging: race REST against a silent streaming socket after a first-byte deadline
+TTS_HEDGE_ENABLED = os.getenv("TTS_HEDGE_ENABLED", "True").lower() == "true"
+TTS_HEDGE_INITIAL_DEADLINE_S = float(os.getenv("TTS_HEDGE_INITIAL_DEADLINE_S", 1.5))
+TTS_HEDGE_MIN_DEADLINE_S = float(os.getenv("TTS_HEDGE_MIN_DEADLINE_S", 0.4))
+TTS_HEDGE_MAX_DEADLINE_S = float(os.getenv("TTS_HEDGE_MAX_DEADLINE_S", 3.0))
+TTS_HEDGE_PERCENTILE = float(os.getenv("TTS_HEDGE_PERCENTILE", 95))
+# How long a losing socket is kept (not forwarded) to measure the latency saved
+TTS_HEDGE_LOSER_GRACE_S = float(os.getenv("TTS_HEDGE_LOSER_GRACE_S", 2.0))
+
+# --- Latency Masking ---
+# Play a short pre-rendered filler phrase if no reply audio is ready by the deadline
+FILLER_ENABLED = os.getenv("FILLER_ENABLED", "True").lower() == "true"
+FILLER_DELAY_S = float(os.getenv("FILLER_DELAY_S", 0.7))
+FILLER_PHRASES = [
+    "Let me think about that.",
+    "Good question, one moment.",
+    "Sure, let me check.",
+]
+
+# --- Intent Routing ---
+# Answer fixed intents (tech stack, identity, farewell) without calling the LLM
+INTENT_ROUTER_ENABLED = os.getenv("INTENT_ROUTER_ENABLED", "True").lower() == "true"
+
+# --- Voice Note Transcription ---
+# Long uploads are cut at silence into segments transcribed in parallel
+TRANSCRIBE_SEGMENT_S = float(os.getenv("TRANSCRIBE_SEGMENT_S", 15))
+TRANSCRIBE_MAX_SEGMENT_S = float(os.getenv("TRANSCRIBE_MAX_SEGMENT_S", 25))
+TRANSCRIBE_OVERLAP_S = float(os.getenv("TRANSCRIBE_OVERLAP_S", 0.5))
+TRANSCRIBE_MAX_PARALLEL = int(os.getenv("TRANSCRIBE_MAX_PARALLEL", 4))
+
 # Agent greeting message
 AGENT_GREETING = "Hello! I'm Alex from Auburn University at Montgomery. I'm here to help you with information about our programs, admissions, and student life. How can I assist you today?"
 
@@ -65,6 +188,48 @@ HOST = os.getenv("HOST", "0.0.0.0")
 PORT = int(os.getenv("PORT", 5001))
 DEBUG = os.getenv("DEBUG", "True").lower() == "true"
 
+# --- Provider Resilience ---
+# Circuit breaker over the last BREAKER_WINDOW calls of each provider
+BREAKER_FAILURE_RATE = float(os.getenv("BREAKER_FAILURE_RATE", 0.5))
+BREAKER_SLOW_CALL_RATE = float(os.getenv("BREAKER_SLOW_CALL_RATE", 0.8))
+BREAKER_WINDOW = int(os.getenv("BREAKER_WINDOW", 20))
+BREAKER_MIN_CALLS = int(os.getenv("BREAKER_MIN_CALLS", 5))
+BREAKER_OPEN_S = float(os.getenv("BREAKER_OPEN_S", 15))
+# Longest a call may queue for a concurrency/rate slot before failing fast
+PROVIDER_MAX_QUEUE_WAIT_S = float(os.getenv("PROVIDER_MAX_QUEUE_WAIT_S", 2.0))
+
+# Per-provider limits (process-wide); *_SLOW_CALL_S is judged on time-to-first-byte
+OPENAI_MAX_CONCURRENCY = int(os.getenv("OPENAI_MAX_CONCURRENCY", 32))
+OPENAI_RATE_PER_S = float(os.getenv("OPENAI_RATE_PER_S", 20))
+OPENAI_BURST = float(os.getenv("OPENAI_BURST", 40))
+OPENAI_SLOW_CALL_S = float(os.getenv("OPENAI_SLOW_CALL_S", 8))
+ELEVENLABS_MAX_CONCURRENCY = int(os.getenv("ELEVENLABS_MAX_CONCURRENCY", 16))
+ELEVENLABS_RATE_PER_S = float(os.getenv("ELEVENLABS_RATE_PER_S", 10))
+ELEVENLABS_BURST = float(os.getenv("ELEVENLABS_BURST", 20))
+ELEVENLABS_SLOW_CALL_S = float(os.getenv("ELEVENLABS_SLOW_CALL_S", 4))
+DEEPGRAM_MAX_CONCURRENCY = int(os.getenv("DEEPGRAM_MAX_CONCURRENCY", 64))
+DEEPGRAM_RATE_PER_S = float(os.getenv("DEEPGRAM_RATE_PER_S", 20))
+DEEPGRAM_BURST = float(os.getenv("DEEPGRAM_BURST", 40))
+DEEPGRAM_SLOW_CALL_S = float(os.getenv("DEEPGRAM_SLOW_CALL_S", 3))
+
+# Pre-rendered audio for fast-fail fallbacks
+AUDIO_CACHE_DIR = os.path.join(DATA_DIR, "audio_cache")
+# Readiness waits for canned audio; while none could be rendered, warm-up retries this often
+CANNED_AUDIO_WARM_RETRY_S = float(os.getenv("CANNED_AUDIO_WARM_RETRY_S", 30))
+
+# --- Voice Session Lifecycle ---
+# Seconds without voiced audio before the upstream STT socket is suspended (0 disables)
+IDLE_STT_SUSPEND_S = float(os.getenv("IDLE_STT_SUSPEND_S", 15))
+# Seconds of inactivity before conversation history is compacted out of memory (0 disables)
+IDLE_HISTORY_EVICT_S = float(os.getenv("IDLE_HISTORY_EVICT_S", 120))
+# Seconds of inactivity before the session is closed (0 disables)
+IDLE_SESSION_CLOSE_S = float(os.getenv("IDLE_SESSION_CLOSE_S", 900))
+IDLE_TICK_S = float(os.getenv("IDLE_TICK_S", 1.0))
+# PCM16 RMS above which an inbound frame counts as voiced
+STT_VOICE_RMS_THRESHOLD = float(os.getenv("STT_VOICE_RMS_THRESHOLD", 500))
+# Silent frames kept while suspended and replayed on resume so word onsets are not clipped
+STT_RESUME_PREROLL_FRAMES = int(os.getenv("STT_RESUME_PREROLL_FRAMES", 3))
+
 # --- Supported Languages ---
 SUPPORTED_LANGUAGES = [
     {"code": "en-IN", "name": "English"},
@@ -98,3 +263,4 @@ os.makedirs(VECTORSTORE_DIR, exist_ok=True)
 os.makedirs(CHROMA_DB_PATH, exist_ok=True)
 os.makedirs(FAISS_DB_PATH, exist_ok=True)
 os.makedirs(COURSES_DIR, exist_ok=True)
+os.makedirs(AUDIO_CACHE_DIR, exist_ok=True)
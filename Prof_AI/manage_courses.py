@@ -3,11 +3,18 @@
 Course Management Utility - Validate, repair, and manage the course database
 """
 
+import argparse
 import os
 import json
 import logging
+import sys
+import time
 from typing import List, Dict, Any
 
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from utils.json_stream import iter_json_array, JSONStreamError, NotAJSONArray
+
 # Setup logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 
@@ -82,13 +89,30 @@ def validate_course_structure(course: Dict[str, Any], course_index: int = 0) ->
     
     return issues
 
+def _duplicate_key(value):
+    """Set key for a course_id/title; unhashable JSON values are keyed by their encoding."""
+    try:
+        hash(value)
+        return value
+    except TypeError:
+        return json.dumps(value, sort_keys=True)
+
+def _id_sort_key(course_id):
+    return (0, course_id, "") if isinstance(course_id, int) else (1, 0, str(course_id))
+
 def validate_courses_database(file_path: str) -> Dict[str, Any]:
-    """Validate the entire courses database."""
+    """
+    Validate the entire courses database.
+    
+    Courses are streamed from the file one at a time, so memory stays flat
+    however large the database grows.
+    """
+    started = time.perf_counter()
     result = {
         'valid': True,
         'issues': [],
         'stats': {},
-        'courses': []
+        'timing': {}
     }
     
     if not os.path.exists(file_path):
@@ -96,71 +120,108 @@ def validate_courses_database(file_path: str) -> Dict[str, Any]:
         result['issues'].append(f"Course database file not found: {file_path}")
         return result
     
+    course_ids, course_titles = set(), set()
+    id_list = []
+    counts = {'total_courses': 0, 'total_modules': 0, 'total_sub_topics': 0}
+    
     try:
-        with open(file_path, 'r', encoding='utf-8') as f:
-            data = json.load(f)
-    except Exception as e:
+        for index, course in enumerate(iter_json_array(file_path)):
+            counts['total_courses'] += 1
+            if not isinstance(course, dict):
+                result['issues'].append(f"Course {index}: Must be a dictionary")
+                result['valid'] = False
+                continue
+            
+            course_issues = validate_course_structure(course, index)
+            result['issues'].extend(course_issues)
+            if course_issues:
+                result['valid'] = False
+            
+            modules = course['modules'] if isinstance(course.get('modules'), list) else []
+            counts['total_modules'] += len(modules)
+            counts['total_sub_topics'] += sum(
+                len(module['sub_topics'])
+                for module in modules
+                if isinstance(module, dict) and isinstance(module.get('sub_topics'), list)
+            )
+            
+            # Check for duplicate IDs and titles
+            if 'course_id' in course:
+                key = _duplicate_key(course['course_id'])
+                if key in course_ids:
+                    result['issues'].append(f"Duplicate course_id: {course['course_id']}")
+                    result['valid'] = False
+                else:
+                    course_ids.add(key)
+                    id_list.append(course['course_id'])
+            
+            if 'course_title' in course:
+                key = _duplicate_key(course['course_title'])
+                if key in course_titles:
+                    result['issues'].append(f"Duplicate course_title: {course['course_title']}")
+                    result['valid'] = False
+                else:
+                    course_titles.add(key)
+    except NotAJSONArray:
         result['valid'] = False
-        result['issues'].append(f"Failed to load JSON: {e}")
+        result['issues'].append("Course database must be a list of courses")
         return result
-    
-    # Check if data is in correct format (should be a list)
-    if not isinstance(data, list):
+    except (OSError, JSONStreamError) as e:
         result['valid'] = False
-        result['issues'].append("Course database must be a list of courses")
+        result['issues'].append(f"Failed to load JSON: {e}")
         return result
     
-    # Validate each course
-    course_ids = []
-    course_titles = []
-    
-    for i, course in enumerate(data):
-        course_issues = validate_course_structure(course, i)
-        result['issues'].extend(course_issues)
-        
-        if course_issues:
-            result['valid'] = False
-        
-        # Check for duplicate IDs and titles
-        if 'course_id' in course:
-            if course['course_id'] in course_ids:
-                result['issues'].append(f"Duplicate course_id: {course['course_id']}")
-                result['valid'] = False
-            else:
-                course_ids.append(course['course_id'])
-        
-        if 'course_title' in course:
-            if course['course_title'] in course_titles:
-                result['issues'].append(f"Duplicate course_title: {course['course_title']}")
-                result['valid'] = False
-            else:
-                course_titles.append(course['course_title'])
-    
     # Generate statistics
     result['stats'] = {
-        'total_courses': len(data),
-        'course_ids': sorted(course_ids),
-        'total_modules': sum(len(course.get('modules', [])) for course in data),
-        'total_sub_topics': sum(
-            len(sub_topic) 
-            for course in data 
-            for module in course.get('modules', []) 
-            for sub_topic in [module.get('sub_topics', [])]
-        )
+        'total_courses': counts['total_courses'],
+        'course_ids': sorted(id_list, key=_id_sort_key),
+        'total_modules': counts['total_modules'],
+        'total_sub_topics': counts['total_sub_topics'],
     }
     
-    result['courses'] = data
+    elapsed = time.perf_counter() - started
+    size_mb = os.path.getsize(file_path) / (1024 * 1024)
+    result['timing'] = {
+        'seconds': round(elapsed, 3),
+        'file_mb': round(size_mb, 2),
+        'mb_per_s': round(size_mb / elapsed, 1) if elapsed > 0 else None,
+    }
     return result
 
-def repair_courses_database(file_path: str, backup: bool = True) -> bool:
-    """Attempt to repair common issues in the courses database."""
-    logging.info("Starting course database repair...")
+def write_courses_file(file_path: str, courses: List[Dict[str, Any]], backup: bool = False):
+    """
+    Write a course JSON file without ever leaving a partial one: the new file
+    is written and fsynced beside the old one, then renamed over it. With
+    ``backup`` the previous file is kept as .backup by hard link, not copy.
+    """
+    tmp_path = f"{file_path}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(courses, f, indent=4, ensure_ascii=False)
+        f.flush()
+        os.fsync(f.fileno())
+    
+    if backup:
+        backup_courses_file(file_path)
     
-    if backup and os.path.exists(file_path):
-        backup_path = f"{file_path}.backup"
+    os.replace(tmp_path, file_path)
+
+def backup_courses_file(file_path: str):
+    """Keep the current file as .backup (by hard link, not copy) before it is replaced."""
+    if not os.path.exists(file_path):
+        return
+    backup_path = f"{file_path}.backup"
+    if os.path.exists(backup_path):
+        os.remove(backup_path)
+    try:
+        os.link(file_path, backup_path)
+    except OSError:
         import shutil
         shutil.copy2(file_path, backup_path)
-        logging.info(f"Created backup: {backup_path}")
+    logging.info(f"Created backup: {backup_path}")
+
+def repair_courses_database(file_path: str, backup: bool = True) -> bool:
+    """Attempt to repair common issues in the courses database."""
+    logging.info("Starting course database repair...")
     
     validation_result = validate_courses_database(file_path)
     
@@ -168,7 +229,15 @@ def repair_courses_database(file_path: str, backup: bool = True) -> bool:
         logging.info("Database is already valid, no repairs needed")
         return True
     
-    courses = validation_result['courses']
+    try:
+        with open(file_path, 'r', encoding='utf-8') as f:
+            courses = json.load(f)
+    except Exception as e:
+        logging.error(f"Cannot repair, failed to load JSON: {e}")
+        return False
+    if not isinstance(courses, list) or not all(isinstance(course, dict) for course in courses):
+        logging.error("Cannot repair, course database must be a list of course objects")
+        return False
     repaired = False
     
     # Fix missing or invalid course IDs
@@ -230,8 +299,7 @@ def repair_courses_database(file_path: str, backup: bool = True) -> bool:
     
     if repaired:
         try:
-            with open(file_path, 'w', encoding='utf-8') as f:
-                json.dump(courses, f, indent=4, ensure_ascii=False)
+            write_courses_file(file_path, courses, backup=backup)
             logging.info("Database repaired and saved successfully")
             return True
         except Exception as e:
@@ -241,16 +309,74 @@ def repair_courses_database(file_path: str, backup: bool = True) -> bool:
         logging.info("No repairs were needed")
         return True
 
+def sync_course_store(import_path: str = None, export_path: str = None, compact: bool = False):
+    """Import a course_output.json into the indexed course store, export it back, or compact it."""
+    load_config()
+    from services.course_store import course_store
+    
+    if compact:
+        result = course_store.compact()
+        print(f"🗜️ Compacted {course_store.directory}: "
+              f"{result['before_bytes'] / (1024 * 1024):.1f} MB -> {result['after_bytes'] / (1024 * 1024):.1f} MB")
+    if import_path:
+        count = course_store.import_json(import_path)
+        print(f"📥 Imported {count} courses from {import_path} into {course_store.directory}")
+    if export_path:
+        count = course_store.export_json(export_path)
+        print(f"📤 Exported {count} courses from {course_store.directory} to {export_path}")
+
+def print_dedup_report(as_json: bool = False):
+    """Show how much sub-topic content the course store saves by sharing and delta-encoding it."""
+    load_config()
+    from services.course_store import course_store
+    
+    report = course_store.dedup_stats()
+    if as_json:
+        print(json.dumps(report, indent=2))
+        return
+    
+    print(f"♻️ Content deduplication in {course_store.directory}:")
+    print(f"  - Sub-topics: {report['sub_topics']} ({report['unique_contents']} distinct contents)")
+    print(f"  - Near-duplicates stored as deltas: {report['near_duplicate_deltas']}")
+    print(f"  - Content as referenced: {report['content_bytes'] / (1024 * 1024):.2f} MB")
+    print(f"  - Content as stored: {report['stored_bytes'] / (1024 * 1024):.2f} MB ({report['saved_pct']}% saved)")
+
 def main():
     """Main function to run course management operations."""
+    parser = argparse.ArgumentParser(description="Validate, repair and manage the course database")
+    parser.add_argument("--import-json", metavar="PATH", help="Replace the indexed course store with a course_output.json")
+    parser.add_argument("--export-json", metavar="PATH", help="Write the indexed course store out as course_output.json")
+    parser.add_argument("--compact", action="store_true", help="Drop superseded records from the indexed course store")
+    parser.add_argument("--dedup-report", action="store_true", help="Show content deduplication savings in the course store")
+    parser.add_argument("--file", metavar="PATH", help="Course database to validate (default: config.OUTPUT_JSON_PATH)")
+    parser.add_argument("--json", action="store_true", help="Validate only and print a JSON report; exits 1 if invalid")
+    args = parser.parse_args()
+    
+    if args.import_json or args.export_json or args.compact:
+        sync_course_store(args.import_json, args.export_json, args.compact)
+        return
+    
+    if args.dedup_report:
+        print_dedup_report(as_json=args.json)
+        return
+    
     config = load_config()
+    db_path = args.file or config.OUTPUT_JSON_PATH
+    
+    def validate():
+        return validate_courses_database(db_path)
+    
+    if args.json:
+        validation_result = validate()
+        print(json.dumps(validation_result, indent=2, ensure_ascii=False))
+        sys.exit(0 if validation_result['valid'] else 1)
     
     print("=== Course Database Management ===")
-    print(f"Database file: {config.OUTPUT_JSON_PATH}")
+    print(f"Database file: {db_path}")
     
     # Validate database
     print("\n1. Validating course database...")
-    validation_result = validate_courses_database(config.OUTPUT_JSON_PATH)
+    validation_result = validate()
     
     if validation_result['valid']:
         print("✅ Database is valid!")
@@ -267,15 +393,22 @@ def main():
         print(f"  - Total sub-topics: {validation_result['stats']['total_sub_topics']}")
         print(f"  - Course IDs: {validation_result['stats']['course_ids']}")
     
-    # Offer to repair if needed
-    if not validation_result['valid']:
+    if validation_result['timing']:
+        timing = validation_result['timing']
+        print(f"\n⏱️ Validated {timing['file_mb']} MB in {timing['seconds']}s ({timing['mb_per_s']} MB/s)")
+    
+    # Offer to repair if needed (non-interactive runs use bulk_courses.py repair)
+    if not validation_result['valid'] and not sys.stdin.isatty():
+        print(f"\n🔧 Run 'python bulk_courses.py repair {db_path}' to repair without prompting")
+    elif not validation_result['valid']:
         response = input("\n🔧 Would you like to attempt automatic repair? (y/n): ")
         if response.lower() == 'y':
-            success = repair_courses_database(config.OUTPUT_JSON_PATH)
+            success = repair_courses_database(db_path)
             if success:
                 print("✅ Database repaired successfully!")
+                print(f"   Run with --import-json {db_path} to load the repair into the course store")
                 # Re-validate
-                validation_result = validate_courses_database(config.OUTPUT_JSON_PATH)
+                validation_result = validate()
                 if validation_result['valid']:
                     print("✅ Database is now valid!")
                 else:
@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""
+Lesson Pre-rendering - teaching script and audio for every sub-topic, ahead of class
+
+Renders each course/module/sub-topic/language in the course store with the
+class server's own TeachingService (teaching script, formatted for TTS) and
+AudioService (Sarvam, in the lesson's language), so a pre-rendered lesson
+sounds like a live one, and stores the result under config.LESSON_RENDER_DIR
+(see services/lesson_renders.py), where start_class serves it without calling
+either provider. Provider calls are bounded by LESSON_RENDER_LLM_CONCURRENCY /
+LESSON_RENDER_TTS_CONCURRENCY, and a failed run is resumed by running it again:
+
+    python prerender_lessons.py                          # everything missing
+    python prerender_lessons.py --course 3 --language en-IN --language hi-IN
+    python prerender_lessons.py --course 3 --force       # re-render after a prompt change
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import config
+from class_server_imports import wire
+from services.course_store import CourseStore, course_store
+from services.lesson_renders import LessonRenderFarm, LessonRenderStore
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+
+def _class_services():
+    """TeachingService and AudioService, the modules start_class itself uses."""
+    wire()
+    from services.audio_service import AudioService
+    from services.teaching_service import TEACHING_PROMPT_VERSION, TeachingService
+    return TeachingService(), AudioService(), TEACHING_PROMPT_VERSION
+
+
+def build_farm(output: str = config.LESSON_RENDER_DIR, courses: CourseStore = course_store,
+               llm_concurrency: int = config.LESSON_RENDER_LLM_CONCURRENCY,
+               tts_concurrency: int = config.LESSON_RENDER_TTS_CONCURRENCY,
+               retries: int = config.LESSON_RENDER_RETRIES) -> LessonRenderFarm:
+    teaching_service, audio_service, prompt_version = _class_services()
+
+    async def generate_script(module_title: str, sub_topic_title: str, content: str, language: str) -> str:
+        # Truncated as start_class does before generating
+        if len(content) > 8000:
+            content = content[:7500] + "..."
+        # No fallback content: a failed generation is retried, never stored as the lesson
+        return await teaching_service.generate_teaching_content(
+            module_title=module_title,
+            sub_topic_title=sub_topic_title,
+            raw_content=content,
+            language=language,
+            timeout=config.LESSON_RENDER_SCRIPT_TIMEOUT_S,
+            fallback=False
+        )
+
+    async def synthesize(script: str, language: str) -> bytes:
+        # The same audio stream start_class sends; it yields nothing when synthesis fails
+        audio = b"".join([chunk async for chunk in audio_service.stream_audio_from_text(script, language)])
+        if not audio:
+            raise RuntimeError("no audio synthesized")
+        return audio
+
+    return LessonRenderFarm(
+        generate_script,
+        synthesize,
+        store=LessonRenderStore(output),
+        courses=courses,
+        llm_concurrency=llm_concurrency,
+        tts_concurrency=tts_concurrency,
+        retries=retries,
+        details={"provider": "sarvam", "speaker": config.SARVAM_TTS_SPEAKER,
+                 "llm_model": config.LLM_MODEL_NAME, "prompt_version": prompt_version},
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Pre-render class lessons (teaching script + audio)")
+    parser.add_argument("--course", action="append", help="Course id to render (repeatable, default: all)")
+    parser.add_argument("--language", action="append",
+                        help=f"Language to render (repeatable, default: {config.LESSON_RENDER_LANGUAGES})")
+    parser.add_argument("--output", default=config.LESSON_RENDER_DIR, help="Render directory")
+    parser.add_argument("--llm-concurrency", type=int, default=config.LESSON_RENDER_LLM_CONCURRENCY)
+    parser.add_argument("--tts-concurrency", type=int, default=config.LESSON_RENDER_TTS_CONCURRENCY)
+    parser.add_argument("--retries", type=int, default=config.LESSON_RENDER_RETRIES, help="Attempts per provider call")
+    parser.add_argument("--force", action="store_true", help="Re-render lessons that are already up to date")
+    parser.add_argument("--json", action="store_true", help="Print the report as JSON")
+    args = parser.parse_args()
+
+    languages = args.language or [lang.strip() for lang in config.LESSON_RENDER_LANGUAGES.split(",") if lang.strip()]
+    farm = build_farm(args.output, llm_concurrency=args.llm_concurrency,
+                      tts_concurrency=args.tts_concurrency, retries=args.retries)
+    report = asyncio.run(farm.run(languages, course_ids=args.course, force=args.force))
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print(f"\n🎬 Lessons: {report['lessons']} ({', '.join(languages)})")
+        print(f"   Rendered: {report['rendered']} (new scripts: {report['scripts']})")
+        print(f"   Up to date: {report['skipped']}")
+        print(f"   Failed: {len(report['failed'])}")
+        for failure in report["failed"]:
+            print(f"   ❌ {failure['job']}: {failure['error']}")
+        print(f"   Time: {report['elapsed_s']}s")
+        if report["failed"]:
+            print("\n   Run again to retry the failed lessons; finished ones are kept.")
+    sys.exit(1 if report["failed"] else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,193 @@
+#!/usr/bin/env python3
+"""
+Session Replay - drive the voice server with a recorded production session
+
+Replays a .aumrec file (see services/session_recorder.py) against an in-process
+SimpleAudioServer wired to offline fakes. Inbound audio and STT events follow
+the original timing (optionally time-compressed with --speed), and the recorded
+LLM/TTS timings stand in for the providers. The resulting latency distribution
+is printed, can be saved as JSON, and compared with a previous report:
+
+    python replay_session.py data/recordings/x.aumrec --report new.json
+    python replay_session.py data/recordings/x.aumrec --compare old.json
+"""
+
+import argparse
+import asyncio
+import base64
+import json
+import os
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import websockets
+
+import config
+from services.replay_fakes import ReplayClock, ReplaySTTService, ReplayVoiceService
+from services.session_recorder import AUDIO_IN, META, STT_EVENT, TURN, read_session
+from utils.metrics import RollingWindow, metrics
+
+# Server-side histograms included in the report
+REPORT_HISTOGRAMS = [
+    "llm_first_token_ms",
+    "turn_first_audio_ms",
+    "turn_total_ms",
+    "barge_in_to_silence_ms",
+    "loop_lag_ms",
+]
+# Time to keep listening after the last recorded event (recording seconds)
+DRAIN_S = 5.0
+
+
+def load_session(path):
+    """Split a recording into its meta, audio frames, STT events and turns."""
+    meta, audio, events, turns = {}, [], [], []
+    for record in read_session(path):
+        if record.kind == META:
+            meta.update(record.json())
+        elif record.kind == AUDIO_IN:
+            audio.append((record.offset, record.payload))
+        elif record.kind == STT_EVENT:
+            events.append((record.offset, record.json()))
+        elif record.kind == TURN:
+            turns.append((record.offset, record.json()))
+    turns.sort(key=lambda t: t[0])
+
+    # Start the replay timeline at the first inbound frame or STT event
+    starts = [offsets[0][0] for offsets in (audio, events) if offsets]
+    base = min(starts) if starts else 0.0
+    audio = [(offset - base, pcm) for offset, pcm in audio]
+    events = [(offset - base, event) for offset, event in events]
+    return meta, audio, events, [turn for _, turn in turns]
+
+
+async def replay(path, speed=1.0):
+    """Replay one recording and return a latency report."""
+    from run_simple_audio_server import SimpleAudioServer
+
+    meta, audio, events, turns = load_session(path)
+    clock = ReplayClock(speed)
+    config.SESSION_RECORDING_ENABLED = False
+    metrics.reset()
+
+    server = SimpleAudioServer(
+        host="127.0.0.1",
+        port=0,
+        service_factory=lambda: ReplayVoiceService(turns, clock),
+        stt_factory=lambda **kwargs: ReplaySTTService(events, clock, **kwargs),
+    )
+    reply_latency = RollingWindow()
+    counts = {"finals": 0, "replies": 0, "interrupted": 0, "fillers": 0}
+
+    async with websockets.serve(server.handle_client, "127.0.0.1", 0, max_size=16 * 1024 * 1024) as ws_server:
+        server.idle.start()
+        port = ws_server.sockets[0].getsockname()[1]
+        async with websockets.connect(f"ws://127.0.0.1:{port}", max_size=16 * 1024 * 1024) as ws:
+            while json.loads(await ws.recv()).get("type") != "connection_ready":
+                pass
+            await ws.send(json.dumps({
+                "type": "stt_stream_start",
+                "sample_rate": meta.get("sample_rate", 16000),
+                "language": meta.get("language", "en"),
+            }))
+
+            async def receive():
+                awaiting_since = None
+                async for message in ws:
+                    data = json.loads(message)
+                    kind = data.get("type")
+                    if kind == "stt_ready":
+                        clock.start()
+                    elif kind == "final_transcript":
+                        counts["finals"] += 1
+                        awaiting_since = time.monotonic()
+                    elif kind == "audio_chunk" and data.get("filler"):
+                        counts["fillers"] += 1
+                    elif kind == "audio_chunk" and awaiting_since is not None:
+                        reply_latency.add((time.monotonic() - awaiting_since) * 1000)
+                        counts["replies"] += 1
+                        awaiting_since = None
+                    elif kind == "tts_interrupted":
+                        counts["interrupted"] += 1
+
+            receiver = asyncio.create_task(receive())
+            while clock.offset() == 0.0 and not receiver.done():
+                await asyncio.sleep(0.01)
+
+            for offset, pcm in audio:
+                await clock.sleep_until(offset)
+                await ws.send(json.dumps({
+                    "type": "stt_audio_chunk",
+                    "audio": base64.b64encode(pcm).decode("utf-8"),
+                }))
+
+            last = max([audio[-1][0] if audio else 0.0, events[-1][0] if events else 0.0])
+            await clock.sleep_until(last + DRAIN_S)
+            await ws.send(json.dumps({"type": "stt_stream_end"}))
+            receiver.cancel()
+        server.idle.stop()
+
+    snapshot = metrics.snapshot()
+    return {
+        "recording": os.path.basename(path),
+        "speed": speed,
+        "recorded_turns": len(turns),
+        "counts": counts,
+        "reply_latency_ms": reply_latency.summary(),
+        "server": {
+            name: snapshot["histograms"][name]
+            for name in REPORT_HISTOGRAMS if name in snapshot["histograms"]
+        },
+    }
+
+
+def _ms(value):
+    return "-" if value is None else f"{value:.1f}"
+
+
+def _latency_rows(report):
+    rows = {"reply_latency_ms": report["reply_latency_ms"]}
+    rows.update(report.get("server", {}))
+    return rows
+
+
+def print_report(report, baseline=None):
+    print(f"\n📼 {report['recording']} @ {report['speed']}x: "
+          f"{report['counts']['finals']} finals, {report['counts']['replies']} replies, "
+          f"{report['counts']['interrupted']} interrupted replies, {report['counts']['fillers']} filler chunks")
+    base_rows = _latency_rows(baseline) if baseline else {}
+    for name, summary in _latency_rows(report).items():
+        line = f"  {name:<24} n={summary.get('count', 0):<4} p50={_ms(summary.get('p50'))} p95={_ms(summary.get('p95'))}"
+        before = base_rows.get(name)
+        if before and before.get("p95") is not None and summary.get("p95") is not None:
+            delta = summary["p95"] - before["p95"]
+            line += f"  (baseline p95={_ms(before['p95'])}, {delta:+.1f}ms)"
+        print(line)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay a recorded voice session against offline fakes")
+    parser.add_argument("recording", help="Path to a .aumrec session file")
+    parser.add_argument("--speed", type=float, default=1.0, help="Time compression factor (2.0 = twice as fast)")
+    parser.add_argument("--report", help="Write the latency report to this JSON file")
+    parser.add_argument("--compare", help="Baseline report JSON to compare against")
+    args = parser.parse_args()
+
+    report = asyncio.run(replay(args.recording, speed=args.speed))
+
+    baseline = None
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+    print_report(report, baseline)
+
+    if args.report:
+        with open(args.report, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"\n💾 Report saved to {args.report}")
+
+
+if __name__ == "__main__":
+    main()
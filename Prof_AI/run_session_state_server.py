@@ -0,0 +1,23 @@
+#!/usr/bin/env python3
+"""
+Session State Server
+Stand-in for a shared session store (SESSION_BACKEND=tcp) so several voice
+nodes can resume and migrate each other's sessions.
+"""
+
+import asyncio
+import logging
+
+import config
+from services.session_backends import SessionStateServer
+from utils.event_loop import install_event_loop
+from utils.log_pipeline import configure_logging
+
+configure_logging()
+
+if __name__ == "__main__":
+    install_event_loop()
+    try:
+        asyncio.run(SessionStateServer(config.SESSION_TCP_HOST, config.SESSION_TCP_PORT).serve_forever())
+    except KeyboardInterrupt:
+        logging.info("⚠️ Session state server stopped by user")
@@ -8,41 +8,108 @@ import asyncio
 import json
 import logging
 import base64
+import os
+import signal
+import socket
+import subprocess
+import sys
+import time
+from collections import deque
+from typing import Optional
+from urllib.parse import parse_qs, urlsplit
 import websockets
 from websockets.exceptions import ConnectionClosed
 from services.elevenlabs_direct_service import ElevenLabsDirectService
 from services.deepgram_stt_service import DeepgramSTTService as StreamingSTTService
+from services.turn_manager import TurnManager
+from services.idle_session_manager import IdleSessionManager
+from services.canned_audio import canned_audio
+from services.chunked_transcriber import ChunkedTranscription
+from services.health_endpoints import HealthEndpoints
+from services.session_recorder import SessionRecorder
+from services.session_backends import MemoryBackend
+from services.session_store import ParkedSession, SessionStore, new_resume_token
+from utils.metrics import metrics
+from utils.log_pipeline import STT, configure_logging
+from utils.loop_watchdog import LoopWatchdog
+from utils.event_loop import install_event_loop
+from utils.hash_ring import HashRing
 import config
 
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(levelname)s - %(message)s'
-)
+# Configure logging (formatting and I/O run off the event loop)
+configure_logging()
+stt_log = logging.getLogger(STT)
 
 class SimpleAudioServer:
     """Simple audio server with text input and audio output."""
     
-    def __init__(self, host="0.0.0.0", port=8766):
+    def __init__(self, host="0.0.0.0", port=8766,
+                 service_factory=ElevenLabsDirectService, stt_factory=StreamingSTTService):
         self.host = host
         self.port = port
+        # Factories let the session replayer swap in offline fakes
+        self.service_factory = service_factory
+        self.stt_factory = stt_factory
         self.active_connections = {}
+        self.watchdog = LoopWatchdog()
+        self.sessions = SessionStore()
+        # Peers for sticky routing / drain migration (empty when running alone)
+        self.ring = HashRing(config.CLUSTER_NODES)
+        self.draining = False
+        self.canned_audio_warm = False
+        self._warm_task: Optional[asyncio.Task] = None
+        self.health = HealthEndpoints(self)
+        self._ws_server = None
+        self._stop_requested: Optional[asyncio.Event] = None
+        self.idle = IdleSessionManager(
+            self.active_connections,
+            suspend_stt=self._suspend_stt,
+            close_session=self._close_idle_session
+        )
     
     async def handle_client(self, websocket):
         """Handle incoming client WebSocket connection."""
         client_id = id(websocket)
         logging.info(f"🔌 Client {client_id} connected from {websocket.remote_address}")
         
-        # Create ElevenLabs service for this client
-        service = ElevenLabsDirectService()
+        resume_token = self._resume_token_from_request(websocket)
+        if self.draining:
+            # Don't take new sessions while migrating the existing ones away
+            await self._redirect_and_close(websocket, resume_token, 'server_draining', 1013)
+            return
+        
+        # Reattach a parked session if the client presents a valid resume token
+        parked = None
+        if resume_token and config.SESSION_RESUME_ENABLED:
+            await self._take_over_live_session(resume_token)
+            parked = await self.sessions.claim(resume_token)
+        
+        # Create ElevenLabs service for this client (or reuse the parked, warm one)
+        service = (parked.service if parked else None) or self.service_factory()
+        if parked is not None:
+            parked.restore_history(service)
         
         self.active_connections[client_id] = {
             'websocket': websocket,
             'service': service,
-            'language': 'en',
+            'language': parked.language if parked else 'en',
             'stt': None,
-            'stt_task': None
+            'stt_task': None,
+            'stt_config': None,
+            'stt_suspended': False,
+            'stt_preroll': deque(maxlen=config.STT_RESUME_PREROLL_FRAMES),
+            'turns': TurnManager(service, websocket),
+            'recorder': None,
+            'upload': None,
+            'resume_token': new_resume_token(),
+            'resumable': config.SESSION_RESUME_ENABLED,
+            'handler': asyncio.current_task(),
+            'closing': False,
+            'released': asyncio.Event()
         }
+        self.idle.register(client_id)
+        if config.SESSION_RECORDING_ENABLED:
+            self._start_recording(client_id)
         
         try:
             # Send connection ready message
@@ -52,40 +119,19 @@ class SimpleAudioServer:
                 await websocket.send(json.dumps({
                     'type': 'connection_ready',
                     'message': 'Connected to AUM Voice Agent',
-                    'client_id': str(client_id)
+                    'client_id': str(client_id),
+                    'resume_token': self.active_connections[client_id]['resume_token'],
+                    'resumed': parked is not None
                 }))
             except ConnectionClosed:
                 return
             
-            # Send greeting
-            greeting = config.AGENT_GREETING
-            try:
-                if websocket.close_code is not None:
-                    return
-                await websocket.send(json.dumps({
-                    'type': 'agent_response',
-                    'text': greeting
-                }))
-            except ConnectionClosed:
-                return
-            
-            # Generate and send greeting audio (non-streaming)
-            logging.info(f"🎙️ Generating greeting audio...")
-            try:
-                audio_data = await service.text_to_speech(greeting)
-                if audio_data:
-                    audio_base64 = base64.b64encode(audio_data).decode('utf-8')
-                    try:
-                        if websocket.close_code is None:
-                            await websocket.send(json.dumps({
-                                'type': 'audio',
-                                'audio': audio_base64
-                            }))
-                        logging.info(f"✅ Sent greeting audio: {len(audio_data)} bytes")
-                    except ConnectionClosed:
-                        pass
-            except Exception as e:
-                logging.error(f"❌ Error generating greeting audio: {e}")
+            if parked is not None:
+                logging.info(f"♻️ Client {client_id} resumed a parked session")
+                await self._restore_parked_stt(client_id, parked)
+                metrics.inc("greetings_skipped")
+            else:
+                await self._send_greeting(websocket, service)
             
             # Handle incoming messages from client
             async for message in websocket:
@@ -104,17 +150,327 @@ class SimpleAudioServer:
         finally:
             # Cleanup
             if client_id in self.active_connections:
+                connection = self.active_connections[client_id]
+                connection['closing'] = True
                 try:
-                    service = self.active_connections[client_id]['service']
-                    await service.disconnect()
-                    stt = self.active_connections[client_id].get('stt')
-                    if stt:
-                        await stt.close()
+                    self.idle.unregister(client_id)
+                    await connection['turns'].close()
+                    await self._cancel_upload(connection)
+                    await self._stop_stt(connection)
+                    self._stop_recording(client_id)
+                    if connection.get('resumable'):
+                        # Keep the session for a reconnect within the grace window
+                        await self.sessions.park(connection['resume_token'], ParkedSession.capture(
+                            service,
+                            language=connection.get('language', 'en'),
+                            stt_config=connection.get('stt_config'),
+                            stt_suspended=connection.get('stt_suspended', False),
+                        ))
+                    else:
+                        await service.disconnect()
                 except:
                     pass
                 del self.active_connections[client_id]
+                connection['released'].set()
             logging.info(f"🧹 Cleaned up client {client_id}")
     
+    async def _take_over_live_session(self, resume_token: str):
+        """
+        End the live connection still holding ``resume_token``, if any, so its
+        session is parked for the reconnecting client to claim.
+        
+        A client that reconnects before its old socket hits the ping timeout
+        would otherwise find nothing parked: sessions are only parked once the
+        old handler gives up on the dead socket.
+        """
+        connection = next((conn for conn in self.active_connections.values()
+                           if conn['resume_token'] == resume_token), None)
+        if connection is None:
+            return
+        connection['resumable'] = True
+        if not connection['closing']:
+            try:
+                # Tell the old socket, if anyone is still there, why it is going away
+                await asyncio.wait_for(connection['websocket'].send(json.dumps({'type': 'session_taken_over'})), 1.0)
+            except (ConnectionClosed, asyncio.TimeoutError):
+                pass
+            if not connection['closing']:
+                connection['handler'].cancel()
+        try:
+            await asyncio.wait_for(connection['released'].wait(), config.SESSION_TAKEOVER_TIMEOUT_S)
+            metrics.inc("sessions_taken_over")
+        except asyncio.TimeoutError:
+            logging.warning("⚠️ Live session did not park in time for takeover; starting fresh")
+    
+    def _reconnect_url(self, key: str) -> Optional[str]:
+        """Where a client should reconnect: the ring's owner for ``key``, never this node."""
+        node = self.ring.node_for(key, exclude=[config.NODE_ID])
+        return config.CLUSTER_NODES.get(node) if node else None
+    
+    async def _redirect_and_close(self, websocket, resume_token: Optional[str], message_type: str, code: int):
+        try:
+            if websocket.close_code is None:
+                await websocket.send(json.dumps({
+                    'type': message_type,
+                    'resume_token': resume_token,
+                    'reconnect_url': self._reconnect_url(resume_token or str(id(websocket)))
+                }))
+                await websocket.close(code=code, reason='Server draining')
+        except ConnectionClosed:
+            pass
+    
+    async def drain(self, timeout: float = config.DRAIN_TIMEOUT_S) -> int:
+        """
+        Stop taking sessions and migrate the live ones: each client is told its
+        resume token and where to reconnect, then disconnected; its state is
+        parked in the session backend for the next node to claim.
+        
+        Returns the number of sessions migrated.
+        """
+        self.draining = True
+        connections = list(self.active_connections.items())
+        logging.info(f"🚚 Draining {len(connections)} sessions from node {config.NODE_ID}")
+        
+        # Let in-flight turns finish speaking (bounded), then hand each client off
+        started = time.monotonic()
+        turn_deadline = started + min(config.DRAIN_TURN_GRACE_S, timeout)
+        progress = asyncio.create_task(self._report_drain_progress(started))
+        try:
+            await asyncio.gather(*[
+                self._migrate_connection(connection, turn_deadline)
+                for _, connection in connections
+            ])
+            deadline = started + timeout
+            while self.active_connections and time.monotonic() < deadline:
+                await asyncio.sleep(0.05)
+        finally:
+            progress.cancel()
+        migrated = len(connections) - len(self.active_connections)
+        metrics.inc("sessions_migrated", migrated)
+        metrics.set_gauge("drain_sessions_remaining", len(self.active_connections))
+        metrics.set_gauge("drain_turns_in_flight", 0)
+        logging.info(f"🚚 Drain finished in {time.monotonic() - started:.1f}s: {migrated}/{len(connections)} sessions migrated")
+        return migrated
+    
+    async def _migrate_connection(self, connection, turn_deadline: float):
+        turns = connection['turns']
+        while turns.is_active and time.monotonic() < turn_deadline:
+            await asyncio.sleep(0.05)
+        if turns.is_active:
+            metrics.inc("drain_turns_cut")
+        connection['resumable'] = True
+        await self._redirect_and_close(connection['websocket'], connection['resume_token'], 'session_migrate', 1012)
+    
+    async def _report_drain_progress(self, started: float):
+        """Publish drain progress so it shows up in get_metrics while it runs."""
+        while True:
+            metrics.set_gauge("drain_sessions_remaining", len(self.active_connections))
+            metrics.set_gauge("drain_turns_in_flight", sum(
+                1 for conn in self.active_connections.values() if conn['turns'].is_active
+            ))
+            metrics.set_gauge("drain_elapsed_s", round(time.monotonic() - started, 2))
+            await asyncio.sleep(0.25)
+    
+    # --- Lifecycle: signals, graceful shutdown, listening-socket handoff ---
+    
+    @property
+    def serving(self) -> bool:
+        return self._ws_server is not None
+    
+    def request_shutdown(self):
+        """Ask start() to drain and return (SIGTERM / SIGINT)."""
+        if self._stop_requested is not None and not self._stop_requested.is_set():
+            logging.info("🛑 Shutdown requested, draining sessions...")
+            self._stop_requested.set()
+    
+    def _install_signal_handlers(self):
+        loop = asyncio.get_running_loop()
+        try:
+            loop.add_signal_handler(signal.SIGTERM, self.request_shutdown)
+            loop.add_signal_handler(signal.SIGINT, self.request_shutdown)
+            if hasattr(signal, 'SIGUSR2'):
+                loop.add_signal_handler(signal.SIGUSR2, lambda: asyncio.ensure_future(self.handoff()))
+        except NotImplementedError:
+            # Windows: no loop signal handlers; Ctrl+C still raises KeyboardInterrupt
+            pass
+    
+    async def shutdown(self, timeout: float = config.DRAIN_TIMEOUT_S):
+        """Stop listening, migrate live sessions and release background workers."""
+        if self.draining:
+            return
+        metrics.set_gauge("drain_state", 1)
+        if self._ws_server is not None:
+            # Stop accepting; existing connections stay up until migrated
+            self._ws_server.server.close()
+        await self.drain(timeout)
+        self.idle.stop()
+        if self._warm_task is not None:
+            self._warm_task.cancel()
+        await self.sessions.close()
+        await self.watchdog.stop()
+        metrics.set_gauge("drain_state", 2)
+    
+    async def _warm_canned_audio(self):
+        """Render the canned phrases; the server is warm once at least one is available."""
+        warm_service = self.service_factory()
+        while True:
+            try:
+                await canned_audio.warm(lambda text: warm_service.text_to_speech(text, canned_fallback=False))
+            except Exception as e:
+                logging.error(f"❌ Canned audio warm-up failed: {e}")
+            if canned_audio.loaded_count:
+                self.canned_audio_warm = True
+                logging.info(f"🔊 Canned audio warm: {canned_audio.loaded_count}/{len(canned_audio.phrases)} phrases")
+                return
+            logging.warning(f"⚠️ No canned audio available; retrying warm-up in {config.CANNED_AUDIO_WARM_RETRY_S:.0f}s")
+            await asyncio.sleep(config.CANNED_AUDIO_WARM_RETRY_S)
+    
+    async def handoff(self) -> bool:
+        """
+        Zero-downtime restart (SIGUSR2): start a new server process on the same
+        listening socket, wait until it is serving, then drain this one.
+        
+        The new process is started as a child of this one and outlives it, so a
+        supervisor that tracked this PID (start_voice_agent.sh's $SERVER_PID)
+        no longer tracks the server; find it by its port. Parked sessions only
+        survive if they are in a backend the new process can read, so handoff
+        is refused with the in-process memory backend unless
+        HANDOFF_ALLOW_MEMORY_SESSIONS is set.
+        """
+        if self._ws_server is None or self.draining:
+            return False
+        if isinstance(self.sessions.backend, MemoryBackend):
+            if not config.HANDOFF_ALLOW_MEMORY_SESSIONS:
+                logging.error("❌ Handoff refused: parked sessions are in process memory (SESSION_BACKEND=memory) "
+                              "and would be lost; use sqlite/tcp or set HANDOFF_ALLOW_MEMORY_SESSIONS")
+                metrics.inc("handoffs_failed")
+                return False
+            logging.warning("⚠️ Handing off with SESSION_BACKEND=memory: parked sessions will not be resumable")
+        listen_fd = self._ws_server.sockets[0].fileno()
+        os.set_inheritable(listen_fd, True)
+        ready_r, ready_w = os.pipe()
+        env = dict(os.environ, VOICE_LISTEN_FD=str(listen_fd), VOICE_READY_FD=str(ready_w))
+        logging.info("🔁 Handing the listening socket to a new server process...")
+        try:
+            process = subprocess.Popen([sys.executable] + sys.argv, env=env, pass_fds=(listen_fd, ready_w))
+        finally:
+            os.close(ready_w)
+        try:
+            ready = await asyncio.wait_for(asyncio.to_thread(os.read, ready_r, 1), timeout=config.HANDOFF_READY_TIMEOUT_S)
+        except asyncio.TimeoutError:
+            ready = b""
+        finally:
+            os.close(ready_r)
+        if not ready:
+            logging.error(f"❌ New server process {process.pid} did not become ready; keeping this one")
+            metrics.inc("handoffs_failed")
+            # It holds the inherited listening socket: it must not start accepting alongside this one
+            await asyncio.to_thread(self._stop_process, process)
+            return False
+        logging.info(f"✅ Server process {process.pid} is serving; draining this one")
+        metrics.inc("handoffs")
+        self.request_shutdown()
+        return True
+    
+    @staticmethod
+    def _stop_process(process: subprocess.Popen, grace: float = 5.0):
+        """Terminate and reap a child, killing it if it ignores SIGTERM."""
+        process.terminate()
+        try:
+            process.wait(timeout=grace)
+        except subprocess.TimeoutExpired:
+            process.kill()
+            process.wait()
+    
+    @staticmethod
+    def _inherited_socket() -> Optional[socket.socket]:
+        """Listening socket passed in by a handing-off parent, if any."""
+        fd = os.environ.pop('VOICE_LISTEN_FD', None)
+        return socket.socket(fileno=int(fd)) if fd else None
+    
+    @staticmethod
+    def _notify_ready():
+        if config.VOICE_PID_FILE:
+            tmp_path = f"{config.VOICE_PID_FILE}.tmp"
+            with open(tmp_path, 'w') as f:
+                f.write(f"{os.getpid()}\n")
+            os.replace(tmp_path, config.VOICE_PID_FILE)
+        fd = os.environ.pop('VOICE_READY_FD', None)
+        if fd:
+            os.write(int(fd), b"1")
+            os.close(int(fd))
+    
+    @staticmethod
+    def _release_pid_file():
+        """Remove the PID file unless a handoff's new process has already rewritten it."""
+        if not config.VOICE_PID_FILE:
+            return
+        try:
+            with open(config.VOICE_PID_FILE) as f:
+                if f.read().strip() == str(os.getpid()):
+                    os.remove(config.VOICE_PID_FILE)
+        except (OSError, ValueError):
+            pass
+    
+    @staticmethod
+    def _resume_token_from_request(websocket) -> Optional[str]:
+        """Read ?resume=<token> from the handshake path."""
+        request = getattr(websocket, 'request', None)
+        path = getattr(request, 'path', None) or getattr(websocket, 'path', '') or ''
+        values = parse_qs(urlsplit(path).query).get('resume')
+        return values[0] if values else None
+    
+    async def _restore_parked_stt(self, client_id, parked: ParkedSession):
+        """Bring STT back in the state the session was parked in."""
+        connection = self.active_connections[client_id]
+        cfg = parked.stt_config
+        if not cfg:
+            return
+        if parked.stt_suspended:
+            # It was idle anyway: stay suspended until the next voiced frame
+            connection['stt_config'] = cfg
+            connection['stt_suspended'] = True
+            self.idle.mark_stt_suspended(client_id)
+            return
+        ok = await self._start_stt(client_id, cfg.get('sample_rate', 16000), cfg.get('language', 'auto'))
+        try:
+            websocket = connection['websocket']
+            if websocket.close_code is None:
+                await websocket.send(json.dumps({'type': 'stt_ready' if ok else 'stt_unavailable'}))
+        except ConnectionClosed:
+            pass
+    
+    async def _send_greeting(self, websocket, service):
+        """Send the greeting text and audio to a new session."""
+        greeting = config.AGENT_GREETING
+        try:
+            if websocket.close_code is not None:
+                return
+            await websocket.send(json.dumps({
+                'type': 'agent_response',
+                'text': greeting
+            }))
+        except ConnectionClosed:
+            return
+        
+        # Generate and send greeting audio (non-streaming)
+        logging.info(f"🎙️ Generating greeting audio...")
+        try:
+            audio_data = await service.text_to_speech(greeting)
+            if audio_data:
+                audio_base64 = base64.b64encode(audio_data).decode('utf-8')
+                try:
+                    if websocket.close_code is None:
+                        await websocket.send(json.dumps({
+                            'type': 'audio',
+                            'audio': audio_base64
+                        }))
+                    logging.info(f"✅ Sent greeting audio: {len(audio_data)} bytes")
+                except ConnectionClosed:
+                    pass
+        except Exception as e:
+            logging.error(f"❌ Error generating greeting audio: {e}")
+    
     async def handle_client_message(self, client_id, data):
         """Handle JSON messages from client."""
         connection = self.active_connections.get(client_id)
@@ -127,7 +483,7 @@ class SimpleAudioServer:
         message_type = data.get('type')
         
         if message_type == 'audio_transcribe':
-            # Audio from client (user speaking) - transcribe it
+            # Whole voice note in one frame - transcribed in parallel segments
             audio_base64 = data.get('audio')
             language = data.get('language', 'en')
             
@@ -135,79 +491,46 @@ class SimpleAudioServer:
                 return
             
             logging.info(f"🎤 Received audio from client {client_id} for transcription")
+            self.idle.note_activity(client_id)
             
             try:
-                # Decode audio
-                audio_bytes = base64.b64decode(audio_base64)
-                
-                # Transcribe using Whisper
-                user_text = await service.transcribe_audio(audio_bytes, language)
-                
-                if not user_text:
-                    logging.warning("⚠️ No transcription result")
-                    return
-                
-                logging.info(f"💬 Transcribed: {user_text}")
-                
-                # Echo user message
-                try:
-                    if websocket.close_code is not None:
-                        return
-                    await websocket.send(json.dumps({
-                        'type': 'user_transcript',
-                        'text': user_text
-                    }))
-                except ConnectionClosed:
-                    return
-                
-                # Get LLM response
-                llm_response = await service.get_llm_response(user_text)
-                
-                # Send text response
-                try:
-                    if websocket.close_code is not None:
-                        return
-                    await websocket.send(json.dumps({
-                        'type': 'agent_response',
-                        'text': llm_response
-                    }))
-                except ConnectionClosed:
-                    return
-                
-                # Generate and send audio (streaming)
-                logging.info(f"🎙️ Generating audio response (streaming)...")
-                total_bytes = 0
-                async for chunk in service.text_to_speech_stream(llm_response):
-                    if not chunk:
-                        continue
-                    total_bytes += len(chunk)
-                    audio_base64 = base64.b64encode(chunk).decode('utf-8')
-                    try:
-                        if websocket.close_code is not None:
-                            break
-                        await websocket.send(json.dumps({
-                            'type': 'audio_chunk',
-                            'audio': audio_base64
-                        }))
-                    except ConnectionClosed:
-                        break
-                try:
-                    if websocket.close_code is None:
-                        await websocket.send(json.dumps({'type': 'audio_end'}))
-                except ConnectionClosed:
-                    pass
-                logging.info(f"✅ Sent audio stream: {total_bytes} bytes")
-                
+                upload = self._new_upload(service, language, int(data.get('sample_rate', 16000)))
+                await upload.feed(base64.b64decode(audio_base64))
+                await self._reply_to_voice_note(client_id, await upload.finish())
             except Exception as e:
-                logging.error(f"❌ Error processing audio: {e}")
-                try:
-                    if websocket.close_code is None:
-                        await websocket.send(json.dumps({
-                            'type': 'error',
-                            'message': 'Sorry, I had trouble understanding that.'
-                        }))
-                except ConnectionClosed:
-                    pass
+                await self._voice_note_failed(websocket, e)
+        
+        elif message_type == 'audio_upload_start':
+            # Incremental voice note: segments are transcribed while it uploads
+            await self._cancel_upload(connection)
+            connection['upload'] = self._new_upload(
+                service, data.get('language', 'en'), int(data.get('sample_rate', 16000))
+            )
+            self.idle.note_activity(client_id)
+        
+        elif message_type == 'audio_upload_chunk':
+            upload = connection.get('upload')
+            audio_base64 = data.get('audio')
+            if upload is None or not audio_base64:
+                return
+            self.idle.note_activity(client_id)
+            try:
+                await upload.feed(base64.b64decode(audio_base64))
+            except Exception as e:
+                await self._cancel_upload(connection)
+                await self._voice_note_failed(websocket, e)
+        
+        elif message_type == 'audio_upload_end':
+            upload = connection.get('upload')
+            if upload is None:
+                return
+            connection['upload'] = None
+            logging.info(f"🎤 Voice note from client {client_id} uploaded, finishing transcription")
+            try:
+                await self._reply_to_voice_note(client_id, await upload.finish())
+            except Exception as e:
+                await upload.cancel()
+                await self._voice_note_failed(websocket, e)
         
         elif message_type == 'text':
             # User sent text input
@@ -216,6 +539,7 @@ class SimpleAudioServer:
                 return
             
             logging.info(f"💬 Client {client_id} said: {user_text}")
+            self.idle.note_activity(client_id)
             
             # Echo user message
             try:
@@ -279,175 +603,52 @@ class SimpleAudioServer:
             except ConnectionClosed:
                 pass
         
+        elif message_type == 'get_metrics':
+            # Process-wide latency and barge-in metrics
+            try:
+                if websocket.close_code is None:
+                    await websocket.send(json.dumps({
+                        'type': 'metrics_response',
+                        'metrics': metrics.snapshot()
+                    }))
+            except ConnectionClosed:
+                pass
+        
+        elif message_type in ('start_recording', 'stop_recording'):
+            if message_type == 'start_recording':
+                recorder = self._start_recording(client_id)
+                reply = {'type': 'recording_started', 'path': recorder.path}
+            else:
+                path = self._stop_recording(client_id)
+                reply = {'type': 'recording_stopped', 'path': path}
+            try:
+                if websocket.close_code is None:
+                    await websocket.send(json.dumps(reply))
+            except ConnectionClosed:
+                pass
+
         elif message_type == 'disconnect':
-            # Client wants to disconnect
+            # Client wants to disconnect: end the session, don't park it
+            connection['resumable'] = False
             await service.disconnect()
             await websocket.close()
 
         elif message_type == 'stt_stream_start':
             language = data.get('language', 'auto')
             sample_rate = int(data.get('sample_rate', 16000))
-            stt = StreamingSTTService(sample_rate=sample_rate, language_hint=None if language == 'auto' else language)
-            if not stt.enabled:
-                try:
-                    if websocket.close_code is None:
-                        await websocket.send(json.dumps({'type': 'stt_unavailable'}))
-                except ConnectionClosed:
-                    pass
-                return
-            ok = await stt.start()
-            if not ok:
-                try:
-                    if websocket.close_code is None:
-                        await websocket.send(json.dumps({'type': 'stt_unavailable'}))
-                except ConnectionClosed:
-                    pass
-                return
-            connection['stt'] = stt
-            # Start event pump with VAD and barge-in support
-            async def stt_event_pump(client_id_inner: int):
-                conn = self.active_connections.get(client_id_inner)
-                if not conn:
-                    return
-                ws = conn['websocket']
-                stt_service = conn.get('stt')
-                if not stt_service:
-                    return
-                
-                # Track conversation state for barge-in
-                conn['is_speaking'] = False
-                conn['current_tts_task'] = None
-                
-                async for event in stt_service.recv():
-                    etype = event.get('type')
-                    text = event.get('text', '')
-                    
-                    if etype == 'speech_started':
-                        # User started speaking - implement barge-in
-                        logging.info("🗣️ User started speaking - enabling barge-in")
-                        conn['is_speaking'] = True
-                        logging.debug(f"🔧 is_speaking set to: {conn['is_speaking']}")
-                        
-                        # Cancel current TTS if playing
-                        if conn.get('current_tts_task') and not conn['current_tts_task'].done():
-                            logging.info("⏹️ Interrupting current TTS (barge-in)")
-                            conn['current_tts_task'].cancel()
-                            try:
-                                await ws.send(json.dumps({'type': 'tts_interrupted'}))
-                            except ConnectionClosed:
-                                break
-                        
-                        try:
-                            await ws.send(json.dumps({'type': 'speech_started'}))
-                        except ConnectionClosed:
-                            break
-                            
-                    elif etype == 'utterance_end':
-                        # User stopped speaking
-                        logging.info("🔇 User stopped speaking")
-                        conn['is_speaking'] = False
-                        logging.debug(f"🔧 is_speaking set to: {conn['is_speaking']}")
-                        try:
-                            await ws.send(json.dumps({'type': 'utterance_end'}))
-                        except ConnectionClosed:
-                            break
-                            
-                    elif etype == 'partial' and text:
-                        try:
-                            if ws.close_code is not None:
-                                break
-                            await ws.send(json.dumps({'type': 'partial_transcript', 'text': text}))
-                        except ConnectionClosed:
-                            break
-                            
-                    elif etype == 'final':
-                        # Final transcript from STT - also ensure is_speaking is reset
-                        logging.info(f"📝 Final transcript: {text}")
-                        conn['is_speaking'] = False  # Safety: reset speaking state on final transcript
-                        logging.debug(f"🔧 is_speaking reset to: {conn['is_speaking']} (final transcript)")
-                        try:
-                            await ws.send(json.dumps({'type': 'final_transcript', 'text': text, 'language': event.get('language', 'en')}))
-                        except ConnectionClosed:
-                            break
-                        
-                        # Process LLM and TTS streaming for final transcript
-                        logging.info(f"🤖 Processing final transcript: {text}")
-                        
-                        try:
-                            llm_response = await connection['service'].get_llm_response(text)
-                            
-                            try:
-                                if ws.close_code is not None:
-                                    return
-                                await ws.send(json.dumps({'type': 'agent_response', 'text': llm_response}))
-                            except ConnectionClosed:
-                                return
-                            
-                            # Create TTS task (non-streaming) for potential cancellation
-                            async def send_tts_response():
-                                try:
-                                    # If user already started speaking, skip generating TTS
-                                    if conn.get('is_speaking', False):
-                                        logging.info("🛑 Skipping TTS: user is speaking")
-                                        return
-                                    audio_data = await connection['service'].text_to_speech(llm_response)
-                                    if not audio_data:
-                                        return
-                                    # If user started speaking during generation, skip sending
-                                    if conn.get('is_speaking', False):
-                                        logging.info("🛑 Skipping TTS send: user started speaking")
-                                        return
-                                    audio_b64 = base64.b64encode(audio_data).decode('utf-8')
-                                    try:
-                                        if ws.close_code is None:
-                                            await ws.send(json.dumps({'type': 'audio', 'audio': audio_b64}))
-                                    except ConnectionClosed:
-                                        pass
-                                    logging.info(f"✅ TTS completed: {len(audio_data)} bytes")
-                                except asyncio.CancelledError:
-                                    logging.info("🛑 TTS task cancelled (barge-in)")
-                                    try:
-                                        if ws.close_code is None:
-                                            await ws.send(json.dumps({'type': 'tts_cancelled'}))
-                                    except ConnectionClosed:
-                                        pass
-                                except Exception as e:
-                                    logging.error(f"❌ TTS error: {e}")
-                            
-                            # Start TTS task
-                            tts_task = asyncio.create_task(send_tts_response())
-                            conn['current_tts_task'] = tts_task
-                            
-                            # Wait for completion or cancellation
-                            try:
-                                await tts_task
-                            except asyncio.CancelledError:
-                                pass
-                            finally:
-                                conn['current_tts_task'] = None
-                                
-                        except Exception as e:
-                            logging.error(f"❌ Error processing LLM response: {e}")
-                            try:
-                                if ws.close_code is None:
-                                    await ws.send(json.dumps({
-                                        'type': 'error',
-                                        'message': 'Sorry, I had trouble processing that.'
-                                    }))
-                            except ConnectionClosed:
-                                pass
-            task = asyncio.create_task(stt_event_pump(client_id))
-            connection['stt_task'] = task
+            if connection.get('stt_suspended'):
+                # A fresh stream replaces the suspended one, as stt_stream_end would have
+                connection['stt_suspended'] = False
+                connection['stt_preroll'].clear()
+                self.idle.mark_stt_resumed(client_id)
+            ok = await self._start_stt(client_id, sample_rate, language)
             try:
                 if websocket.close_code is None:
-                    await websocket.send(json.dumps({'type': 'stt_ready'}))
+                    await websocket.send(json.dumps({'type': 'stt_ready' if ok else 'stt_unavailable'}))
             except ConnectionClosed:
                 pass
 
         elif message_type == 'stt_audio_chunk':
-            stt = connection.get('stt')
-            if not stt:
-                return
             audio_base64 = data.get('audio')
             if not audio_base64:
                 return
@@ -457,42 +658,306 @@ class SimpleAudioServer:
                 return
             # Debug log to verify audio flow and chunk sizes
             try:
-                logging.debug(f"🎧 STT chunk received: {len(pcm_bytes)} bytes")
+                stt_log.debug("🎧 STT chunk received: %d bytes", len(pcm_bytes))
             except Exception:
                 pass
+            recorder = connection.get('recorder')
+            if recorder is not None:
+                recorder.audio_in(pcm_bytes)
+            voiced = self.idle.note_audio(client_id, pcm_bytes)
+            if connection.get('stt_suspended'):
+                # STT was suspended for idleness: keep a short pre-roll and
+                # reconnect on the first voiced frame
+                if not voiced:
+                    connection['stt_preroll'].append(pcm_bytes)
+                    return
+                await self._resume_stt(client_id, pcm_bytes)
+                return
+            stt = connection.get('stt')
+            if not stt:
+                return
             await stt.send_audio_chunk(pcm_bytes)
 
         elif message_type == 'stt_stream_end':
-            stt = connection.get('stt')
-            if stt:
-                await stt.close()
-                connection['stt'] = None
-            t = connection.get('stt_task')
-            if t and not t.done():
+            await self._stop_stt(connection)
+            if connection.get('stt_suspended'):
+                connection['stt_suspended'] = False
+                self.idle.mark_stt_resumed(client_id)
+            connection['stt_config'] = None
+    
+    @staticmethod
+    def _new_upload(service, language: str, sample_rate: int) -> ChunkedTranscription:
+        return ChunkedTranscription(
+            lambda pcm: service.transcribe_audio(pcm, language, sample_rate),
+            sample_rate=sample_rate
+        )
+    
+    @staticmethod
+    async def _cancel_upload(connection):
+        upload, connection['upload'] = connection.get('upload'), None
+        if upload is not None:
+            await upload.cancel()
+    
+    async def _reply_to_voice_note(self, client_id, user_text: str):
+        """Echo a transcribed voice note and answer it as a turn."""
+        connection = self.active_connections.get(client_id)
+        if not connection:
+            return
+        websocket = connection['websocket']
+        
+        if not user_text:
+            logging.warning("⚠️ No transcription result")
+            return
+        
+        logging.info(f"💬 Transcribed: {user_text}")
+        
+        # Echo user message
+        try:
+            if websocket.close_code is not None:
+                return
+            await websocket.send(json.dumps({
+                'type': 'user_transcript',
+                'text': user_text
+            }))
+        except ConnectionClosed:
+            return
+        
+        # Reply as a cancellable turn (filler masking, barge-in)
+        await connection['turns'].start_turn(user_text)
+    
+    @staticmethod
+    async def _voice_note_failed(websocket, error: Exception):
+        logging.error(f"❌ Error processing audio: {error}")
+        try:
+            if websocket.close_code is None:
+                await websocket.send(json.dumps({
+                    'type': 'error',
+                    'message': 'Sorry, I had trouble understanding that.'
+                }))
+        except ConnectionClosed:
+            pass
+    
+    async def _start_stt(self, client_id, sample_rate: int, language: str) -> bool:
+        """Open a streaming STT session for a client and start its event pump."""
+        connection = self.active_connections.get(client_id)
+        if not connection:
+            return False
+        await self._stop_stt(connection)
+        stt = self.stt_factory(sample_rate=sample_rate, language_hint=None if language == 'auto' else language)
+        if not stt.enabled:
+            return False
+        ok = await stt.start()
+        if not ok:
+            return False
+        connection['stt'] = stt
+        connection['stt_config'] = {'sample_rate': sample_rate, 'language': language}
+        if connection.get('recorder') is not None:
+            connection['recorder'].meta(sample_rate=sample_rate, language=language)
+        # Start event pump with VAD and barge-in support
+        connection['stt_task'] = asyncio.create_task(self._stt_event_pump(client_id))
+        self.idle.note_stt_started(client_id)
+        return True
+    
+    async def _stop_stt(self, connection):
+        """Close a client's STT session and its event pump."""
+        stt = connection.get('stt')
+        if stt:
+            connection['stt'] = None
+            await stt.close()
+        t = connection.get('stt_task')
+        if t and not t.done():
+            try:
+                t.cancel()
+            except Exception:
+                pass
+        connection['stt_task'] = None
+    
+    async def _suspend_stt(self, client_id):
+        """Release the upstream STT socket of a client that has gone quiet."""
+        connection = self.active_connections.get(client_id)
+        if not connection or not connection.get('stt'):
+            return
+        await self._stop_stt(connection)
+        connection['stt_suspended'] = True
+        connection['stt_preroll'].clear()
+        self.idle.mark_stt_suspended(client_id)
+        logging.info(f"💤 Suspended STT for client {client_id} (no voiced audio)")
+    
+    async def _resume_stt(self, client_id, pcm_bytes: bytes):
+        """Reconnect STT after suspension and replay the pre-roll plus the voiced frame."""
+        connection = self.active_connections.get(client_id)
+        if not connection:
+            return
+        connection['stt_suspended'] = False
+        self.idle.mark_stt_resumed(client_id)
+        cfg = connection.get('stt_config') or {}
+        ok = await self._start_stt(client_id, cfg.get('sample_rate', 16000), cfg.get('language', 'auto'))
+        if not ok:
+            logging.error(f"❌ Failed to resume STT for client {client_id}")
+            try:
+                websocket = connection['websocket']
+                if websocket.close_code is None:
+                    await websocket.send(json.dumps({'type': 'stt_unavailable'}))
+            except ConnectionClosed:
+                pass
+            return
+        logging.info(f"🔔 Resumed STT for client {client_id}")
+        stt = connection['stt']
+        preroll = list(connection['stt_preroll'])
+        connection['stt_preroll'].clear()
+        for frame in preroll + [pcm_bytes]:
+            await stt.send_audio_chunk(frame)
+    
+    def _start_recording(self, client_id) -> SessionRecorder:
+        """Record this session (inbound audio, STT events, turn timings) for replay."""
+        connection = self.active_connections[client_id]
+        if connection.get('recorder') is None:
+            cfg = connection.get('stt_config') or {}
+            recorder = SessionRecorder.for_client(
+                client_id, sample_rate=cfg.get('sample_rate', 16000), language=cfg.get('language', 'en')
+            )
+            connection['recorder'] = recorder
+            connection['turns'].recorder = recorder
+            logging.info(f"📼 Recording session {client_id} to {recorder.path}")
+        return connection['recorder']
+
+    def _stop_recording(self, client_id) -> Optional[str]:
+        connection = self.active_connections.get(client_id)
+        recorder = connection.get('recorder') if connection else None
+        if recorder is None:
+            return None
+        connection['recorder'] = None
+        connection['turns'].recorder = None
+        recorder.close()
+        return recorder.path
+
+    async def _close_idle_session(self, client_id):
+        """Close a session that has been inactive past the reaper deadline."""
+        connection = self.active_connections.get(client_id)
+        if not connection:
+            return
+        websocket = connection['websocket']
+        connection['resumable'] = False
+        logging.info(f"🪦 Closing idle session {client_id}")
+        try:
+            if websocket.close_code is None:
+                await websocket.send(json.dumps({'type': 'session_idle_timeout'}))
+                await websocket.close(code=1000, reason='Idle timeout')
+        except ConnectionClosed:
+            pass
+    
+    async def _stt_event_pump(self, client_id):
+        """Forward STT events to the client and drive turns with VAD and barge-in."""
+        conn = self.active_connections.get(client_id)
+        if not conn:
+            return
+        ws = conn['websocket']
+        stt_service = conn.get('stt')
+        if not stt_service:
+            return
+        
+        # Track conversation state for barge-in
+        conn['is_speaking'] = False
+        turns = conn['turns']
+        
+        async for event in stt_service.recv():
+            recorder = conn.get('recorder')
+            if recorder is not None:
+                recorder.stt_event(event)
+            etype = event.get('type')
+            text = event.get('text', '')
+            
+            if etype == 'speech_started':
+                # User started speaking - implement barge-in
+                logging.info("🗣️ User started speaking - enabling barge-in")
+                conn['is_speaking'] = True
+                logging.debug(f"🔧 is_speaking set to: {conn['is_speaking']}")
+                
+                self.idle.note_activity(client_id)
+                
+                # Cancel the whole in-flight turn (LLM + TTS + queued audio)
+                await turns.barge_in()
+                
                 try:
-                    t.cancel()
-                except Exception:
-                    pass
-                connection['stt_task'] = None
+                    await ws.send(json.dumps({'type': 'speech_started'}))
+                except ConnectionClosed:
+                    break
+                    
+            elif etype == 'utterance_end':
+                # User stopped speaking
+                logging.info("🔇 User stopped speaking")
+                conn['is_speaking'] = False
+                logging.debug(f"🔧 is_speaking set to: {conn['is_speaking']}")
+                try:
+                    await ws.send(json.dumps({'type': 'utterance_end'}))
+                except ConnectionClosed:
+                    break
+                    
+            elif etype == 'partial' and text:
+                try:
+                    if ws.close_code is not None:
+                        break
+                    await ws.send(json.dumps({'type': 'partial_transcript', 'text': text}))
+                except ConnectionClosed:
+                    break
+                    
+            elif etype == 'final':
+                # Final transcript from STT - also ensure is_speaking is reset
+                logging.info(f"📝 Final transcript: {text}")
+                conn['is_speaking'] = False  # Safety: reset speaking state on final transcript
+                logging.debug(f"🔧 is_speaking reset to: {conn['is_speaking']} (final transcript)")
+                try:
+                    await ws.send(json.dumps({'type': 'final_transcript', 'text': text, 'language': event.get('language', 'en')}))
+                except ConnectionClosed:
+                    break
+                
+                # Run LLM → TTS → send as a cancellable turn so the pump
+                # keeps reading STT events (and can barge in) meanwhile
+                self.idle.note_activity(client_id)
+                await turns.start_turn(text)
     
     async def start(self):
         """Start the WebSocket server."""
         logging.info(f"🚀 Starting Simple Audio WebSocket Server on {self.host}:{self.port}")
+        self._stop_requested = asyncio.Event()
+        self._install_signal_handlers()
+        
+        # HTTP probes (/healthz, /readyz, /stats) are answered before the handshake
+        serve_options = dict(ping_interval=30, ping_timeout=10, max_size=16 * 1024 * 1024,
+                             process_request=self.health.process_request)
+        inherited = self._inherited_socket()
+        if inherited is not None:
+            logging.info(f"🔁 Serving on inherited listening socket (fd {inherited.fileno()})")
+            server_context = websockets.serve(self.handle_client, sock=inherited, **serve_options)
+        else:
+            server_context = websockets.serve(self.handle_client, self.host, self.port, **serve_options)
         
-        async with websockets.serve(
-            self.handle_client,
-            self.host,
-            self.port,
-            ping_interval=30,
-            ping_timeout=10,
-            max_size=16 * 1024 * 1024
-        ):
+        async with server_context as ws_server:
+            self._ws_server = ws_server
+            metrics.set_gauge("drain_state", 0)
+            self.idle.start()
+            self.sessions.start()
+            if config.LOOP_WATCHDOG_ENABLED:
+                self.watchdog.start()
+            # Pre-render fallback/greeting phrases in the background, only with real
+            # ElevenLabs audio: an injected fake (session replayer) would fill the
+            # shared cache with its placeholder bytes
+            if self.service_factory is ElevenLabsDirectService:
+                self._warm_task = asyncio.create_task(self._warm_canned_audio())
+            else:
+                # Nothing to warm; readiness must not wait for it
+                self.canned_audio_warm = True
+                logging.info("🔇 Canned audio warm-up skipped (TTS service factory is not ElevenLabs)")
             logging.info(f"✅ Server running on ws://{self.host}:{self.port}")
             logging.info(f"📝 Mode: Text input → Audio output")
             logging.info(f"🤖 Custom LLM: ft:gpt-4.1-mini-2025-04-14:professor-ai:aum:COPCJu5T")
+            self._notify_ready()
             
-            # Run forever
-            await asyncio.Future()
+            # Serve until SIGTERM/SIGINT (or a completed handoff), then drain
+            await self._stop_requested.wait()
+            await self.shutdown()
+        self._release_pid_file()
+        logging.info("👋 Server stopped")
 
 async def main():
     """Main entry point."""
@@ -528,9 +993,10 @@ if __name__ == "__main__":
 ║                                                              ║
 ║  Note: Telephonic-quality real-time conversation!           ║
 ║                                                              ║
-║  Press Ctrl+C to stop                                       ║
+║  Ctrl+C / SIGTERM: graceful drain  SIGUSR2: hot restart     ║
 ║                                                              ║
 ╚══════════════════════════════════════════════════════════════╝
     """)
     
+    install_event_loop()
     asyncio.run(main())
@@ -0,0 +1,124 @@
+"""
+Canned Audio Cache - pre-rendered phrases served without calling TTS
+
+Phrases are rendered once through ElevenLabs (while it is healthy) and kept
+on disk under config.AUDIO_CACHE_DIR, keyed by voice, model and text so a
+voice change never serves stale audio. They back the fast-fail paths used
+when a provider's circuit breaker is open, the filler phrases that mask
+slow LLM/TTS responses, and the intent router's fixed answers.
+"""
+
+import asyncio
+import hashlib
+import logging
+import os
+import random
+from typing import Awaitable, Callable, Dict, Optional
+
+import config
+from services.intent_router import INTENTS
+
+logger = logging.getLogger(__name__)
+
+LLM_FALLBACK_TEXT = "I apologize, but I'm having trouble processing your request. Could you please try again?"
+
+CANNED_PHRASES = {
+    "greeting": config.AGENT_GREETING,
+    "provider_unavailable": "I'm sorry, I'm having a little trouble right now. Please give me a moment and try again.",
+    "llm_unavailable": LLM_FALLBACK_TEXT,
+}
+CANNED_PHRASES.update({f"filler_{i}": text for i, text in enumerate(config.FILLER_PHRASES)})
+CANNED_PHRASES.update({f"intent_{intent.name}": intent.response for intent in INTENTS})
+
+
+class CannedAudioCache:
+    """Disk-backed cache of pre-rendered phrase audio."""
+
+    def __init__(self, cache_dir: str = config.AUDIO_CACHE_DIR, phrases: Optional[Dict[str, str]] = None):
+        self.cache_dir = cache_dir
+        self.phrases = dict(CANNED_PHRASES if phrases is None else phrases)
+        self._audio: Dict[str, bytes] = {}
+        self._keys_by_text = {text: key for key, text in self.phrases.items()}
+
+    def _path(self, key: str) -> str:
+        text = self.phrases[key]
+        digest = hashlib.sha1(
+            f"{config.ELEVENLABS_VOICE_ID}|{config.ELEVENLABS_MODEL}|{text}".encode("utf-8")
+        ).hexdigest()[:12]
+        return os.path.join(self.cache_dir, f"{key}-{digest}.mp3")
+
+    @property
+    def loaded_count(self) -> int:
+        """Phrases whose audio is loaded in memory."""
+        return len(self._audio)
+
+    def add_phrase(self, key: str, text: str):
+        self.phrases[key] = text
+        self._keys_by_text[text] = key
+        self._audio.pop(key, None)
+
+    def get(self, key: str) -> Optional[bytes]:
+        """Return the rendered audio for ``key`` or None if it is not cached."""
+        if key in self._audio:
+            return self._audio[key]
+        if key not in self.phrases:
+            return None
+        path = self._path(key)
+        if not os.path.exists(path):
+            return None
+        try:
+            with open(path, "rb") as f:
+                audio = f.read()
+        except OSError as e:
+            logger.warning(f"⚠️ Could not read canned audio {path}: {e}")
+            return None
+        if audio:
+            self._audio[key] = audio
+        return audio or None
+
+    def get_for_text(self, text: str) -> Optional[bytes]:
+        """Return cached audio if ``text`` is exactly one of the canned phrases."""
+        key = self._keys_by_text.get(text.strip())
+        return self.get(key) if key else None
+
+    def fallback(self, text: str = "") -> bytes:
+        """Audio to play when TTS is unavailable: the phrase itself if cached, else an apology."""
+        return (text and self.get_for_text(text)) or self.get("provider_unavailable") or b""
+
+    def filler(self) -> Optional[bytes]:
+        """A random cached filler phrase, or None if none has been rendered yet."""
+        rendered = [audio for audio in (self.get(key) for key in self.phrases if key.startswith("filler_")) if audio]
+        return random.choice(rendered) if rendered else None
+
+    async def warm(self, render: Callable[[str], Awaitable[bytes]]) -> int:
+        """Render and store every phrase missing from disk. Returns how many were rendered."""
+        rendered = 0
+        for key, text in self.phrases.items():
+            if self.get(key) is not None:
+                continue
+            try:
+                audio = await render(text)
+            except Exception as e:
+                logger.warning(f"⚠️ Could not render canned phrase '{key}': {e}")
+                continue
+            if not audio:
+                logger.warning(f"⚠️ No audio rendered for canned phrase '{key}'")
+                continue
+            await asyncio.to_thread(self._write, self._path(key), audio)
+            self._audio[key] = audio
+            rendered += 1
+        if rendered:
+            logger.info(f"✅ Rendered {rendered} canned audio phrases")
+        return rendered
+
+    @staticmethod
+    def _write(path: str, audio: bytes):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(audio)
+        os.replace(tmp_path, path)
+
+
+# Shared across sessions
+canned_audio = CannedAudioCache()
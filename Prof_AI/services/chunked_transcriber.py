@@ -0,0 +1,126 @@
+"""
+Chunked Transcriber - long voice notes transcribed as parallel Whisper segments
+
+Audio (PCM16 mono) is fed in as it arrives. Once enough is buffered, it is
+cut at the quietest 20ms frame between TRANSCRIBE_SEGMENT_S and
+TRANSCRIBE_MAX_SEGMENT_S, and that segment (plus TRANSCRIBE_OVERLAP_S of
+overlap, so a word clipped at the cut is heard whole by one side) is sent
+for transcription right away, while the rest is still uploading.
+
+At most TRANSCRIBE_MAX_PARALLEL segments are in flight; feeding more audio
+waits for a free slot, so memory per request stays bounded by the pool and
+one segment of buffered audio. Segment texts are stitched in order, with
+words repeated across the overlap removed.
+"""
+
+import asyncio
+import logging
+import re
+import time
+from typing import Awaitable, Callable, List
+
+import config
+from services.idle_session_manager import IdleSessionManager
+from utils.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+_FRAME_S = 0.02
+_MAX_STITCH_WORDS = 8
+
+
+def find_cut(pcm: bytes, sample_rate: int, start_s: float, end_s: float) -> int:
+    """Byte offset of the middle of the quietest 20ms frame in [start_s, end_s)."""
+    frame_bytes = max(1, int(sample_rate * _FRAME_S)) * 2
+    first = int(start_s * sample_rate) * 2 // frame_bytes * frame_bytes
+    last = min(int(end_s * sample_rate) * 2, len(pcm)) // frame_bytes * frame_bytes
+    if last <= first:
+        return min(len(pcm), int(end_s * sample_rate) * 2) & ~1
+    # Released before returning: a live view would stop the caller's bytearray resizing
+    with memoryview(pcm) as view:
+        quietest = min(
+            range(first, last, frame_bytes),
+            key=lambda offset: IdleSessionManager.frame_rms(view[offset:offset + frame_bytes]),
+        )
+    return (quietest + frame_bytes // 2) & ~1
+
+
+def _normalize(word: str) -> str:
+    return re.sub(r"[^\w']", "", word.lower())
+
+
+def stitch(parts: List[str]) -> str:
+    """Join segment transcripts, dropping words repeated across an overlap."""
+    words: List[str] = []
+    for text in parts:
+        new = text.split()
+        limit = min(_MAX_STITCH_WORDS, len(words), len(new))
+        for k in range(limit, 0, -1):
+            if [_normalize(w) for w in words[-k:]] == [_normalize(w) for w in new[:k]]:
+                new = new[k:]
+                break
+        words.extend(new)
+    return " ".join(words)
+
+
+class ChunkedTranscription:
+    """One voice note: fed incrementally, transcribed in parallel segments."""
+
+    def __init__(self, transcribe: Callable[[bytes], Awaitable[str]], sample_rate: int = 16000,
+                 segment_s: float = config.TRANSCRIBE_SEGMENT_S,
+                 max_segment_s: float = config.TRANSCRIBE_MAX_SEGMENT_S,
+                 overlap_s: float = config.TRANSCRIBE_OVERLAP_S,
+                 max_parallel: int = config.TRANSCRIBE_MAX_PARALLEL):
+        self._transcribe = transcribe
+        self.sample_rate = sample_rate
+        self.segment_s = segment_s
+        self.max_segment_s = max_segment_s
+        self._max_segment_bytes = int(max_segment_s * sample_rate) * 2
+        self._overlap_bytes = int(overlap_s * sample_rate) * 2
+        self._buffer = bytearray()
+        self._slots = asyncio.Semaphore(max_parallel)
+        self._tasks: List[asyncio.Task] = []
+        self.bytes_received = 0
+        self._ended_at = None
+
+    async def feed(self, pcm: bytes):
+        """Add audio; full segments are submitted (waiting for a free slot)."""
+        self._buffer += pcm
+        self.bytes_received += len(pcm)
+        while len(self._buffer) >= self._max_segment_bytes:
+            cut = find_cut(self._buffer, self.sample_rate, self.segment_s, self.max_segment_s)
+            await self._submit(bytes(self._buffer[:cut + self._overlap_bytes]))
+            del self._buffer[:cut]
+
+    async def finish(self) -> str:
+        """Transcribe what is left and return the stitched transcript."""
+        self._ended_at = time.monotonic()
+        # After a cut the buffer starts with overlap that was already sent
+        if len(self._buffer) > (self._overlap_bytes if self._tasks else 0):
+            await self._submit(bytes(self._buffer))
+        self._buffer = bytearray()
+        parts = await asyncio.gather(*self._tasks)
+        metrics.observe("transcribe_tail_ms", (time.monotonic() - self._ended_at) * 1000)
+        if len(self._tasks) > 1:
+            logger.info(f"🧩 Transcribed {self.bytes_received / (2 * self.sample_rate):.1f}s of audio "
+                        f"in {len(self._tasks)} segments")
+        return stitch([part or "" for part in parts])
+
+    async def cancel(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._buffer = bytearray()
+
+    async def _submit(self, segment: bytes):
+        await self._slots.acquire()
+        self._tasks.append(asyncio.create_task(self._run(segment)))
+
+    async def _run(self, segment: bytes) -> str:
+        started = time.monotonic()
+        try:
+            return await self._transcribe(segment)
+        finally:
+            self._slots.release()
+            metrics.inc("transcribe_segments")
+            metrics.observe("transcribe_segment_ms", (time.monotonic() - started) * 1000)
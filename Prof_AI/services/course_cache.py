@@ -0,0 +1,238 @@
+"""
+Course Cache - parsed courses shared by every class session in the process
+
+start_class used to parse course data for each request. The cache keeps each
+course outline parsed once, frozen into read-only views (mappings and tuples)
+so module and sub-topic accessors hand out the shared objects instead of
+copies, plus a byte-bounded LRU of sub-topic content keyed by the store's
+content blob, so identical content in several courses is held once.
+
+Freshness is checked against the course store on every lookup: the segment
+file's inode and size (a stat) reveal writes from manage_courses or the
+document service in another process, and only courses whose outline record
+changed are dropped. Concurrent misses for the same course share one load,
+so a burst of start_class calls costs a single parse.
+"""
+
+import asyncio
+import logging
+import sys
+import threading
+import time
+from collections import OrderedDict
+from types import MappingProxyType
+from typing import Any, Dict, Mapping, Optional, Tuple
+
+import config
+from services.course_store import CourseStore, course_store
+from utils.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+
+def _freeze(value: Any) -> Any:
+    """Read-only view of parsed JSON: dicts become mappings, lists tuples."""
+    if isinstance(value, dict):
+        return MappingProxyType({key: _freeze(item) for key, item in value.items()})
+    if isinstance(value, list):
+        return tuple(_freeze(item) for item in value)
+    return value
+
+
+def _tag_generation(outline: dict, generation: str, key: str):
+    """
+    Record on each sub-topic the segment generation its ``content_ref``
+    points into, and where it sits in the course, so a ref left behind by a
+    compaction can be looked up again in the current outline.
+    """
+    for module_index, module in enumerate(outline.get("modules", [])):
+        if not isinstance(module, dict):
+            continue
+        for sub_topic_index, sub_topic in enumerate(module.get("sub_topics", [])):
+            if isinstance(sub_topic, dict) and "content_ref" in sub_topic:
+                sub_topic["content_generation"] = generation
+                sub_topic["content_path"] = [key, module_index, sub_topic_index]
+
+
+class _Cached:
+    __slots__ = ("course", "version", "size")
+
+    def __init__(self, course: Mapping, version: Tuple[bytes, int, int], size: int):
+        self.course = course
+        self.version = version
+        self.size = size
+
+
+class CourseCache:
+    """Read-through cache of course outlines and sub-topic content."""
+
+    def __init__(self, store: CourseStore = course_store,
+                 content_budget_bytes: int = int(config.COURSE_CACHE_CONTENT_MB * 1024 * 1024)):
+        self.store = store
+        self.content_budget_bytes = content_budget_bytes
+        self._lock = threading.Lock()
+        self._courses: Dict[str, _Cached] = {}
+        self._content: "OrderedDict[Tuple[str, int], Tuple[str, int]]" = OrderedDict()
+        self._content_bytes = 0
+        self._signature = None
+        self._loading: Dict[str, asyncio.Future] = {}
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.invalidations = 0
+        self.last_load_ms = 0.0
+
+    # --- Freshness ---
+
+    def _check_fresh(self):
+        """Drop courses whose outline changed on disk since they were cached."""
+        self.store.refresh()
+        signature = self.store.signature
+        if signature == self._signature:
+            return
+        with self._lock:
+            stale = [key for key, cached in self._courses.items() if self.store.version(key) != cached.version]
+            for key in stale:
+                del self._courses[key]
+            if self._signature is not None and signature[0] != self._signature[0]:
+                # New generation: every content offset moved
+                self._content.clear()
+                self._content_bytes = 0
+            self._signature = signature
+        if stale:
+            self.invalidations += len(stale)
+            logger.info(f"♻️ Course cache dropped {len(stale)} changed course(s)")
+
+    # --- Courses ---
+
+    def _load(self, key: str) -> Optional[Mapping]:
+        started = time.perf_counter()
+        for _ in range(3):
+            version = self.store.version(key)
+            outline = self.store.get_outline(key)
+            # Re-read if a refresh on another thread moved the course between the two lookups
+            if outline is None or self.store.version(key) == version:
+                break
+        if outline is None or version is None:
+            return None
+        _tag_generation(outline, version[0].hex(), key)
+        course = _freeze(outline)
+        self.last_load_ms = (time.perf_counter() - started) * 1000
+        metrics.observe("course_cache_load_ms", self.last_load_ms)
+        with self._lock:
+            self._courses[key] = _Cached(course, version, version[2])
+        return course
+
+    def get(self, course_id) -> Optional[Mapping]:
+        """Course outline (read-only view), loading it on a miss."""
+        self._check_fresh()
+        key = str(course_id)
+        cached = self._courses.get(key)
+        if cached is not None:
+            self.hits += 1
+            return cached.course
+        self.misses += 1
+        return self._load(key)
+
+    async def get_async(self, course_id) -> Optional[Mapping]:
+        """As get(), with the freshness check and load off the event loop and shared by concurrent callers."""
+        await asyncio.to_thread(self._check_fresh)
+        key = str(course_id)
+        cached = self._courses.get(key)
+        if cached is not None:
+            self.hits += 1
+            return cached.course
+        loading = self._loading.get(key)
+        if loading is not None:
+            self.coalesced += 1
+        else:
+            self.misses += 1
+            loading = asyncio.ensure_future(asyncio.to_thread(self._load, key))
+            self._loading[key] = loading
+            loading.add_done_callback(lambda _: self._loading.pop(key, None))
+        # Shielded: one caller giving up must not cancel the load for the others
+        return await asyncio.shield(loading)
+
+    def first_course_id(self):
+        courses = self.store.list_courses()
+        return courses[0]["course_id"] if courses else None
+
+    def module(self, course_id, module_index: int) -> Optional[Mapping]:
+        course = self.get(course_id)
+        modules = course.get("modules", ()) if course is not None else ()
+        return modules[module_index] if 0 <= module_index < len(modules) else None
+
+    def sub_topic(self, course_id, module_index: int, sub_topic_index: int) -> Optional[Mapping]:
+        module = self.module(course_id, module_index)
+        sub_topics = module.get("sub_topics", ()) if module is not None else ()
+        return sub_topics[sub_topic_index] if 0 <= sub_topic_index < len(sub_topics) else None
+
+    # --- Content ---
+
+    def _current_sub_topic(self, sub_topic: Mapping) -> Mapping:
+        """The same sub-topic in the current outline, for one read before a compaction."""
+        path = sub_topic.get("content_path")
+        current = self.sub_topic(*path) if path else None
+        if current is None or current.get("title") != sub_topic.get("title"):
+            raise LookupError(f"Sub-topic '{sub_topic.get('title')}' is no longer in the course store")
+        return current
+
+    def load_content(self, sub_topic: Mapping) -> str:
+        """Sub-topic content, from the LRU or the store."""
+        if not sub_topic.get("content_ref"):
+            return sub_topic.get("content", "")
+        while True:
+            generation = self.store.signature[0].hex()
+            if sub_topic.get("content_generation", generation) != generation:
+                # The segment was compacted or replaced since this outline was read, so its
+                # content_ref points into a file that no longer exists
+                sub_topic = self._current_sub_topic(sub_topic)
+                continue
+            content_ref = sub_topic["content_ref"]
+            # Offsets are only unique within one generation
+            key = (generation, content_ref[0])
+            with self._lock:
+                cached = self._content.get(key)
+                if cached is not None:
+                    self._content.move_to_end(key)
+                    metrics.inc("course_cache_content_hits")
+                    return cached[0]
+            try:
+                content = self.store.get_content(content_ref)
+            except ValueError:
+                if self.store.signature[0].hex() == generation:
+                    raise
+                continue  # Reattached to a new segment mid-read
+            break
+        metrics.inc("course_cache_content_misses")
+        # Sub-topics with identical text share one blob, so they share this entry too
+        size = sys.getsizeof(content)
+        with self._lock:
+            if key not in self._content and size <= self.content_budget_bytes:
+                self._content[key] = (content, size)
+                self._content_bytes += size
+                while self._content_bytes > self.content_budget_bytes:
+                    _, (_, evicted) = self._content.popitem(last=False)
+                    self._content_bytes -= evicted
+        return content
+
+    # --- Reporting ---
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses + self.coalesced
+        return {
+            "courses_cached": len(self._courses),
+            "hits": self.hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "hit_rate": round((self.hits + self.coalesced) / lookups, 4) if lookups else None,
+            "invalidations": self.invalidations,
+            "last_load_ms": round(self.last_load_ms, 2),
+            "outline_bytes": sum(cached.size for cached in self._courses.values()),
+            "content_entries": len(self._content),
+            "content_bytes": self._content_bytes,
+        }
+
+
+# Shared by every class session in the process
+course_cache = CourseCache()
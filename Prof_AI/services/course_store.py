@@ -0,0 +1,784 @@
+"""
+Course Store - indexed course database with lazily loaded sub-topic content
+
+Replaces parsing (and rewriting) the whole course_output.json to use one
+course. Courses live in an append-only segment file that doubles as the
+journal of course-level mutations:
+
+    <8s magic> <8s generation>                  file header
+    <B kind> <I length> <I crc32> <payload>     records
+
+The COURSE record is the outline (titles, weeks, ...) with a
+``content_ref`` in place of each sub-topic's content, and a DELETE record is
+a tombstone. An in-memory index maps course_id to the latest COURSE record,
+so fetching a course is one read of its outline regardless of how many
+courses exist, and content is only read for the sub-topic being taught.
+
+Sub-topic content is content-addressed: each distinct text is one
+zlib-compressed BLOB record, found by its hash, and every sub-topic with
+that text references the same blob. Text that is nearly identical to a
+stored blob (MinHash, see near_duplicates) is stored as a DELTA: compressed
+with that blob as the zlib dictionary, so only the differences cost space.
+
+Adding, updating or deleting a course appends only that course's records,
+so write cost follows the change, not the database size. Writes are
+serialized across processes by a lock file and fsynced once per batch().
+A record torn by a crash fails its crc; it and anything after it are
+ignored and overwritten by the next write.
+
+The index (blob sketches included) is persisted to courses.idx (the
+snapshot) together with the segment size it covers; opening the store loads
+it and scans only the journal tail after that. The snapshot is rewritten
+after compaction and once the tail passes COURSE_STORE_INDEX_INTERVAL_MB,
+not on every write. Superseded records are dropped by compact(), which
+writes a new segment and atomically renames it into place (automatically
+once dead bytes pass COURSE_STORE_COMPACT_RATIO of the file).
+
+course_output.json remains the interchange format: import_json/export_json
+convert between the two, and a new store imports config.OUTPUT_JSON_PATH.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import secrets
+import struct
+import threading
+import zlib
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+try:
+    import fcntl
+except ImportError:  # Windows: single-writer deployments only
+    fcntl = None
+
+import config
+from services.near_duplicates import NearDuplicateIndex, sketch
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b"AUMCRS01"
+_FILE_HEADER = struct.Struct("<8s8s")
+_RECORD = struct.Struct("<BII")
+# Blob payload header: digest, text length, sketch size (then the sketch, a DELTA's base, the data)
+_BLOB = struct.Struct("<16sIB")
+_DELTA_BASE = struct.Struct("<QI")
+
+# Record kinds
+CONTENT = 1  # Uncompressed sub-topic text (stores written before blobs)
+COURSE = 2
+DELETE = 3
+BLOB = 4
+DELTA = 5
+
+Ref = Tuple[int, int]
+
+
+def _record(kind: int, payload: bytes) -> bytes:
+    return _RECORD.pack(kind, len(payload), zlib.crc32(payload)) + payload
+
+
+def _read_record(fd: int, offset: int, length: int) -> Tuple[int, bytes]:
+    raw = os.pread(fd, _RECORD.size + length, offset)
+    kind, stored_length, crc = _RECORD.unpack_from(raw)
+    payload = raw[_RECORD.size:]
+    if stored_length != length or len(payload) != length or zlib.crc32(payload) != crc:
+        raise ValueError(f"Corrupt course store record at offset {offset}")
+    return kind, payload
+
+
+def _blob_sketch(payload: bytes) -> Tuple[int, ...]:
+    _, _, sketch_size = _BLOB.unpack_from(payload)
+    return struct.unpack_from(f"<{sketch_size}I", payload, _BLOB.size)
+
+
+def _content_refs(outline: dict) -> List[Ref]:
+    modules = outline.get("modules")
+    return [
+        tuple(sub_topic["content_ref"])
+        for module in (modules if isinstance(modules, list) else [])
+        if isinstance(module, dict) and isinstance(module.get("sub_topics"), list)
+        for sub_topic in module["sub_topics"]
+        if isinstance(sub_topic, dict) and "content_ref" in sub_topic
+    ]
+
+
+def _sort_key(course_id):
+    return (0, course_id, "") if isinstance(course_id, int) else (1, 0, str(course_id))
+
+
+class _Entry:
+    """Index entry: where a course's latest outline record lives, and the content it references."""
+
+    __slots__ = ("offset", "length", "course_id", "title", "modules", "refs")
+
+    def __init__(self, offset: int, length: int, course_id, title: str, modules: int, refs: List[Ref]):
+        self.offset = offset
+        self.length = length
+        self.course_id = course_id
+        self.title = title
+        self.modules = modules
+        self.refs = refs
+
+
+class _BlobTable:
+    """Content blobs of one segment, found by hash (exact) or MinHash sketch (near)."""
+
+    def __init__(self, read: Callable[[int, int], Tuple[int, bytes]]):
+        self.read = read
+        self.by_digest: Dict[bytes, Ref] = {}
+        # offset -> (text length, DELTA base or None)
+        self.info: Dict[int, Tuple[int, Optional[Ref]]] = {}
+        # offset -> MinHash sketch (empty for deltas and short texts; None if only the blob header has it)
+        self.sketches: Dict[int, Optional[Tuple[int, ...]]] = {}
+        self._near: Optional[NearDuplicateIndex] = None
+        # Encoded but not yet written; committed once the records are on disk
+        self._pending: Dict[bytes, Ref] = {}
+        self._pending_info: Dict[int, Tuple[int, Optional[Ref]]] = {}
+        self._pending_sketches: List[Tuple[Ref, Tuple[int, ...]]] = []
+
+    def add(self, digest: bytes, ref: Ref, text_length: int, base: Optional[Ref],
+            text_sketch: Optional[Tuple[int, ...]] = None):
+        self.by_digest[digest] = ref
+        self.info[ref[0]] = (text_length, base)
+        self.sketches[ref[0]] = text_sketch
+
+    def text(self, ref: Ref) -> str:
+        kind, payload = self.read(*ref)
+        if kind == CONTENT:
+            return payload.decode("utf-8")
+        _, _, sketch_size = _BLOB.unpack_from(payload)
+        body = _BLOB.size + 4 * sketch_size
+        if kind == BLOB:
+            return zlib.decompress(payload[body:]).decode("utf-8")
+        if kind == DELTA:
+            base = _DELTA_BASE.unpack_from(payload, body)
+            inflater = zlib.decompressobj(zdict=self.text(base).encode("utf-8"))
+            data = inflater.decompress(payload[body + _DELTA_BASE.size:]) + inflater.flush()
+            return data.decode("utf-8")
+        raise ValueError(f"Record at offset {ref[0]} is not sub-topic content")
+
+    def _near_index(self) -> NearDuplicateIndex:
+        # Built on the first save that needs it from the sketches kept in the index; blob
+        # headers are only read for blobs indexed before sketches were (old courses.idx)
+        if self._near is None:
+            self._near = NearDuplicateIndex(config.COURSE_DEDUP_NEAR_THRESHOLD)
+            for ref in self.by_digest.values():
+                text_sketch = self.sketches.get(ref[0])
+                if text_sketch is None:
+                    text_sketch = self.sketches[ref[0]] = self._read_sketch(ref)
+                if text_sketch:
+                    self._near.add(ref, text_sketch)
+        return self._near
+
+    def _read_sketch(self, ref: Ref) -> Tuple[int, ...]:
+        kind, payload = self.read(*ref)
+        return _blob_sketch(payload) if kind == BLOB else ()
+
+    def encode(self, text: str, offset: int) -> Tuple[bytes, Ref, str]:
+        """(record bytes, content_ref, "reused" | "near" | "new") for text written at ``offset``."""
+        data = text.encode("utf-8")
+        digest = hashlib.blake2b(data, digest_size=16).digest()
+        ref = self._pending.get(digest) or self.by_digest.get(digest)
+        if ref is not None:
+            return b"", ref, "reused"
+
+        compressed = zlib.compress(data, 6)
+        text_sketch = sketch(text) if len(data) >= config.COURSE_DEDUP_MIN_CHARS else ()
+        match = self._near_index().find(text_sketch) if text_sketch else None
+        if match is not None:
+            base = match[0]
+            deflater = zlib.compressobj(6, zdict=self.text(base).encode("utf-8"))
+            delta = deflater.compress(data) + deflater.flush()
+            if len(delta) < len(compressed):
+                payload = _BLOB.pack(digest, len(data), 0) + _DELTA_BASE.pack(*base) + delta
+                return self._stage(DELTA, payload, digest, offset, len(data), base), (offset, len(payload)), "near"
+
+        payload = (_BLOB.pack(digest, len(data), len(text_sketch))
+                   + struct.pack(f"<{len(text_sketch)}I", *text_sketch) + compressed)
+        self._pending_sketches.append(((offset, len(payload)), text_sketch))
+        return self._stage(BLOB, payload, digest, offset, len(data), None), (offset, len(payload)), "new"
+
+    def _stage(self, kind: int, payload: bytes, digest: bytes, offset: int,
+               text_length: int, base: Optional[Ref]) -> bytes:
+        self._pending[digest] = (offset, len(payload))
+        self._pending_info[offset] = (text_length, base)
+        return _record(kind, payload)
+
+    def commit(self):
+        self.by_digest.update(self._pending)
+        self.info.update(self._pending_info)
+        self.sketches.update((offset, ()) for offset in self._pending_info)
+        for ref, text_sketch in self._pending_sketches:
+            self.sketches[ref[0]] = text_sketch
+            if self._near is not None and text_sketch:
+                self._near.add(ref, text_sketch)
+        self.discard()
+
+    def discard(self):
+        self._pending, self._pending_info, self._pending_sketches = {}, {}, []
+
+    def footprint(self, refs: Iterable[Ref]) -> Dict[Ref, int]:
+        """Record size of every blob needed to read ``refs`` (DELTA bases included)."""
+        needed: Dict[Ref, int] = {}
+        for ref in refs:
+            while ref is not None and ref not in needed:
+                needed[ref] = _RECORD.size + ref[1]
+                ref = self.info.get(ref[0], (0, None))[1]
+        return needed
+
+
+class CourseStore:
+    """Append-only course segment plus an in-memory course_id index."""
+
+    def __init__(self, directory: str = config.COURSE_STORE_DIR,
+                 seed_json: Optional[str] = config.OUTPUT_JSON_PATH):
+        self.directory = directory
+        self.seed_json = seed_json
+        self.segment_path = os.path.join(directory, "courses.seg")
+        self.index_path = os.path.join(directory, "courses.idx")
+        self.lock_path = os.path.join(directory, "courses.lock")
+        self._lock = threading.RLock()
+        self._write_depth = 0
+        self._lock_fd: Optional[int] = None
+        self._fd: Optional[int] = None
+        self._generation = b""
+        self._size = 0
+        self._index: Dict[str, _Entry] = {}
+        self._titles: Dict[str, str] = {}
+        self._blobs = _BlobTable(self._read)
+        # Live references per blob (DELTA bases count their deltas) and live record bytes
+        self._blob_refs: Dict[Ref, int] = {}
+        self._live = 0
+        # Segment size covered by courses.idx
+        self._indexed_size = 0
+
+    # --- Opening and recovery ---
+
+    def open(self):
+        """Open the store, creating it (and importing the seed JSON) if needed."""
+        with self._lock:
+            if self._fd is not None:
+                return
+            if not self._segment_exists():
+                self._create()
+            self._attach()
+
+    def _segment_exists(self) -> bool:
+        return os.path.exists(self.segment_path) and os.path.getsize(self.segment_path) > 0
+
+    def _create(self):
+        """Write the first segment from the seed JSON (once, even with several processes starting)."""
+        with self._file_lock():
+            if self._segment_exists():
+                return
+            seeded = self.seed_json and os.path.exists(self.seed_json)
+            courses, duplicates = self._assign_ids(self._load_json(self.seed_json) if seeded else [])
+            if duplicates:
+                logger.warning(f"⚠️ {self.seed_json} repeats course ids {', '.join(duplicates)}; "
+                               f"keeping the last course with each id")
+            self._write_segment(self.segment_path, courses)
+            if seeded:
+                logger.info(f"📚 Imported {len(courses)} courses from {self.seed_json} into the course store")
+
+    def close(self):
+        with self._lock:
+            if self._fd is not None:
+                os.close(self._fd)
+                self._fd = None
+
+    def _attach(self):
+        self._fd = os.open(self.segment_path, os.O_RDWR)
+        self._size = os.fstat(self._fd).st_size
+        magic, self._generation = _FILE_HEADER.unpack(os.pread(self._fd, _FILE_HEADER.size, 0))
+        if magic != MAGIC:
+            raise ValueError(f"{self.segment_path} is not a course store segment")
+        self._reset_index()
+        scan_from = self._indexed_size = self._load_index()
+        valid_end = self._scan(scan_from)
+        if valid_end < self._size:
+            # Only a writer (holding the lock) may truncate; until then the tail is ignored
+            logger.warning(f"⚠️ Ignoring {self._size - valid_end} bytes of torn records in {self.segment_path}")
+            self._size = valid_end
+
+    def refresh(self) -> bool:
+        """Pick up writes made by another process (manage_courses, document service)."""
+        with self._lock:
+            if self._fd is None:
+                self.open()
+                return True
+            try:
+                on_disk = os.stat(self.segment_path)
+            except FileNotFoundError:
+                return False
+            if on_disk.st_ino != os.fstat(self._fd).st_ino or on_disk.st_size < self._size:
+                # Replaced by an import or repair
+                self.close()
+                self._attach()
+                return True
+            if on_disk.st_size == self._size:
+                return False
+            # Records appended elsewhere; a record still being written is picked up next time
+            covered = self._size
+            self._size = on_disk.st_size
+            self._size = self._scan(covered)
+            return self._size != covered
+
+    @property
+    def signature(self) -> Tuple[bytes, int]:
+        """Changes whenever the store's contents do: (generation, segment size)."""
+        return self._generation, self._size
+
+    def version(self, course_id) -> Optional[Tuple[bytes, int, int]]:
+        """Identifies the current outline record of a course: (generation, offset, length)."""
+        entry = self._index.get(str(course_id))
+        return None if entry is None else (self._generation, entry.offset, entry.length)
+
+    def _reset_index(self):
+        self._index, self._titles = {}, {}
+        self._blobs = _BlobTable(self._read)
+        self._blob_refs, self._live = {}, 0
+
+    def _load_index(self) -> int:
+        """Load the persisted index; returns the segment offset it covers."""
+        try:
+            with open(self.index_path, "r", encoding="utf-8") as f:
+                saved = json.load(f)
+            if bytes.fromhex(saved["generation"]) != self._generation or saved["segment_size"] > self._size:
+                return _FILE_HEADER.size
+            # Blobs first: indexing a course counts the blobs (and DELTA bases) it references
+            for digest, offset, length, text_length, base, *text_sketch in saved["blobs"]:
+                self._blobs.add(bytes.fromhex(digest), (offset, length), text_length, tuple(base) if base else None,
+                                tuple(text_sketch[0]) if text_sketch else None)
+            for key, (offset, length, course_id, title, modules, refs) in saved["courses"].items():
+                self._add_entry(key, _Entry(offset, length, course_id, title, modules, [tuple(r) for r in refs]))
+            return saved["segment_size"]
+        except (OSError, ValueError, KeyError, TypeError):
+            self._reset_index()
+            return _FILE_HEADER.size
+
+    def _scan(self, offset: int) -> int:
+        """Replay journal records from ``offset``; returns the end of the last intact record."""
+        while offset + _RECORD.size <= self._size:
+            kind, length, crc = _RECORD.unpack(os.pread(self._fd, _RECORD.size, offset))
+            end = offset + _RECORD.size + length
+            if end > self._size:
+                break
+            payload = os.pread(self._fd, length, offset + _RECORD.size)
+            if zlib.crc32(payload) != crc:
+                break
+            if kind == COURSE:
+                self._index_course(json.loads(payload), offset, length)
+            elif kind == DELETE:
+                self._unindex(str(json.loads(payload)["course_id"]))
+            elif kind in (BLOB, DELTA):
+                digest, text_length, sketch_size = _BLOB.unpack_from(payload)
+                base = _DELTA_BASE.unpack_from(payload, _BLOB.size + 4 * sketch_size) if kind == DELTA else None
+                self._blobs.add(digest, (offset, length), text_length, base, _blob_sketch(payload))
+            offset = end
+        return offset
+
+    def _save_index(self):
+        saved = {
+            "generation": self._generation.hex(),
+            "segment_size": self._size,
+            "courses": {
+                key: [e.offset, e.length, e.course_id, e.title, e.modules, e.refs]
+                for key, e in self._index.items()
+            },
+            "blobs": [
+                [digest.hex(), ref[0], ref[1], *self._blobs.info[ref[0]]]
+                + ([self._blobs.sketches[ref[0]]] if self._blobs.sketches.get(ref[0]) is not None else [])
+                for digest, ref in self._blobs.by_digest.items()
+            ],
+        }
+        tmp_path = f"{self.index_path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(saved, f, separators=(",", ":"))
+        os.replace(tmp_path, self.index_path)
+        self._indexed_size = self._size
+
+    # --- Writing ---
+
+    def _reference(self, entry: _Entry, step: int):
+        """Count (step 1) or release (step -1) an entry's records as live."""
+        self._live += step * (_RECORD.size + entry.length)
+        for ref in entry.refs:
+            # A blob's bytes (and its DELTA base's reference) change only on its first and last use
+            while ref is not None:
+                count = self._blob_refs.get(ref, 0) + step
+                if count:
+                    self._blob_refs[ref] = count
+                else:
+                    del self._blob_refs[ref]
+                if count != (1 if step > 0 else 0):
+                    break
+                self._live += step * (_RECORD.size + ref[1])
+                ref = self._blobs.info.get(ref[0], (0, None))[1]
+
+    def _unindex(self, key: str):
+        previous = self._index.pop(key, None)
+        if previous is None:
+            return
+        self._reference(previous, -1)
+        if self._titles.get(previous.title) == key:
+            del self._titles[previous.title]
+
+    def _add_entry(self, key: str, entry: _Entry):
+        self._unindex(key)
+        self._index[key] = entry
+        self._titles[entry.title] = key
+        self._reference(entry, 1)
+
+    def _index_course(self, outline: dict, offset: int, length: int):
+        modules = outline.get("modules")
+        self._add_entry(str(outline.get("course_id")),
+                        _Entry(offset, length, outline.get("course_id"), outline.get("course_title", ""),
+                               len(modules) if isinstance(modules, list) else 0, _content_refs(outline)))
+
+    @contextmanager
+    def _file_lock(self):
+        """Exclusive across processes (a no-op where fcntl is unavailable); reentrant."""
+        with self._lock:
+            if self._lock_fd is not None:
+                yield
+                return
+            os.makedirs(self.directory, exist_ok=True)
+            self._lock_fd = os.open(self.lock_path, os.O_RDWR | os.O_CREAT, 0o644)
+            try:
+                if fcntl is not None:
+                    fcntl.flock(self._lock_fd, fcntl.LOCK_EX)
+                yield
+            finally:
+                os.close(self._lock_fd)  # Releases the flock
+                self._lock_fd = None
+
+    @contextmanager
+    def _writing(self):
+        """
+        Exclusive write section. Nested sections join the outermost one,
+        which fsyncs (and, when due, saves the index) once on exit.
+        """
+        with self._lock:
+            if self._write_depth > 0:
+                self._write_depth += 1
+                try:
+                    yield self
+                finally:
+                    self._write_depth -= 1
+                return
+            with self._file_lock():
+                self._write_depth = 1
+                try:
+                    self._prepare_write()
+                    yield self
+                finally:
+                    self._write_depth = 0
+                    self._commit()
+
+    def batch(self):
+        """Group writes into one fsync: ``with store.batch(): store.put_course(...)``."""
+        return self._writing()
+
+    def _prepare_write(self):
+        self.refresh()
+        on_disk = os.fstat(self._fd).st_size
+        if on_disk > self._size:
+            logger.warning(f"⚠️ Truncating {on_disk - self._size} bytes of torn records from {self.segment_path}")
+            os.ftruncate(self._fd, self._size)
+
+    def _commit(self):
+        if self._fd is None:
+            return
+        os.fsync(self._fd)
+        dead = self.dead_bytes
+        if (dead >= config.COURSE_STORE_COMPACT_MIN_MB * 1024 * 1024
+                and dead >= self._size * config.COURSE_STORE_COMPACT_RATIO):
+            logger.info(f"🗜️ Compacting course store: {dead / (1024 * 1024):.1f} MB superseded")
+            self._compact()
+        # Records past the snapshot are replayed by _scan on open, so it is only rewritten
+        # once that tail is long enough to slow opening down
+        if self._size - self._indexed_size >= config.COURSE_STORE_INDEX_INTERVAL_MB * 1024 * 1024:
+            self._save_index()
+
+    @staticmethod
+    def _encode_course(course: dict, base: int, blobs: _BlobTable) -> Tuple[bytes, dict, int, int, Dict[str, int]]:
+        """
+        Records for one course written at ``base``: (bytes, outline, outline
+        offset, outline length, dedup counts). New blobs are staged in
+        ``blobs`` until the caller commits them.
+        """
+        records = bytearray()
+        dedup = {"reused": 0, "near": 0, "new": 0}
+        outline = dict(course)
+        modules = course.get("modules")
+        if isinstance(modules, list):
+            outline["modules"] = []
+        for module in modules if isinstance(modules, list) else []:
+            if not isinstance(module, dict) or not isinstance(module.get("sub_topics"), list):
+                outline["modules"].append(module)
+                continue
+            module_outline = {key: value for key, value in module.items() if key != "sub_topics"}
+            module_outline["sub_topics"] = []
+            for sub_topic in module["sub_topics"]:
+                if not isinstance(sub_topic, dict) or not isinstance(sub_topic.get("content"), str):
+                    module_outline["sub_topics"].append(sub_topic)
+                    continue
+                data, ref, outcome = blobs.encode(sub_topic["content"], base + len(records))
+                records += data
+                dedup[outcome] += 1
+                sub_outline = {key: value for key, value in sub_topic.items() if key != "content"}
+                sub_outline["content_ref"] = list(ref)
+                module_outline["sub_topics"].append(sub_outline)
+            outline["modules"].append(module_outline)
+        payload = json.dumps(outline, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+        outline_offset = base + len(records)
+        records += _record(COURSE, payload)
+        return bytes(records), outline, outline_offset, len(payload), dedup
+
+    def _append(self, data: bytes):
+        os.pwrite(self._fd, data, self._size)
+        self._size += len(data)
+
+    def put_course(self, course: dict):
+        """Add or replace a course (by course_id). Returns its course_id."""
+        with self._writing():
+            course = dict(course)
+            if course.get("course_id") in (None, ""):
+                course["course_id"] = self.next_course_id()
+            try:
+                data, outline, offset, length, dedup = self._encode_course(course, self._size, self._blobs)
+                self._append(data)
+            except BaseException:
+                self._blobs.discard()
+                raise
+            self._blobs.commit()
+            self._index_course(outline, offset, length)
+            if dedup["reused"] or dedup["near"]:
+                logger.info(f"♻️ Course {course['course_id']}: {dedup['reused']} sub-topics share stored content, "
+                            f"{dedup['near']} stored as near-duplicate deltas, {dedup['new']} new")
+            return course["course_id"]
+
+    def put_courses(self, courses: Iterable[dict]) -> List:
+        """put_course for each course, with a single fsync."""
+        with self._writing():
+            return [self.put_course(course) for course in courses]
+
+    def delete_course(self, course_id) -> bool:
+        """Remove a course; False if it does not exist."""
+        with self._writing():
+            entry = self._index.get(str(course_id))
+            if entry is None:
+                return False
+            payload = json.dumps({"course_id": entry.course_id}, ensure_ascii=False).encode("utf-8")
+            self._append(_record(DELETE, payload))
+            self._unindex(str(course_id))
+            return True
+
+    def _write_segment(self, path: str, courses: Iterable[dict]) -> bytes:
+        """Write a complete segment for ``courses`` to ``path``; returns its generation."""
+        generation = secrets.token_bytes(8)
+        tmp_path = f"{path}.tmp"
+        fd = os.open(tmp_path, os.O_RDWR | os.O_CREAT | os.O_TRUNC, 0o644)
+        try:
+            # Near-duplicate deltas are found among blobs already written to the new file
+            blobs = _BlobTable(lambda offset, length: _read_record(fd, offset, length))
+            size = os.write(fd, _FILE_HEADER.pack(MAGIC, generation))
+            for course in courses:
+                data = self._encode_course(course, size, blobs)[0]
+                os.pwrite(fd, data, size)
+                size += len(data)
+                blobs.commit()
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+        os.replace(tmp_path, path)
+        if hasattr(os, "O_DIRECTORY"):
+            # Make the rename itself durable
+            dir_fd = os.open(self.directory, os.O_RDONLY | os.O_DIRECTORY)
+            try:
+                os.fsync(dir_fd)
+            finally:
+                os.close(dir_fd)
+        return generation
+
+    @staticmethod
+    def _assign_ids(courses: Iterable[dict]) -> Tuple[List[dict], List[str]]:
+        """
+        Courses ready for a new segment: ids assigned where missing (as
+        put_course does) and, where an id repeats (1 and "1" are the same
+        id), only the last course with it. Also returns the repeated ids.
+        """
+        courses = [course for course in courses if isinstance(course, dict)]
+        next_id = max((c.get("course_id") for c in courses if isinstance(c.get("course_id"), int)), default=0) + 1
+        by_key: Dict[str, dict] = {}
+        duplicates: List[str] = []
+        for course in courses:
+            if course.get("course_id") in (None, ""):
+                course = {**course, "course_id": next_id}
+                next_id += 1
+            key = str(course["course_id"])
+            if key in by_key:
+                duplicates.append(key)
+                del by_key[key]
+            by_key[key] = course
+        return list(by_key.values()), list(dict.fromkeys(duplicates))
+
+    def replace_all(self, courses: Iterable[dict]):
+        """Atomically replace every course (import, repair); repeated course ids are rejected."""
+        courses, duplicates = self._assign_ids(courses)
+        if duplicates:
+            raise ValueError(f"Duplicate course ids: {', '.join(duplicates)}")
+        with self._writing():
+            self._write_segment(self.segment_path, courses)
+            self.close()
+            self._attach()
+            self._save_index()
+
+    def _compact(self):
+        # Courses are streamed one at a time from the old segment into the new one
+        self._write_segment(self.segment_path, self.iter_courses())
+        self.close()
+        self._attach()
+        self._save_index()
+
+    def compact(self) -> Dict[str, int]:
+        """
+        Rewrite the segment with only live records, atomically. Content refs
+        from outlines read before it point into the old segment; CourseCache
+        re-resolves them, other readers must re-read the outline.
+        """
+        with self._writing():
+            before = self._size
+            self._compact()
+            return {"before_bytes": before, "after_bytes": self._size}
+
+    # --- Reading ---
+
+    def __len__(self) -> int:
+        self.open()
+        return len(self._index)
+
+    def __contains__(self, course_id) -> bool:
+        self.open()
+        return str(course_id) in self._index
+
+    def _read(self, offset: int, length: int) -> Tuple[int, bytes]:
+        with self._lock:
+            self.open()
+            return _read_record(self._fd, offset, length)
+
+    def list_courses(self) -> List[dict]:
+        """Course summaries (id, title, module count) without reading any outline."""
+        self.open()
+        entries = sorted(self._index.values(), key=lambda e: _sort_key(e.course_id))
+        return [{"course_id": e.course_id, "course_title": e.title, "modules": e.modules} for e in entries]
+
+    def titles(self) -> List[str]:
+        self.open()
+        return list(self._titles)
+
+    def next_course_id(self) -> int:
+        self.open()
+        ids = [e.course_id for e in self._index.values() if isinstance(e.course_id, int)]
+        return max(ids, default=0) + 1
+
+    def get_outline(self, course_id) -> Optional[dict]:
+        """The course without sub-topic content (each sub-topic has a ``content_ref``)."""
+        self.open()
+        entry = self._index.get(str(course_id))
+        if entry is None:
+            return None
+        return json.loads(self._read(entry.offset, entry.length)[1])
+
+    def get_content(self, content_ref) -> str:
+        return self._blobs.text(tuple(content_ref))
+
+    def load_content(self, sub_topic: dict) -> str:
+        """Content of an outline (or fully loaded) sub-topic."""
+        if "content" in sub_topic:
+            return sub_topic["content"]
+        content_ref = sub_topic.get("content_ref")
+        return self.get_content(content_ref) if content_ref else ""
+
+    def get_course(self, course_id) -> Optional[dict]:
+        """The full course, content included (JSON-compatible)."""
+        outline = self.get_outline(course_id)
+        if outline is None:
+            return None
+        for module in outline.get("modules", []):
+            if not isinstance(module, dict):
+                continue
+            for sub_topic in module.get("sub_topics", []):
+                if isinstance(sub_topic, dict) and "content_ref" in sub_topic:
+                    sub_topic["content"] = self.get_content(sub_topic.pop("content_ref"))
+        return outline
+
+    def iter_courses(self):
+        for summary in self.list_courses():
+            yield self.get_course(summary["course_id"])
+
+    # --- JSON interchange ---
+
+    @staticmethod
+    def _load_json(path: str) -> List[dict]:
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        if isinstance(data, dict) and "course_title" in data:
+            data = [data]
+        if not isinstance(data, list):
+            raise ValueError(f"{path} must hold a course or a list of courses")
+        return data
+
+    def import_json(self, path: str) -> int:
+        """Replace the store's contents with a course_output.json file; returns the courses indexed."""
+        self.replace_all(self._load_json(path))
+        return len(self._index)
+
+    def export_json(self, path: str) -> int:
+        """Write every course to a course_output.json-compatible file (atomically)."""
+        count = 0
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write("[")
+            for course in self.iter_courses():
+                f.write(",\n" if count else "\n")
+                f.write(json.dumps(course, indent=4, ensure_ascii=False))
+                count += 1
+            f.write("\n]\n")
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+        return count
+
+    @property
+    def dead_bytes(self) -> int:
+        """Bytes of superseded records, unreferenced blobs and tombstones, reclaimed by compact()."""
+        return self._size - _FILE_HEADER.size - self._live
+
+    def dedup_stats(self) -> Dict[str, float]:
+        """Sub-topic content as referenced by courses versus as stored."""
+        self.open()
+        refs = [ref for entry in self._index.values() for ref in entry.refs]
+        unique = set(refs)
+        stored = self._blobs.footprint(unique)
+        content_bytes = sum(self._blobs.info.get(offset, (length, None))[0] for offset, length in refs)
+        stored_bytes = sum(stored.values())
+        return {
+            "sub_topics": len(refs),
+            "unique_contents": len(unique),
+            "near_duplicate_deltas": sum(1 for ref in stored if self._blobs.info.get(ref[0], (0, None))[1]),
+            "content_bytes": content_bytes,
+            "stored_bytes": stored_bytes,
+            "saved_pct": round(100 * (1 - stored_bytes / content_bytes), 1) if content_bytes else 0.0,
+        }
+
+    def stats(self) -> Dict[str, int]:
+        self.open()
+        return {"courses": len(self._index), "segment_bytes": self._size, "dead_bytes": self.dead_bytes}
+
+
+# Shared by the class server, document service and manage_courses
+course_store = CourseStore()
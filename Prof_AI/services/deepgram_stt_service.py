@@ -16,8 +16,12 @@ import logging
 from typing import AsyncGenerator, Optional
 import websockets
 import config
+from utils.log_pipeline import STT
+from utils.resilience import ProviderUnavailable, governors
 
 logger = logging.getLogger(__name__)
+# Per-event logs go to the sampled hot-path category
+stt_log = logging.getLogger(STT)
 
 
 class DeepgramSTTService:
@@ -34,6 +38,8 @@ class DeepgramSTTService:
         self._recv_task: Optional[asyncio.Task] = None
         self._queue: asyncio.Queue = asyncio.Queue()
         self._closed = False
+        # Governs connection attempts (handshakes), not the streams' lifetime
+        self._governor = governors["deepgram"]
 
     @property
     def enabled(self) -> bool:
@@ -59,26 +65,30 @@ class DeepgramSTTService:
         url = "wss://api.deepgram.com/v2/listen?" + "&".join([f"{k}={v}" for k, v in params.items()])
 
         try:
-            self.ws = await websockets.connect(
-                url,
-                additional_headers={
-                    "Authorization": f"Token {self.api_key}"
-                },
-                ping_interval=20,
-                ping_timeout=10,
-                max_size=16 * 1024 * 1024
-            )
-            
-            logger.info("✅ Connected to Deepgram Real-time STT")
-            
-            # Start background receiver
-            self._recv_task = asyncio.create_task(self._receiver())
-            return True
-            
+            # The slot is released once the handshake is done; the breaker counts connect outcomes only
+            async with self._governor.call():
+                self.ws = await websockets.connect(
+                    url,
+                    additional_headers={
+                        "Authorization": f"Token {self.api_key}"
+                    },
+                    ping_interval=20,
+                    ping_timeout=10,
+                    max_size=16 * 1024 * 1024
+                )
+        except ProviderUnavailable as e:
+            logger.warning(f"⚡ Deepgram STT fast-fail: {e}")
+            return False
         except Exception as e:
             logger.error(f"❌ Failed to start Deepgram STT: {e}")
             return False
 
+        logger.info("✅ Connected to Deepgram Real-time STT")
+        
+        # Start background receiver
+        self._recv_task = asyncio.create_task(self._receiver())
+        return True
+
     async def _receiver(self):
         """Receive and process messages from Deepgram WebSocket."""
         assert self.ws is not None
@@ -111,27 +121,27 @@ class DeepgramSTTService:
 
             if event == "StartOfTurn":
                 await self._queue.put({"type": "speech_started"})
-                logger.debug("🗣️ StartOfTurn (VAD)")
+                stt_log.debug("🗣️ StartOfTurn (VAD)")
             elif event == "EagerEndOfTurn":
                 # Medium-confidence end; surface as partial-final to start LLM early if desired
                 if transcript.strip():
                     await self._queue.put({"type": "partial", "text": transcript, "language": self.language})
-                    logger.debug(f"⚡ EagerEndOfTurn partial: '{transcript}'")
+                    stt_log.debug("⚡ EagerEndOfTurn partial: '%s'", transcript)
             elif event == "TurnResumed":
                 # User kept talking; nothing to emit besides a debug
-                logger.debug("🔄 TurnResumed")
+                stt_log.debug("🔄 TurnResumed")
             elif event == "EndOfTurn":
                 if transcript.strip():
                     await self._queue.put({"type": "final", "text": transcript, "language": self.language})
-                    logger.debug(f"✅ EndOfTurn final: '{transcript}'")
+                    stt_log.debug("✅ EndOfTurn final: '%s'", transcript)
                 await self._queue.put({"type": "utterance_end"})
-                logger.debug("🔇 Utterance ended (EndOfTurn)")
+                stt_log.debug("🔇 Utterance ended (EndOfTurn)")
             elif event == "Update":
                 if transcript.strip():
                     await self._queue.put({"type": "partial", "text": transcript, "language": self.language})
-                    logger.debug(f"📝 Update partial: '{transcript}'")
+                    stt_log.debug("📝 Update partial: '%s'", transcript)
             else:
-                logger.debug(f"📨 TurnInfo: {event}")
+                stt_log.debug("📨 TurnInfo: %s", event)
 
         elif message_type == "Metadata":
             request_id = data.get("request_id")
@@ -152,9 +162,9 @@ class DeepgramSTTService:
                     is_final = channel.get("is_final", False)
                     if transcript.strip():
                         await self._queue.put({"type": "final" if is_final else "partial", "text": transcript, "language": self.language})
-                        logger.debug(f"🎤 v1 {('final' if is_final else 'partial')}: '{transcript}'")
+                        stt_log.debug("🎤 v1 %s: '%s'", 'final' if is_final else 'partial', transcript)
             else:
-                logger.debug(f"📨 Unknown Deepgram message: {data}")
+                stt_log.debug("📨 Unknown Deepgram message: %s", message_type)
 
     async def recv(self) -> AsyncGenerator[dict, None]:
         """Yield events from Deepgram STT (partial/final/VAD events)."""
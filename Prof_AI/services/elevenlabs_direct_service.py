@@ -6,15 +6,32 @@ Uses standard WebSocket API without requiring agent configuration
 import asyncio
 import json
 import base64
+import functools
 import logging
+import time
 from typing import Optional, Callable, AsyncGenerator
 import websockets
 from websockets.exceptions import ConnectionClosed
 import config
-from openai import OpenAI
+from openai import OpenAI, AsyncOpenAI
 import requests
+from services.canned_audio import LLM_FALLBACK_TEXT, canned_audio
+from services.intent_router import intent_router
+from utils.hedging import HedgePolicy
+from utils.log_pipeline import AUDIO
+from utils.metrics import metrics
+from utils.resilience import ProviderUnavailable, governors
 
-logging.basicConfig(level=logging.INFO)
+audio_log = logging.getLogger(AUDIO)
+
+# Shared across sessions: the first-byte distribution is a property of the provider
+tts_hedge_policy = HedgePolicy(
+    "tts",
+    initial_deadline=config.TTS_HEDGE_INITIAL_DEADLINE_S,
+    min_deadline=config.TTS_HEDGE_MIN_DEADLINE_S,
+    max_deadline=config.TTS_HEDGE_MAX_DEADLINE_S,
+    percentile=config.TTS_HEDGE_PERCENTILE,
+)
 
 class ElevenLabsDirectService:
     """
@@ -31,6 +48,8 @@ class ElevenLabsDirectService:
         # OpenAI client for custom LLM
         # Add default timeouts to avoid TLS stalls
         self.openai_client = OpenAI(api_key=config.OPENAI_API_KEY, timeout=30.0)
+        # Async client for streamed turns; cancelling the consumer aborts the HTTP stream
+        self.async_openai_client = AsyncOpenAI(api_key=config.OPENAI_API_KEY, timeout=30.0)
         self.custom_model = "ft:gpt-4.1-mini-2025-04-14:professor-ai:aum:COPCJu5T"
         
         # Conversation history
@@ -46,13 +65,14 @@ class ElevenLabsDirectService:
         logging.info("ℹ️ connect_tts_websocket() is deprecated; using per-request sockets")
         return False
     
-    async def transcribe_audio(self, audio_bytes: bytes, language: str = "en") -> str:
+    async def transcribe_audio(self, audio_bytes: bytes, language: str = "en", sample_rate: int = 16000) -> str:
         """
         Transcribe audio using OpenAI Whisper API.
         
         Args:
-            audio_bytes: Audio data (PCM16, 16kHz, mono)
+            audio_bytes: Audio data (PCM16, mono)
             language: Language code
+            sample_rate: Sample rate of the audio
             
         Returns:
             Transcribed text
@@ -67,18 +87,20 @@ class ElevenLabsDirectService:
             with wave.open(wav_buffer, 'wb') as wav_file:
                 wav_file.setnchannels(1)  # Mono
                 wav_file.setsampwidth(2)  # 16-bit
-                wav_file.setframerate(16000)  # 16kHz
+                wav_file.setframerate(sample_rate)
                 wav_file.writeframes(audio_bytes)
             
             wav_buffer.seek(0)
             wav_buffer.name = "audio.wav"
             
-            # Call Whisper API
-            transcript = self.openai_client.audio.transcriptions.create(
-                model="whisper-1",
-                file=wav_buffer,
-                language=language if language != "auto" else None
-            )
+            # Call Whisper API (off the event loop, under the OpenAI governor)
+            async with governors["openai"].call():
+                transcript = await asyncio.to_thread(
+                    self.openai_client.audio.transcriptions.create,
+                    model="whisper-1",
+                    file=wav_buffer,
+                    language=language if language != "auto" else None
+                )
             
             transcribed_text = transcript.text.strip()
             logging.info(f"🎤 Transcribed: {transcribed_text}")
@@ -88,49 +110,19 @@ class ElevenLabsDirectService:
             logging.error(f"❌ STT error: {e}")
             return ""
     
-    def _is_tech_stack_question(self, user_message: str) -> bool:
+    def _route_intent(self, user_message: str) -> Optional[str]:
         """
-        Check if the user is asking about tech stack, tools, or frameworks.
-        
-        Args:
-            user_message: User's message
-            
-        Returns:
-            True if the message is asking about tech stack/tools/frameworks
+        Fixed answer for a routed intent (tech stack, identity, ...), or None
+        if the message should go to the LLM.
         """
-        # Convert to lowercase for case-insensitive matching
-        message_lower = user_message.lower()
-        
-        # Keywords that indicate tech stack questions
-        tech_keywords = [
-            'tech stack', 'technology stack', 'tech-stack', 'techstack',
-            'framework', 'frameworks', 'tool', 'tools', 'technology', 'technologies',
-            'platform', 'platforms', 'software', 'library', 'libraries',
-            'programming language', 'language', 'languages', 'built with',
-            'using what', 'made with', 'developed with', 'created with',
-            'which technology', 'what technology', 'what tools', 'which tools',
-            'what framework', 'which framework', 'what platform', 'which platform',
-            'how are you built', 'how were you built', 'what are you built on',
-            'how were you developed', 'how are you developed', 'developed',
-            'what powers you', 'backend', 'frontend', 'database', 'api',
-            'openai', 'gpt', 'llm', 'model', 'ai model', 'language model',
-            'elevenlabs', 'websocket', 'python', 'javascript', 'react', 'node'
-        ]
-        
-        # Question patterns that indicate tech stack inquiry
-        question_patterns = [
-            'what', 'which', 'how', 'tell me about', 'can you tell me',
-            'i want to know', 'curious about', 'wondering about'
-        ]
-        
-        # Check if message contains tech keywords
-        has_tech_keyword = any(keyword in message_lower for keyword in tech_keywords)
-        
-        # Check if message has question pattern (optional, but helps with accuracy)
-        has_question_pattern = any(pattern in message_lower for pattern in question_patterns)
-        
-        # Return True if it has tech keywords (question pattern is optional)
-        return has_tech_keyword
+        if not config.INTENT_ROUTER_ENABLED:
+            return None
+        intent = intent_router.match(user_message)
+        if intent is None:
+            return None
+        logging.info(f"🧭 Intent '{intent.name}' matched, returning canned response")
+        metrics.inc(f"intent_{intent.name}")
+        return intent.response
     
     async def get_llm_response(self, user_message: str) -> str:
         """
@@ -143,25 +135,22 @@ class ElevenLabsDirectService:
             LLM response text
         """
         try:
-            # Check if this is a tech stack question
-            if self._is_tech_stack_question(user_message):
-                logging.info(f"🔒 Tech stack question detected, returning standard response")
+            # Fixed intents are answered without calling the LLM
+            routed_response = self._route_intent(user_message)
+            if routed_response is not None:
                 # Add user message to history
                 self.conversation_history.append({
                     "role": "user",
                     "content": user_message
                 })
                 
-                # Return the standard response for tech stack questions
-                standard_response = "I am a model build by Aalgorix"
-                
                 # Add to history
                 self.conversation_history.append({
                     "role": "assistant",
-                    "content": standard_response
+                    "content": routed_response
                 })
                 
-                return standard_response
+                return routed_response
             
             # Add user message to history
             self.conversation_history.append({
@@ -175,12 +164,13 @@ class ElevenLabsDirectService:
             ] + self.conversation_history
             
             # Call custom model
-            response = self.openai_client.chat.completions.create(
-                model=self.custom_model,
-                messages=messages,
-                temperature=0.7,
-                max_tokens=300
-            )
+            async with governors["openai"].call():
+                response = await self.async_openai_client.chat.completions.create(
+                    model=self.custom_model,
+                    messages=messages,
+                    temperature=0.7,
+                    max_tokens=300
+                )
             
             llm_response = response.choices[0].message.content
             
@@ -193,14 +183,224 @@ class ElevenLabsDirectService:
             logging.info(f"🤖 LLM Response: {llm_response[:100]}...")
             return llm_response
             
+        except ProviderUnavailable as e:
+            logging.warning(f"⚡ LLM fast-fail: {e}")
+            return LLM_FALLBACK_TEXT
         except Exception as e:
             logging.error(f"❌ LLM error: {e}")
-            return "I apologize, but I'm having trouble processing your request. Could you please try again?"
+            return LLM_FALLBACK_TEXT
+    
+    async def get_llm_response_stream(self, user_message: str) -> AsyncGenerator[str, None]:
+        """
+        Stream the custom LLM response as text deltas.
+        
+        Cancelling the consuming task closes the underlying HTTP stream, so a
+        barge-in stops token generation immediately. Whatever text was produced
+        before cancellation is kept in the conversation history.
+        
+        Args:
+            user_message: User's message
+            
+        Yields:
+            Response text deltas
+        """
+        self.conversation_history.append({
+            "role": "user",
+            "content": user_message
+        })
+        
+        routed_response = self._route_intent(user_message)
+        if routed_response is not None:
+            self.conversation_history.append({
+                "role": "assistant",
+                "content": routed_response
+            })
+            yield routed_response
+            return
+        
+        messages = [
+            {"role": "system", "content": config.AGENT_GREETING}
+        ] + self.conversation_history
+        
+        parts = []
+        stream = None
+        try:
+            async with governors["openai"].call() as call:
+                stream = await self.async_openai_client.chat.completions.create(
+                    model=self.custom_model,
+                    messages=messages,
+                    temperature=0.7,
+                    max_tokens=300,
+                    stream=True
+                )
+                async for chunk in stream:
+                    if not chunk.choices:
+                        continue
+                    delta = chunk.choices[0].delta.content
+                    if delta:
+                        call.mark_first_byte()
+                        parts.append(delta)
+                        yield delta
+        except asyncio.CancelledError:
+            logging.info("🛑 LLM stream cancelled")
+            raise
+        except ProviderUnavailable as e:
+            logging.warning(f"⚡ LLM fast-fail: {e}")
+            parts.append(LLM_FALLBACK_TEXT)
+            yield LLM_FALLBACK_TEXT
+        except Exception as e:
+            logging.error(f"❌ LLM stream error: {e}")
+            if not parts:
+                parts.append(LLM_FALLBACK_TEXT)
+                yield LLM_FALLBACK_TEXT
+        finally:
+            if stream is not None:
+                try:
+                    await stream.close()
+                except Exception:
+                    pass
+            if parts:
+                self.conversation_history.append({
+                    "role": "assistant",
+                    "content": "".join(parts)
+                })
     
     async def text_to_speech_stream(self, text: str) -> AsyncGenerator[bytes, None]:
         """
         Convert text to speech and stream audio chunks using a fresh ElevenLabs
-        stream-input WebSocket per request. Falls back to REST TTS on error.
+        stream-input WebSocket per request.
+        
+        If the socket has produced no audio by the hedge deadline (adaptive p95
+        of recent first-byte times), a REST request is raced against it and
+        whichever source produces audio first is used; the loser is cancelled.
+        Falls back to REST TTS if the socket fails before producing audio, and
+        to cached canned audio if ElevenLabs is unavailable altogether.
+        """
+        canned = canned_audio.get_for_text(text)
+        if canned:
+            yield canned
+            return
+        if not governors["elevenlabs"].available:
+            logging.warning("⚡ ElevenLabs circuit open, serving canned audio")
+            fallback = canned_audio.fallback(text)
+            if fallback:
+                yield fallback
+            return
+        
+        started = time.monotonic()
+        tts_hedge_policy.record_request()
+        queue: asyncio.Queue = asyncio.Queue()
+        ws_task = asyncio.create_task(self._stream_tts_websocket(text, queue))
+        ws_next = asyncio.ensure_future(queue.get())
+        rest_task = None
+        hedged = False
+        loser_handed_off = False
+        deadline = tts_hedge_policy.deadline() if config.TTS_HEDGE_ENABLED else None
+        
+        try:
+            waiters = {ws_next}
+            winner = None
+            while winner is None:
+                done, _ = await asyncio.wait(
+                    waiters,
+                    timeout=deadline if rest_task is None else None,
+                    return_when=asyncio.FIRST_COMPLETED
+                )
+                
+                if not done:
+                    # First-byte deadline passed on a live socket: hedge with REST
+                    hedged = True
+                    tts_hedge_policy.record_hedge()
+                    logging.info(f"⏱️ No TTS audio after {deadline * 1000:.0f}ms, hedging with REST")
+                    rest_task = asyncio.create_task(self.text_to_speech(text, canned_fallback=False))
+                    waiters.add(rest_task)
+                    continue
+                
+                if ws_next in done:
+                    item = ws_next.result()
+                    if isinstance(item, bytes):
+                        winner = "ws"
+                        break
+                    # Socket failed (or finished empty) before producing audio
+                    logging.error(f"❌ TTS streaming error: {item or 'no audio received'}")
+                    waiters.discard(ws_next)
+                    if rest_task is None:
+                        logging.info("🔄 Falling back to REST TTS...")
+                        rest_task = asyncio.create_task(self.text_to_speech(text, canned_fallback=False))
+                        waiters.add(rest_task)
+                
+                if rest_task is not None and rest_task in done:
+                    if rest_task.result():
+                        winner = "rest"
+                        break
+                    waiters.discard(rest_task)
+                    if not waiters:
+                        logging.error("❌ REST TTS fallback also failed")
+                        fallback = canned_audio.fallback(text)
+                        if fallback:
+                            yield fallback
+                        return
+            
+            if winner == "ws":
+                tts_hedge_policy.observe_first_byte(time.monotonic() - started)
+                if rest_task is not None:
+                    rest_task.cancel()
+                    tts_hedge_policy.record_winner("ws")
+                yield item
+                while True:
+                    item = await queue.get()
+                    if isinstance(item, bytes):
+                        yield item
+                        continue
+                    if item is not None:
+                        logging.error(f"❌ TTS streaming error mid-stream: {item}")
+                    break
+            else:
+                audio = rest_task.result()
+                rest_elapsed = time.monotonic() - started
+                if hedged and not ws_next.done():
+                    # The socket stops feeding the client now; it is only kept
+                    # briefly to timestamp its first byte (latency saved)
+                    tts_hedge_policy.record_winner("rest")
+                    loser_handed_off = True
+                    asyncio.create_task(self._observe_hedge_loser(ws_task, ws_next, started, rest_elapsed))
+                logging.info(f"✅ REST TTS: {len(audio)} bytes in {rest_elapsed * 1000:.0f}ms")
+                yield audio
+        finally:
+            if rest_task is not None and not rest_task.done():
+                rest_task.cancel()
+            if not loser_handed_off:
+                if not ws_next.done():
+                    ws_next.cancel()
+                if not ws_task.done():
+                    ws_task.cancel()
+    
+    async def _observe_hedge_loser(self, ws_task: asyncio.Task, ws_next: asyncio.Future,
+                                   started: float, rest_elapsed: float):
+        """Record how much later the losing socket would have produced audio, then close it."""
+        grace = config.TTS_HEDGE_LOSER_GRACE_S
+        try:
+            item = await asyncio.wait_for(ws_next, timeout=grace)
+            if isinstance(item, bytes):
+                ws_elapsed = time.monotonic() - started
+                tts_hedge_policy.observe_first_byte(ws_elapsed)
+                tts_hedge_policy.record_saved(ws_elapsed - rest_elapsed)
+        except asyncio.TimeoutError:
+            # Censored: the socket was still silent when we gave up on it
+            ws_elapsed = time.monotonic() - started
+            tts_hedge_policy.observe_censored(ws_elapsed)
+            tts_hedge_policy.record_saved(ws_elapsed - rest_elapsed)
+        except Exception:
+            pass
+        finally:
+            ws_task.cancel()
+    
+    async def _stream_tts_websocket(self, text: str, queue: asyncio.Queue):
+        """
+        Stream one utterance over the multi-context WebSocket into ``queue``.
+        
+        Puts audio bytes as they arrive, then ``None`` when generation is final,
+        or the exception if the socket fails or returns no audio.
         """
         # Use the Multi-Context WebSocket endpoint with explicit output format
         url = (
@@ -209,82 +409,95 @@ class ElevenLabsDirectService:
         )
 
         try:
-            async with websockets.connect(
-                url,
-                additional_headers={"xi-api-key": self.api_key},
-                max_size=16 * 1024 * 1024,
-                ping_interval=25,
-                ping_timeout=15,
-            ) as ws:
-                # Initial context configuration
-                context_id = "conv_1"
-                init_msg = {
-                    "voice_settings": {
-                        "stability": 0.5,
-                        "similarity_boost": 0.75,
-                    },
-                    "context_id": context_id,
-                }
-                await ws.send(json.dumps(init_msg))
+            async with governors["elevenlabs"].call() as call:
+                async with websockets.connect(
+                    url,
+                    additional_headers={"xi-api-key": self.api_key},
+                    max_size=16 * 1024 * 1024,
+                    ping_interval=25,
+                    ping_timeout=15,
+                ) as ws:
+                    # Initial context configuration
+                    context_id = "conv_1"
+                    init_msg = {
+                        "voice_settings": {
+                            "stability": 0.5,
+                            "similarity_boost": 0.75,
+                        },
+                        "context_id": context_id,
+                    }
+                    await ws.send(json.dumps(init_msg))
 
-                # Send the text and then flush to finalize generation for this context
-                await ws.send(json.dumps({"text": text, "context_id": context_id}))
-                await ws.send(json.dumps({"flush": True, "context_id": context_id}))
+                    # Send the text and then flush to finalize generation for this context
+                    await ws.send(json.dumps({"text": text, "context_id": context_id}))
+                    await ws.send(json.dumps({"flush": True, "context_id": context_id}))
 
-                # Receive audio frames until final
-                total_received = 0
-                message_count = 0
-                async for message in ws:
-                    message_count += 1
+                    # Receive audio frames until final
+                    total_received = 0
+                    message_count = 0
                     try:
-                        data = json.loads(message)
-                        logging.info(f"📨 ElevenLabs message #{message_count}: {data}")
-                        if data.get("audio"):
-                            audio_bytes = base64.b64decode(data["audio"])
-                            if audio_bytes:
-                                total_received += len(audio_bytes)
-                                logging.info(f"🎵 Audio chunk: {len(audio_bytes)} bytes")
-                                yield audio_bytes
-                        # Handle either is_final or isFinal markers from API variants
-                        if data.get("is_final") or data.get("isFinal"):
-                            logging.info("🏁 ElevenLabs marked final")
-                            break
-                    except json.JSONDecodeError:
-                        # Binary audio payload
-                        if isinstance(message, bytes) and len(message) > 0:
-                            total_received += len(message)
-                            logging.info(f"🎵 Binary audio: {len(message)} bytes")
-                            yield message
-                
-                # If no audio was received, force fallback
-                if total_received == 0:
-                    logging.warning("⚠️ ElevenLabs streaming returned 0 bytes, forcing fallback")
-                    raise Exception("No audio data received from streaming")
+                        async for message in ws:
+                            message_count += 1
+                            try:
+                                data = json.loads(message)
+                                if audio_log.isEnabledFor(logging.DEBUG):
+                                    # Never format the base64 audio payload
+                                    audio_log.debug("📨 ElevenLabs message #%d: keys=%s", message_count,
+                                                    sorted(k for k in data if k != "audio"))
+                                if data.get("audio"):
+                                    audio_bytes = base64.b64decode(data["audio"])
+                                    if audio_bytes:
+                                        total_received += len(audio_bytes)
+                                        audio_log.debug("🎵 Audio chunk: %d bytes", len(audio_bytes))
+                                        call.mark_first_byte()
+                                        queue.put_nowait(audio_bytes)
+                                # Handle either is_final or isFinal markers from API variants
+                                if data.get("is_final") or data.get("isFinal"):
+                                    audio_log.debug("🏁 ElevenLabs marked final")
+                                    break
+                            except json.JSONDecodeError:
+                                # Binary audio payload
+                                if isinstance(message, bytes) and len(message) > 0:
+                                    total_received += len(message)
+                                    audio_log.debug("🎵 Binary audio: %d bytes", len(message))
+                                    call.mark_first_byte()
+                                    queue.put_nowait(message)
+                    except asyncio.CancelledError:
+                        # Barge-in or lost hedge race: close this context so ElevenLabs stops generating
+                        try:
+                            await ws.send(json.dumps({"context_id": context_id, "close_context": True}))
+                        except Exception:
+                            pass
+                        raise
 
+                    # If no audio was received, force fallback
+                    if total_received == 0:
+                        logging.warning("⚠️ ElevenLabs streaming returned 0 bytes, forcing fallback")
+                        raise Exception("No audio data received from streaming")
+            
+            queue.put_nowait(None)
+
+        except asyncio.CancelledError:
+            raise
         except Exception as e:
-            logging.error(f"❌ TTS streaming error: {e}")
-            # REST fallback to avoid silent failures
-            try:
-                logging.info("🔄 Falling back to REST TTS...")
-                audio = await self.text_to_speech(text)
-                if audio:
-                    logging.info(f"✅ REST TTS fallback: {len(audio)} bytes")
-                    yield audio
-                else:
-                    logging.error("❌ REST TTS fallback also failed")
-            except Exception as e2:
-                logging.error(f"❌ TTS fallback error: {e2}")
+            queue.put_nowait(e)
     
-    async def text_to_speech(self, text: str) -> bytes:
+    async def text_to_speech(self, text: str, canned_fallback: bool = True) -> bytes:
         """
         Convert text to speech (non-streaming).
         
         Args:
             text: Text to convert
+            canned_fallback: Return cached canned audio instead of b"" when
+                ElevenLabs is unavailable or the request fails
             
         Returns:
             Complete audio as bytes
         """
+        canned = canned_audio.get_for_text(text)
+        if canned:
+            return canned
+        
         url = f"https://api.elevenlabs.io/v1/text-to-speech/{self.voice_id}"
         
         headers = {
@@ -302,16 +515,46 @@ class ElevenLabsDirectService:
         }
         
         try:
-            response = requests.post(url, headers=headers, json=data, timeout=(10, 60))
+            response = await self._post_governed(url, headers, data)
             response.raise_for_status()
             
             logging.info(f"✅ Generated audio: {len(response.content)} bytes")
             return response.content
             
+        except ProviderUnavailable as e:
+            logging.warning(f"⚡ TTS fast-fail: {e}")
         except Exception as e:
             logging.error(f"❌ TTS error: {e}")
-            return b""
+        return canned_audio.fallback(text) if canned_fallback else b""
     
+    @staticmethod
+    async def _post_governed(url: str, headers: dict, data: dict) -> requests.Response:
+        """
+        requests.post off the event loop (so it can race the socket) under the
+        ElevenLabs governor. A thread cannot be cancelled: when the caller is
+        (the hedge's loser), the request still runs to completion, so the slot
+        is held and the outcome recorded when the thread returns, not when the
+        caller goes away.
+        """
+        governor = governors["elevenlabs"]
+        await governor.acquire()
+        started = time.monotonic()
+        request = asyncio.get_running_loop().run_in_executor(
+            None, functools.partial(requests.post, url, headers=headers, json=data, timeout=(10, 60))
+        )
+
+        def finished(future: asyncio.Future):
+            governor.release()
+            if future.cancelled():
+                governor.breaker.release_probe()
+            elif future.exception() is not None or not future.result().ok:
+                governor.record_failure()
+            else:
+                governor.record_success(time.monotonic() - started)
+
+        request.add_done_callback(finished)
+        return await asyncio.shield(request)
+
     async def disconnect(self):
         """Disconnect from WebSocket."""
         # Persistent WS is no longer used; nothing to do.
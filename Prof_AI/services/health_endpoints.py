@@ -0,0 +1,123 @@
+"""
+Health Endpoints - plain HTTP probes served on the WebSocket port
+
+Hooked in as the server's ``process_request``: a request for one of these
+paths is answered before the WebSocket handshake, so no session, greeting or
+provider call is ever created. Every other path continues to the handshake.
+
+- /healthz  200 while the event loop is serving (it answered the request)
+- /readyz   200 when accepting sessions: not draining, no provider breaker
+            open, canned audio warm-up finished; 503 otherwise
+- /stats    sessions, queue depths and per-stage latency percentiles
+"""
+
+import json
+import time
+from http import HTTPStatus
+from typing import Callable, Dict, Tuple
+from urllib.parse import urlsplit
+
+from websockets.datastructures import Headers
+from websockets.http11 import Response
+
+import config
+from services.canned_audio import canned_audio
+from utils.metrics import metrics
+from utils.resilience import governors
+
+# Histograms reported by /stats, in pipeline order
+STAGE_HISTOGRAMS = [
+    "llm_first_token_ms",
+    "turn_first_audio_ms",
+    "turn_total_ms",
+    "barge_in_to_silence_ms",
+    "openai_queue_wait_ms",
+    "elevenlabs_queue_wait_ms",
+    "deepgram_queue_wait_ms",
+    "transcribe_segment_ms",
+    "session_resume_gap_ms",
+    "loop_lag_ms",
+    "loop_stall_ms",
+]
+
+
+class HealthEndpoints:
+    """HTTP probe routes for a SimpleAudioServer."""
+
+    def __init__(self, server):
+        self.server = server
+        self.started_at = time.monotonic()
+        self.routes: Dict[str, Callable[[], Tuple[HTTPStatus, dict]]] = {
+            "/healthz": self.healthz,
+            "/readyz": self.readyz,
+            "/stats": self.stats,
+        }
+
+    def process_request(self, connection_or_path, request=None):
+        """
+        websockets ``process_request`` hook. The new asyncio API passes
+        (connection, request) and expects a Response; the legacy API passes
+        (path, headers) and expects a (status, headers, body) tuple.
+        """
+        legacy = isinstance(connection_or_path, str)
+        path = connection_or_path if legacy else request.path
+        route = self.routes.get(urlsplit(path).path)
+        if route is None:
+            return None
+
+        status, body = route()
+        payload = json.dumps(body, separators=(",", ":")).encode("utf-8")
+        headers = [
+            ("Content-Type", "application/json"),
+            ("Content-Length", str(len(payload))),
+            ("Cache-Control", "no-store"),
+        ]
+        if legacy:
+            return status, headers, payload
+        return Response(status.value, status.phrase, Headers(headers), payload)
+
+    def healthz(self) -> Tuple[HTTPStatus, dict]:
+        return HTTPStatus.OK, {
+            "status": "ok",
+            "node": config.NODE_ID,
+            "uptime_s": round(time.monotonic() - self.started_at, 1),
+        }
+
+    def readyz(self) -> Tuple[HTTPStatus, dict]:
+        open_breakers = [name for name, governor in governors.items() if not governor.available]
+        checks = {
+            "serving": self.server.serving,
+            "draining": self.server.draining,
+            "open_breakers": open_breakers,
+            "canned_audio_warm": self.server.canned_audio_warm,
+        }
+        ready = checks["serving"] and not checks["draining"] and not open_breakers and checks["canned_audio_warm"]
+        status = HTTPStatus.OK if ready else HTTPStatus.SERVICE_UNAVAILABLE
+        return status, {"status": "ready" if ready else "not_ready", "node": config.NODE_ID, "checks": checks}
+
+    def stats(self) -> Tuple[HTTPStatus, dict]:
+        connections = list(self.server.active_connections.values())
+        audio_queues = [
+            conn['turns'].active.audio_queue.qsize()
+            for conn in connections if conn['turns'].active is not None
+        ]
+        histograms = metrics.snapshot()["histograms"]
+        return HTTPStatus.OK, {
+            "node": config.NODE_ID,
+            "uptime_s": round(time.monotonic() - self.started_at, 1),
+            "draining": self.server.draining,
+            "sessions": {
+                "active": len(connections),
+                "turns_in_flight": sum(1 for conn in connections if conn['turns'].is_active),
+                "uploads_in_progress": sum(1 for conn in connections if conn.get('upload') is not None),
+                "parked_local": self.server.sessions.local_count,
+                **self.server.idle.stats(),
+            },
+            "queues": {
+                "turn_audio_frames": sum(audio_queues),
+                "turn_audio_frames_max": max(audio_queues, default=0),
+                "providers": {name: governor.stats() for name, governor in governors.items()},
+            },
+            "canned_audio_loaded": canned_audio.loaded_count,
+            "latency_ms": {name: histograms[name] for name in STAGE_HISTOGRAMS if name in histograms},
+        }
@@ -0,0 +1,244 @@
+"""
+Idle Session Manager - reclaims resources held by quiet voice sessions
+
+Each session owns one timer in a shared timing wheel. Activity only updates
+timestamps; when a timer fires the manager re-checks the real idle time and
+either acts or re-arms the timer for the next pending deadline:
+
+1. No voiced audio for IDLE_STT_SUSPEND_S → suspend STT (Deepgram socket and
+   event pump are closed; the next voiced frame resumes it).
+2. No activity for IDLE_HISTORY_EVICT_S → conversation history is moved to a
+   compact compressed store and restored on the next activity.
+3. No activity for IDLE_SESSION_CLOSE_S → the session is closed.
+"""
+
+import logging
+import math
+import sys
+import time
+from array import array
+from typing import Awaitable, Callable, Dict, Optional
+
+import config
+from utils.history_codec import decode_history, encode_history
+from utils.metrics import metrics
+from utils.timing_wheel import TimingWheel
+
+logger = logging.getLogger(__name__)
+
+
+class _IdleState:
+    __slots__ = ("last_activity", "last_voiced", "stt_suspended_at", "history_blob")
+
+    def __init__(self, now: float):
+        self.last_activity = now
+        self.last_voiced = now
+        self.stt_suspended_at: Optional[float] = None
+        self.history_blob: Optional[bytes] = None
+
+
+class IdleSessionManager:
+    """Suspends STT, evicts history and closes sessions based on idleness."""
+
+    def __init__(
+        self,
+        connections: Dict,
+        suspend_stt: Callable[[int], Awaitable[None]],
+        close_session: Callable[[int], Awaitable[None]],
+        stt_suspend_after: float = config.IDLE_STT_SUSPEND_S,
+        history_evict_after: float = config.IDLE_HISTORY_EVICT_S,
+        session_close_after: float = config.IDLE_SESSION_CLOSE_S,
+        voice_rms_threshold: float = config.STT_VOICE_RMS_THRESHOLD,
+        tick: float = config.IDLE_TICK_S,
+    ):
+        self.connections = connections
+        self._suspend_stt = suspend_stt
+        self._close_session = close_session
+        self.stt_suspend_after = stt_suspend_after
+        self.history_evict_after = history_evict_after
+        self.session_close_after = session_close_after
+        self.voice_rms_threshold = voice_rms_threshold
+        self.wheel = TimingWheel(tick=tick)
+        self._state: Dict[int, _IdleState] = {}
+        self._saved_seconds = 0.0
+
+    def start(self):
+        self.wheel.start()
+
+    def stop(self):
+        self.wheel.stop()
+
+    # --- Session registration ---
+
+    def register(self, client_id):
+        self._state[client_id] = _IdleState(time.monotonic())
+        self._reschedule(client_id)
+        self._update_gauges()
+
+    def unregister(self, client_id):
+        self.wheel.cancel(client_id)
+        state = self._state.pop(client_id, None)
+        if state is not None and state.stt_suspended_at is not None:
+            self._account_suspension(state)
+        if state is not None and state.history_blob is not None:
+            # Hand the history back so a parked (resumable) session keeps it
+            self._restore_history(client_id, state)
+        self._update_gauges()
+
+    # --- Activity signals ---
+
+    @staticmethod
+    def frame_rms(pcm16_bytes: bytes, stride: int = 4) -> float:
+        """RMS of a little-endian PCM16 frame, sampling every ``stride``-th sample."""
+        samples = array('h')
+        samples.frombytes(pcm16_bytes[:len(pcm16_bytes) // 2 * 2])
+        if sys.byteorder == 'big':
+            samples.byteswap()
+        subset = samples[::stride]
+        if not subset:
+            return 0.0
+        return math.sqrt(sum(s * s for s in subset) / len(subset))
+
+    def note_audio(self, client_id, pcm16_bytes: bytes) -> bool:
+        """Record an inbound STT frame. Returns True if it contains voice."""
+        voiced = self.frame_rms(pcm16_bytes) >= self.voice_rms_threshold
+        if voiced:
+            state = self._state.get(client_id)
+            if state is not None:
+                state.last_voiced = time.monotonic()
+                self.note_activity(client_id)
+        return voiced
+
+    def note_activity(self, client_id):
+        """Record user activity and restore evicted history if needed."""
+        state = self._state.get(client_id)
+        if state is None:
+            return
+        state.last_activity = time.monotonic()
+        if state.history_blob is not None:
+            self._restore_history(client_id, state)
+
+    def note_stt_started(self, client_id):
+        state = self._state.get(client_id)
+        if state is not None:
+            state.last_voiced = time.monotonic()
+            self._reschedule(client_id)
+        self._update_gauges()
+
+    def mark_stt_suspended(self, client_id):
+        state = self._state.get(client_id)
+        if state is not None:
+            state.stt_suspended_at = time.monotonic()
+        metrics.inc("stt_suspensions")
+        self._update_gauges()
+
+    def mark_stt_resumed(self, client_id):
+        state = self._state.get(client_id)
+        if state is not None and state.stt_suspended_at is not None:
+            self._account_suspension(state)
+            metrics.inc("stt_resumes")
+        self._update_gauges()
+
+    # --- Reporting ---
+
+    def stats(self) -> Dict[str, float]:
+        now = time.monotonic()
+        suspended = [s for s in self._state.values() if s.stt_suspended_at is not None]
+        in_progress = sum(now - s.stt_suspended_at for s in suspended)
+        stt_active = sum(1 for conn in self.connections.values() if conn.get('stt'))
+        return {
+            "sessions": len(self._state),
+            "stt_active": stt_active,
+            "stt_suspended": len(suspended),
+            "history_evicted": sum(1 for s in self._state.values() if s.history_blob is not None),
+            "stt_upstream_seconds_saved": round(self._saved_seconds + in_progress, 3),
+        }
+
+    def _update_gauges(self):
+        stats = self.stats()
+        metrics.set_gauge("sessions_total", stats["sessions"])
+        metrics.set_gauge("sessions_stt_active", stats["stt_active"])
+        metrics.set_gauge("sessions_stt_suspended", stats["stt_suspended"])
+        metrics.set_gauge("sessions_history_evicted", stats["history_evicted"])
+
+    def _account_suspension(self, state: _IdleState):
+        saved = time.monotonic() - state.stt_suspended_at
+        state.stt_suspended_at = None
+        self._saved_seconds += saved
+        metrics.inc("stt_upstream_seconds_saved", saved)
+
+    # --- Timer handling ---
+
+    def _reschedule(self, client_id, now: Optional[float] = None):
+        state = self._state.get(client_id)
+        if state is None:
+            return
+        now = time.monotonic() if now is None else now
+        conn = self.connections.get(client_id) or {}
+
+        deadlines = []
+        if self.stt_suspend_after > 0 and conn.get('stt'):
+            deadlines.append(state.last_voiced + self.stt_suspend_after)
+        if self.history_evict_after > 0 and state.history_blob is None:
+            deadlines.append(state.last_activity + self.history_evict_after)
+        if self.session_close_after > 0:
+            deadlines.append(state.last_activity + self.session_close_after)
+        if not deadlines:
+            return
+
+        delay = max(self.wheel.tick, min(deadlines) - now)
+        self.wheel.schedule(client_id, delay, lambda: self._on_timer(client_id))
+
+    async def _on_timer(self, client_id):
+        state = self._state.get(client_id)
+        conn = self.connections.get(client_id)
+        if state is None or conn is None:
+            return
+
+        now = time.monotonic()
+        turns = conn.get('turns')
+        if turns is not None and turns.is_active:
+            # The agent is talking: not idle, and STT must stay up for barge-in
+            state.last_activity = now
+            state.last_voiced = now
+
+        try:
+            if (self.stt_suspend_after > 0 and conn.get('stt')
+                    and now - state.last_voiced >= self.stt_suspend_after):
+                await self._suspend_stt(client_id)
+
+            if (self.history_evict_after > 0 and state.history_blob is None
+                    and now - state.last_activity >= self.history_evict_after):
+                self._evict_history(client_id, state)
+
+            if self.session_close_after > 0 and now - state.last_activity >= self.session_close_after:
+                metrics.inc("sessions_reaped")
+                await self._close_session(client_id)
+                return
+        except Exception as e:
+            logger.error(f"❌ Idle handling failed for client {client_id}: {e}")
+
+        self._reschedule(client_id)
+
+    # --- History eviction ---
+
+    def _evict_history(self, client_id, state: _IdleState):
+        service = self.connections[client_id]['service']
+        history = service.conversation_history
+        if not history:
+            return
+        state.history_blob = encode_history(history)
+        service.conversation_history = []
+        metrics.inc("histories_evicted")
+        self._update_gauges()
+        logger.info(f"🗜️ Evicted history for client {client_id}: {len(history)} messages → {len(state.history_blob)} bytes")
+
+    def _restore_history(self, client_id, state: _IdleState):
+        conn = self.connections.get(client_id)
+        blob, state.history_blob = state.history_blob, None
+        if conn is not None:
+            service = conn['service']
+            service.conversation_history = decode_history(blob) + service.conversation_history
+            metrics.inc("histories_restored")
+        self._reschedule(client_id)
+        self._update_gauges()
@@ -0,0 +1,92 @@
+"""
+Intent Router - answers a few fixed intents without calling the LLM
+
+Runs in front of the LLM on every turn. All intent patterns are compiled into
+one regex alternation (a named group per intent, word-bounded on both sides),
+so routing is a single scan of the utterance. Matched intents are answered
+with a fixed response whose audio is pre-rendered by the canned audio cache.
+
+Patterns are regex fragments; a space matches any run of whitespace. Keep
+them specific to questions about the assistant itself - bare words such as
+"language", "tool" or "api" are ordinary admissions vocabulary, and a bare
+"you" usually means the university ("What software do you use for
+registration?"). Questions that only have "you" to go on are therefore
+matched as the whole utterance (_whole); within a longer sentence they need
+an explicit referent such as "this bot" or "your AI".
+"""
+
+import re
+from typing import Iterable, List, Optional
+
+
+class Intent:
+    """A routable intent and its fixed response."""
+
+    __slots__ = ("name", "response", "patterns")
+
+    def __init__(self, name: str, response: str, patterns: List[str]):
+        self.name = name
+        self.response = response
+        self.patterns = patterns
+
+
+_BOT = r"(?:this (?:bot|assistant|agent|app|system|voice agent)|your (?:ai|bot|assistant))"
+_SELF = rf"(?:you|{_BOT})"
+_TECH = (r"(?:tech|technolog(?:y|ies)|frameworks?|tools?|librar(?:y|ies)|platforms?|software|stack"
+         r"|(?:ai |large |underlying )?(?:language )?models?|llms?|apis?|databases?|backend|programming languages?)")
+# Lead-ins allowed before a whole-utterance question
+_LEAD = r"(?:(?:hi|hello|hey|so|and|but|um|wait|sorry|ok(?:ay)?),? )*"
+
+
+def _whole(pattern: str) -> str:
+    """Match ``pattern`` only as the entire utterance (give or take a greeting and punctuation)."""
+    return rf"^\W*{_LEAD}(?:{pattern})\W*$"
+
+
+INTENTS = [
+    Intent("tech_stack", "I am a model build by Aalgorix", [
+        r"tech(?:nology)?(?:-| )?stack",
+        _whole(rf"(?:what|which) {_TECH} (?:do|does|did) you (?:use|run on|rely on|run)"),
+        rf"(?:what|which) {_TECH} (?:do|does|did) {_BOT} (?:use|run on|rely on|run)",
+        rf"(?:what|which) {_TECH} (?:are|is|were|was) {_SELF} (?:built|made|developed|created|coded|written|running|based|powered)(?: (?:on|with|in|by))?",
+        rf"(?:what|which) {_TECH} (?:powers|runs|drives) {_SELF}",
+        rf"what (?:powers|runs) {_SELF}",
+        rf"how (?:are|were|was|is) {_SELF} (?:built|made|developed|created|trained|programmed|coded)",
+        rf"what (?:are|were|is|was) {_SELF} (?:built|made|developed|created|coded|written|running) (?:on|with|in)",
+        rf"(?:are|is) {_SELF} (?:using |built on |based on |powered by |running on )?(?:chat(?: )?gpt|gpt(?:(?:-| )?\d[\w.]*)?|open(?: )?ai|eleven(?: )?labs|an? (?:llm|large language model))",
+        r"your (?:tech(?:nology)? stack|architecture|source code|underlying model|language model|ai model|backend|system prompt)",
+    ]),
+    Intent("identity",
+           "I'm Alex, a virtual assistant for Auburn University at Montgomery. "
+           "I can help you with our programs, admissions, and student life.", [
+        _whole(r"who are you(?: exactly| again)?"),
+        r"who am i (?:talking|speaking|chatting) (?:to|with)",
+        r"are you (?:a |an )?(?:real )?(?:person|human|robot|bot|ai|machine|computer)",
+        r"am i (?:talking|speaking|chatting) (?:to|with) (?:a |an )?(?:real )?(?:person|human|robot|bot|ai|machine|computer)",
+        r"what(?:'s| is) your name",
+    ]),
+    Intent("farewell", "Thanks for talking with me. Good luck, and goodbye!", [
+        r"^\W*(?:(?:ok(?:ay)?|alright|thanks|thank you),? )?(?:good(?: )?bye|bye(?: bye)?|see you(?: later)?|that'?s all(?: for now)?|that is all)\W*$",
+    ]),
+]
+
+
+class IntentRouter:
+    """Single-pass matcher over every intent's patterns."""
+
+    def __init__(self, intents: Iterable[Intent]):
+        self.intents = {intent.name: intent for intent in intents}
+        groups = []
+        for intent in self.intents.values():
+            alternation = "|".join(pattern.replace(" ", r"\s+") for pattern in intent.patterns)
+            groups.append(rf"(?P<{intent.name}>(?<!\w)(?:{alternation})(?!\w))")
+        self._pattern = re.compile("|".join(groups), re.IGNORECASE)
+
+    def match(self, text: str) -> Optional[Intent]:
+        """The intent whose pattern matches earliest in ``text``, or None."""
+        found = self._pattern.search(text)
+        return self.intents[found.lastgroup] if found else None
+
+
+# Shared across sessions
+intent_router = IntentRouter(INTENTS)
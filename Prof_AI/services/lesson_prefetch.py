@@ -0,0 +1,172 @@
+"""
+Lesson Prefetch - the next sub-topic prepared while the current one plays
+
+Students almost always move from sub-topic i to i+1, yet every start_class
+began cold: load, generate the teaching script, then start TTS. While a
+sub-topic streams, the class session schedules the one most likely to come
+next; the prefetcher runs the session's prepare coroutine for it in the
+background, which generates the script and synthesizes its opening
+sentences (LESSON_PREFETCH_AUDIO_S of speech). On a hit start_class sends
+that audio at once and synthesizes only the rest of the script live.
+
+Prefetched lessons are held per session within LESSON_PREFETCH_BUDGET_MB.
+Scheduling a new set of lessons cancels or drops the ones no longer wanted
+(the student navigated elsewhere), and hits, misses and wasted prefetches
+are counted so the hit rate can be watched.
+"""
+
+import asyncio
+import logging
+import re
+import sys
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional, Tuple
+
+import config
+from utils.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+# Rough speaking rate and TTS bitrate (128 kbps mp3) used to size the audio head
+SPOKEN_CHARS_PER_S = 15
+AUDIO_BYTES_PER_S = 16_000
+
+_SENTENCE_END = re.compile(r"[.!?](?:\s|$)")
+
+# (course_id, module_index, sub_topic_index, language)
+LessonKey = Tuple[Any, int, int, str]
+
+
+def split_head(text: str, seconds: float) -> Tuple[str, str]:
+    """The whole sentences covering about ``seconds`` of speech, and the rest."""
+    target = int(seconds * SPOKEN_CHARS_PER_S)
+    if len(text) <= target:
+        return text, ""
+    end = _SENTENCE_END.search(text, target)
+    cut = end.end() if end else len(text)
+    return text[:cut], text[cut:]
+
+
+class PrefetchedLesson:
+    __slots__ = ("teaching_content", "head_text", "audio_chunks", "size")
+
+    def __init__(self, teaching_content: str, head_text: str = "", audio_chunks: Optional[List[bytes]] = None):
+        self.teaching_content = teaching_content
+        # Audio covers head_text, the start of teaching_content
+        self.head_text = head_text if audio_chunks else ""
+        self.audio_chunks = audio_chunks or []
+        self.size = sys.getsizeof(teaching_content) + sum(len(chunk) for chunk in self.audio_chunks)
+
+    @property
+    def rest_text(self) -> str:
+        """The part of the script still to be synthesized."""
+        return self.teaching_content[len(self.head_text):]
+
+
+# prepare(key, audio_budget_bytes) -> lesson, or None when there is nothing to prefetch
+Prepare = Callable[[LessonKey, int], Awaitable[Optional[PrefetchedLesson]]]
+
+
+class LessonPrefetcher:
+    """Background preparation of a session's likely next lessons."""
+
+    def __init__(self, prepare: Prepare,
+                 budget_bytes: int = int(config.LESSON_PREFETCH_BUDGET_MB * 1024 * 1024)):
+        self.prepare = prepare
+        self.budget_bytes = budget_bytes
+        self._tasks: Dict[LessonKey, asyncio.Task] = {}
+        self._ready: "OrderedDict[LessonKey, PrefetchedLesson]" = OrderedDict()
+        self._ready_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.joined = 0
+        self.join_timeouts = 0
+        self.wasted = 0
+
+    def _drop(self, key: LessonKey):
+        task = self._tasks.pop(key, None)
+        if task is not None:
+            task.cancel()
+        lesson = self._ready.pop(key, None)
+        if lesson is not None:
+            self._ready_bytes -= lesson.size
+        if task is not None or lesson is not None:
+            self.wasted += 1
+            metrics.inc("lesson_prefetch_wasted")
+
+    def schedule(self, keys: Iterable[LessonKey]):
+        """Prefetch these lessons; anything else prefetched or in flight is dropped."""
+        keys = list(dict.fromkeys(keys))
+        for key in [key for key in list(self._tasks) + list(self._ready) if key not in keys]:
+            self._drop(key)
+        new_keys = [key for key in keys if key not in self._tasks and key not in self._ready]
+        if not new_keys:
+            return
+        audio_budget = max(0, self.budget_bytes - self._ready_bytes) // len(new_keys)
+        audio_budget = min(audio_budget, int(config.LESSON_PREFETCH_AUDIO_S * AUDIO_BYTES_PER_S * 2))
+        for key in new_keys:
+            self._tasks[key] = asyncio.create_task(self._run(key, audio_budget))
+
+    async def _run(self, key: LessonKey, audio_budget: int):
+        try:
+            lesson = await self.prepare(key, audio_budget)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.warning(f"⚠️ Prefetch of {key} failed: {e}")
+            lesson = None
+        finally:
+            if self._tasks.get(key) is asyncio.current_task():
+                del self._tasks[key]
+        if lesson is None:
+            return
+        if self._ready_bytes + lesson.size > self.budget_bytes:
+            self.wasted += 1
+            metrics.inc("lesson_prefetch_wasted")
+            logger.info(f"Prefetched lesson {key} is over the session budget, dropped")
+            return
+        self._ready[key] = lesson
+        self._ready_bytes += lesson.size
+
+    async def take(self, key: LessonKey, timeout: Optional[float] = None) -> Optional[PrefetchedLesson]:
+        """
+        The prefetched lesson for ``key``, or None. A prefetch still in
+        flight is waited for up to ``timeout`` seconds (the caller's own
+        path should be no slower), then dropped as a miss.
+        """
+        task = self._tasks.get(key)
+        if task is not None and key not in self._ready:
+            self.joined += 1
+            # wait(), not await: a cancelled prefetch is a miss, not an error for the caller
+            done, _ = await asyncio.wait({task}, timeout=timeout)
+            if not done:
+                self.join_timeouts += 1
+                metrics.inc("lesson_prefetch_join_timeouts")
+                self._drop(key)
+        lesson = self._ready.pop(key, None)
+        if lesson is None:
+            self.misses += 1
+            metrics.inc("lesson_prefetch_misses")
+            return None
+        self._ready_bytes -= lesson.size
+        self.hits += 1
+        metrics.inc("lesson_prefetch_hits")
+        return lesson
+
+    def cancel_all(self):
+        for key in list(self._tasks) + list(self._ready):
+            self._drop(key)
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else None,
+            "joined_in_flight": self.joined,
+            "join_timeouts": self.join_timeouts,
+            "wasted": self.wasted,
+            "in_flight": len(self._tasks),
+            "ready": len(self._ready),
+            "ready_bytes": self._ready_bytes,
+        }
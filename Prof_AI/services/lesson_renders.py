@@ -0,0 +1,278 @@
+"""
+Lesson Renders - class lessons rendered ahead of time
+
+start_class used to generate the teaching script with the LLM and then
+synthesize it before the first audio chunk could be sent, several seconds
+per sub-topic. The render farm does both offline for every course, module,
+sub-topic and language, and the class server serves the stored result,
+falling back to live generation only on a miss.
+
+Each lesson is three files under LESSON_RENDER_DIR/<course_id>/:
+
+    <module>_<sub_topic>_<language>.txt     teaching script
+    <module>_<sub_topic>_<language>.mp3     synthesized audio
+    <module>_<sub_topic>_<language>.json    sidecar
+
+Every file is written to a temp file and renamed into place, and the sidecar
+last, so a lesson is complete when its sidecar records the audio. The
+sidecar also holds a hash of the sub-topic content the lesson was rendered
+from: editing a course makes its old renders stale instead of wrong. A
+sidecar without audio keeps a rendered script, so a run that failed at the
+TTS step resumes without calling the LLM again.
+"""
+
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import re
+import time
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional
+
+import config
+from services.course_store import CourseStore, course_store
+from utils.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+# Bump when the script prompt or audio format changes to re-render everything
+# (2: scripts and voice from the class server's TeachingService/AudioService)
+RENDER_VERSION = 2
+# Pre-rendered audio is sent in audio_chunk messages of this size
+AUDIO_CHUNK_BYTES = 32 * 1024
+
+_UNSAFE = re.compile(r"[^\w.-]")
+
+
+def content_hash(text: str) -> str:
+    return hashlib.blake2b(text.encode("utf-8"), digest_size=16).hexdigest()
+
+
+class LessonRender:
+    __slots__ = ("script", "audio", "meta")
+
+    def __init__(self, script: str, audio: bytes, meta: Dict[str, Any]):
+        self.script = script
+        self.audio = audio
+        self.meta = meta
+
+    def audio_chunks(self, size: int = AUDIO_CHUNK_BYTES) -> List[bytes]:
+        return [self.audio[i:i + size] for i in range(0, len(self.audio), size)]
+
+
+class LessonRenderStore:
+    """Rendered lessons on disk, keyed by course, module, sub-topic and language."""
+
+    def __init__(self, directory: str = config.LESSON_RENDER_DIR):
+        self.directory = directory
+
+    def _base(self, course_id, module_index: int, sub_topic_index: int, language: str) -> str:
+        return os.path.join(
+            self.directory,
+            _UNSAFE.sub("_", str(course_id)),
+            f"{module_index}_{sub_topic_index}_{_UNSAFE.sub('_', language)}",
+        )
+
+    @staticmethod
+    def _write(path: str, data: bytes):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+
+    def _read_meta(self, base: str, digest: str) -> Optional[Dict[str, Any]]:
+        try:
+            with open(f"{base}.json", "r", encoding="utf-8") as f:
+                meta = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if meta.get("version") != RENDER_VERSION or meta.get("content_hash") != digest:
+            return None
+        return meta
+
+    def _read_script(self, base: str) -> Optional[str]:
+        try:
+            with open(f"{base}.txt", "r", encoding="utf-8") as f:
+                return f.read()
+        except OSError:
+            return None
+
+    def lookup(self, course_id, module_index: int, sub_topic_index: int, language: str,
+               content: str) -> Optional[LessonRender]:
+        """The rendered lesson for this content, or None if missing, partial or stale."""
+        base = self._base(course_id, module_index, sub_topic_index, language)
+        meta = self._read_meta(base, content_hash(content))
+        if meta is None or meta.get("audio_bytes") is None:
+            return None
+        script = self._read_script(base)
+        try:
+            with open(f"{base}.mp3", "rb") as f:
+                audio = f.read()
+        except OSError:
+            return None
+        if script is None or len(audio) != meta["audio_bytes"]:
+            return None
+        return LessonRender(script, audio, meta)
+
+    def lookup_script(self, course_id, module_index: int, sub_topic_index: int, language: str,
+                      content: str) -> Optional[str]:
+        """A script rendered for this content, whether or not its audio was."""
+        base = self._base(course_id, module_index, sub_topic_index, language)
+        if self._read_meta(base, content_hash(content)) is None:
+            return None
+        return self._read_script(base)
+
+    def save(self, course_id, module_index: int, sub_topic_index: int, language: str, content: str,
+             script: str, audio: Optional[bytes] = None, **details):
+        """Store a script (and its audio once synthesized); the sidecar is written last."""
+        base = self._base(course_id, module_index, sub_topic_index, language)
+        self._write(f"{base}.txt", script.encode("utf-8"))
+        if audio is not None:
+            self._write(f"{base}.mp3", audio)
+        meta = {
+            "version": RENDER_VERSION,
+            "course_id": course_id,
+            "module_index": module_index,
+            "sub_topic_index": sub_topic_index,
+            "language": language,
+            "content_hash": content_hash(content),
+            "script_chars": len(script),
+            "audio_bytes": len(audio) if audio is not None else None,
+            "rendered_at": time.time(),
+            **details,
+        }
+        self._write(f"{base}.json", json.dumps(meta, indent=2).encode("utf-8"))
+
+
+class RenderJob:
+    __slots__ = ("course_id", "module_index", "sub_topic_index", "language",
+                 "module_title", "sub_topic_title", "sub_topic")
+
+    def __init__(self, course_id, module_index: int, sub_topic_index: int, language: str,
+                 module_title: str, sub_topic_title: str, sub_topic: dict):
+        self.course_id = course_id
+        self.module_index = module_index
+        self.sub_topic_index = sub_topic_index
+        self.language = language
+        self.module_title = module_title
+        self.sub_topic_title = sub_topic_title
+        self.sub_topic = sub_topic
+
+    @property
+    def label(self) -> str:
+        return f"course {self.course_id} module {self.module_index} sub-topic {self.sub_topic_index} [{self.language}]"
+
+
+# generate_script(module_title, sub_topic_title, content, language) -> script
+ScriptGenerator = Callable[[str, str, str, str], Awaitable[str]]
+# synthesize(script, language) -> audio
+Synthesizer = Callable[[str, str], Awaitable[bytes]]
+
+
+class LessonRenderFarm:
+    """Renders every missing or stale lesson with bounded provider concurrency."""
+
+    def __init__(self, generate_script: ScriptGenerator, synthesize: Synthesizer,
+                 store: Optional[LessonRenderStore] = None, courses: CourseStore = course_store,
+                 llm_concurrency: int = config.LESSON_RENDER_LLM_CONCURRENCY,
+                 tts_concurrency: int = config.LESSON_RENDER_TTS_CONCURRENCY,
+                 retries: int = config.LESSON_RENDER_RETRIES, retry_delay_s: float = 2.0,
+                 details: Optional[Dict[str, Any]] = None):
+        self.generate_script = generate_script
+        self.synthesize = synthesize
+        self.store = store or LessonRenderStore()
+        self.courses = courses
+        self.llm_concurrency = llm_concurrency
+        self.tts_concurrency = tts_concurrency
+        self.retries = retries
+        self.retry_delay_s = retry_delay_s
+        # Recorded in every sidecar (provider, voice, model)
+        self.details = details or {}
+
+    def plan(self, languages: Iterable[str], course_ids: Optional[Iterable] = None) -> List[RenderJob]:
+        """Every sub-topic of the selected courses (all by default), in each language."""
+        wanted = {str(course_id) for course_id in course_ids} if course_ids is not None else None
+        jobs = []
+        for summary in self.courses.list_courses():
+            if wanted is not None and str(summary["course_id"]) not in wanted:
+                continue
+            outline = self.courses.get_outline(summary["course_id"]) or {}
+            for module_index, module in enumerate(outline.get("modules", [])):
+                if not isinstance(module, dict):
+                    continue
+                for sub_topic_index, sub_topic in enumerate(module.get("sub_topics", [])):
+                    if not isinstance(sub_topic, dict):
+                        continue
+                    for language in languages:
+                        jobs.append(RenderJob(
+                            summary["course_id"], module_index, sub_topic_index, language,
+                            module.get("title", ""), sub_topic.get("title", ""), sub_topic,
+                        ))
+        return jobs
+
+    async def _attempt(self, step: str, job: RenderJob, call: Callable[[], Awaitable[Any]]):
+        for attempt in range(1, self.retries + 1):
+            try:
+                result = await call()
+                if not result:
+                    raise ValueError(f"empty {step}")
+                return result
+            except Exception as e:
+                if attempt == self.retries:
+                    raise
+                delay = self.retry_delay_s * 2 ** (attempt - 1)
+                logger.warning(f"⚠️ {step} failed for {job.label} (attempt {attempt}): {e}; retrying in {delay:.0f}s")
+                await asyncio.sleep(delay)
+
+    async def _render(self, job: RenderJob, llm_slots: asyncio.Semaphore, tts_slots: asyncio.Semaphore,
+                      force: bool, report: Dict[str, Any]):
+        key = (job.course_id, job.module_index, job.sub_topic_index, job.language)
+        try:
+            content = await asyncio.to_thread(self.courses.load_content, job.sub_topic)
+            if not content:
+                content = f"This topic covers {job.sub_topic_title} as part of {job.module_title}."
+            if not force and await asyncio.to_thread(self.store.lookup, *key, content) is not None:
+                report["skipped"] += 1
+                return
+            script = None if force else await asyncio.to_thread(self.store.lookup_script, *key, content)
+            if script is None:
+                async with llm_slots:
+                    script = await self._attempt("script", job, lambda: self.generate_script(
+                        job.module_title, job.sub_topic_title, content, job.language))
+                await asyncio.to_thread(self.store.save, *key, content, script, None, **self.details)
+                report["scripts"] += 1
+            async with tts_slots:
+                audio = await self._attempt("audio", job, lambda: self.synthesize(script, job.language))
+            await asyncio.to_thread(self.store.save, *key, content, script, audio, **self.details)
+            report["rendered"] += 1
+            metrics.inc("lesson_renders")
+            logger.info(f"✅ Rendered {job.label}: {len(script)} chars, {len(audio)} bytes")
+        except Exception as e:
+            report["failed"].append({"job": job.label, "error": str(e)})
+            metrics.inc("lesson_render_failures")
+            logger.error(f"❌ Could not render {job.label}: {e}")
+
+    async def run(self, languages: Iterable[str], course_ids: Optional[Iterable] = None,
+                  force: bool = False) -> Dict[str, Any]:
+        """Render what is missing; failures are reported and retried by the next run."""
+        started = time.perf_counter()
+        jobs = await asyncio.to_thread(self.plan, list(languages), course_ids)
+        llm_slots = asyncio.Semaphore(self.llm_concurrency)
+        tts_slots = asyncio.Semaphore(self.tts_concurrency)
+        report: Dict[str, Any] = {"lessons": len(jobs), "skipped": 0, "scripts": 0, "rendered": 0, "failed": []}
+        pending = iter(jobs)
+
+        async def worker():
+            for job in pending:
+                await self._render(job, llm_slots, tts_slots, force, report)
+
+        # Enough workers to keep both providers busy; only they hold content in memory
+        await asyncio.gather(*(worker() for _ in range(self.llm_concurrency + self.tts_concurrency)))
+        report["elapsed_s"] = round(time.perf_counter() - started, 2)
+        return report
+
+
+# Read by the class server
+lesson_renders = LessonRenderStore()
@@ -0,0 +1,75 @@
+"""
+Near Duplicates - shingled MinHash for spotting near-identical course text
+
+Each text is reduced to a bottom-k MinHash sketch: the k smallest hashes of
+its word shingles. Two sketches estimate the Jaccard similarity of the
+shingle sets, and an inverted index from sketch hashes to texts finds
+candidates without comparing against every stored text.
+
+Used by the course store when saving a course: a sub-topic whose content is
+nearly identical to stored content (a re-uploaded PDF under a new title,
+a regenerated course) is stored as a delta against it.
+"""
+
+import heapq
+import re
+import zlib
+from collections import Counter
+from typing import Dict, Generic, Hashable, List, Optional, Tuple, TypeVar
+
+SHINGLE_WORDS = 5
+SKETCH_SIZE = 64
+# Only the best few candidates (by shared sketch hashes) are scored exactly
+_MAX_CANDIDATES = 4
+
+_WORD = re.compile(r"\w+")
+
+Key = TypeVar("Key", bound=Hashable)
+
+
+def sketch(text: str) -> Tuple[int, ...]:
+    """Bottom-k MinHash sketch of the text's word shingles."""
+    words = _WORD.findall(text.lower())
+    if len(words) <= SHINGLE_WORDS:
+        shingles = {" ".join(words)}
+    else:
+        shingles = {" ".join(words[i:i + SHINGLE_WORDS]) for i in range(len(words) - SHINGLE_WORDS + 1)}
+    return tuple(heapq.nsmallest(SKETCH_SIZE, {zlib.crc32(s.encode("utf-8")) for s in shingles}))
+
+
+def similarity(a: Tuple[int, ...], b: Tuple[int, ...]) -> float:
+    """Estimated Jaccard similarity of the texts behind two sketches."""
+    if not a or not b:
+        return 0.0
+    union = heapq.nsmallest(SKETCH_SIZE, set(a) | set(b))
+    shared = set(a) & set(b)
+    return sum(1 for h in union if h in shared) / len(union)
+
+
+class NearDuplicateIndex(Generic[Key]):
+    """Sketches of stored texts, queried for the most similar one."""
+
+    def __init__(self, threshold: float):
+        self.threshold = threshold
+        self._sketches: Dict[Key, Tuple[int, ...]] = {}
+        self._postings: Dict[int, List[Key]] = {}
+
+    def __len__(self) -> int:
+        return len(self._sketches)
+
+    def add(self, key: Key, text_sketch: Tuple[int, ...]):
+        if key in self._sketches:
+            return
+        self._sketches[key] = text_sketch
+        for h in text_sketch:
+            self._postings.setdefault(h, []).append(key)
+
+    def find(self, text_sketch: Tuple[int, ...]) -> Optional[Tuple[Key, float]]:
+        """The stored text most similar to ``text_sketch``, if at least the threshold."""
+        shared = Counter(key for h in text_sketch for key in self._postings.get(h, ()))
+        best = None
+        for key, _ in shared.most_common(_MAX_CANDIDATES):
+            score = similarity(text_sketch, self._sketches[key])
+            if score >= self.threshold and (best is None or score > best[1]):
+                best = (key, score)
+        return best
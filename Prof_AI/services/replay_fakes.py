@@ -0,0 +1,153 @@
+"""
+Offline provider fakes driven by a session recording
+
+ReplaySTTService and ReplayVoiceService stand in for Deepgram and
+ElevenLabsDirectService when a recorded session is replayed. They emit the
+recorded STT events, LLM text and TTS byte timeline at the recorded offsets
+(divided by the replay speed), so the server's own turn handling, barge-in
+and queuing are exercised with real caller timing and no network calls.
+"""
+
+import asyncio
+import logging
+import time
+from typing import AsyncGenerator, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Upper bound for waits on recorded steps that never finished (e.g. a turn
+# cancelled mid-stream); the replayed barge-in normally cancels them first.
+_MAX_OPEN_WAIT_S = 30.0
+
+
+class ReplayClock:
+    """Shared replay timeline; offsets are recording seconds."""
+
+    def __init__(self, speed: float = 1.0):
+        self.speed = speed
+        self._started: Optional[float] = None
+
+    def start(self):
+        self._started = time.monotonic()
+
+    def offset(self) -> float:
+        """Current position on the recording timeline."""
+        if self._started is None:
+            return 0.0
+        return (time.monotonic() - self._started) * self.speed
+
+    async def sleep_until(self, offset: float):
+        delay = (offset - self.offset()) / self.speed
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+    async def sleep(self, seconds: float):
+        await asyncio.sleep(max(0.0, seconds) / self.speed)
+
+
+class ReplaySTTService:
+    """Emits recorded STT events; inbound audio is only counted."""
+
+    def __init__(self, events: List[Tuple[float, dict]], clock: ReplayClock,
+                 sample_rate: int = 16000, language_hint: Optional[str] = None):
+        self.events = events
+        self.clock = clock
+        self.sample_rate = sample_rate
+        self.language = language_hint or "en-US"
+        self.bytes_received = 0
+        self._queue: asyncio.Queue = asyncio.Queue()
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def enabled(self) -> bool:
+        return True
+
+    async def start(self) -> bool:
+        self._task = asyncio.create_task(self._emit())
+        return True
+
+    async def _emit(self):
+        # A restarted (resumed) STT session picks up at the current position
+        start = self.clock.offset()
+        try:
+            for offset, event in self.events:
+                if offset < start:
+                    continue
+                await self.clock.sleep_until(offset)
+                await self._queue.put(event)
+        finally:
+            self._queue.put_nowait({"type": "closed"})
+
+    async def recv(self) -> AsyncGenerator[dict, None]:
+        while True:
+            event = await self._queue.get()
+            if event.get("type") == "closed":
+                break
+            yield event
+
+    async def send_audio_chunk(self, pcm16_bytes: bytes):
+        self.bytes_received += len(pcm16_bytes)
+
+    async def close(self):
+        if self._task is not None and not self._task.done():
+            self._task.cancel()
+        self._queue.put_nowait({"type": "closed"})
+
+
+class ReplayVoiceService:
+    """Plays back recorded LLM replies and TTS byte timings turn by turn."""
+
+    def __init__(self, turns: List[dict], clock: ReplayClock):
+        self.turns = turns
+        self.clock = clock
+        self.conversation_history = []
+        self._next_turn = 0
+        self._current: Optional[dict] = None
+
+    def _take_turn(self, text: str) -> Optional[dict]:
+        if self._next_turn >= len(self.turns):
+            logger.warning(f"⚠️ Replay has no recorded turn left for '{text}'")
+            return None
+        turn = self.turns[self._next_turn]
+        self._next_turn += 1
+        if turn.get("text") != text:
+            logger.debug(f"Replay turn text differs: recorded '{turn.get('text')}', got '{text}'")
+        return turn
+
+    async def get_llm_response_stream(self, user_message: str) -> AsyncGenerator[str, None]:
+        self._current = self._take_turn(user_message)
+        llm = (self._current or {}).get("llm")
+        if not llm:
+            # Cancelled before the first token when recorded
+            await asyncio.sleep(_MAX_OPEN_WAIT_S)
+            return
+        await self.clock.sleep(llm["first_token_s"])
+        yield llm["text"]
+        if llm.get("total_s") is None:
+            await asyncio.sleep(_MAX_OPEN_WAIT_S)
+            return
+        await self.clock.sleep(llm["total_s"] - llm["first_token_s"])
+
+    async def get_llm_response(self, user_message: str) -> str:
+        return "".join([delta async for delta in self.get_llm_response_stream(user_message)])
+
+    async def text_to_speech_stream(self, text: str) -> AsyncGenerator[bytes, None]:
+        timeline = (self._current or {}).get("tts") or []
+        started = time.monotonic()
+        for offset, nbytes in timeline:
+            delay = offset / self.clock.speed - (time.monotonic() - started)
+            if delay > 0:
+                await asyncio.sleep(delay)
+            yield b"\x00" * int(nbytes)
+
+    async def text_to_speech(self, text: str, canned_fallback: bool = True) -> bytes:
+        return b"\x00" * 1024
+
+    async def transcribe_audio(self, audio_data: bytes, language: str = "en", sample_rate: int = 16000) -> str:
+        return ""
+
+    def clear_history(self):
+        self.conversation_history = []
+
+    async def disconnect(self):
+        pass
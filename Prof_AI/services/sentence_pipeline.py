@@ -0,0 +1,92 @@
+"""
+Sentence Pipeline - streamed text to ordered audio, one sentence at a time
+
+start_class used to wait for the whole teaching script before starting TTS,
+so the first audio came after "LLM done + TTS first byte". Here the LLM
+stream is cut into sentences as it arrives (iter_sentences), and each
+sentence is synthesized as soon as it is complete (ordered_synthesis): a
+few sentences are synthesized ahead while the current one plays, and audio
+is delivered strictly in script order. The first audio now follows the
+first sentence instead of the whole script.
+"""
+
+import asyncio
+import logging
+import re
+from typing import AsyncIterator, Callable, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Sentence end (punctuation then whitespace) or a paragraph break
+_BOUNDARY = re.compile(r"(?<=[.!?])\s+|\n\s*\n\s*")
+
+
+async def iter_sentences(chunks: AsyncIterator[str]) -> AsyncIterator[Tuple[str, bool]]:
+    """(sentence, ends_paragraph) for each complete sentence of the streamed text."""
+    buffer = ""
+    async for chunk in chunks:
+        buffer += chunk
+        start = 0
+        for match in _BOUNDARY.finditer(buffer):
+            if match.end() == len(buffer):
+                # Trailing whitespace may still grow into a paragraph break
+                break
+            sentence = buffer[start:match.start()].strip()
+            if sentence:
+                yield sentence, match.group().count("\n") >= 2
+            start = match.end()
+        buffer = buffer[start:]
+    sentence = buffer.strip()
+    if sentence:
+        yield sentence, False
+
+
+async def ordered_synthesis(segments: AsyncIterator[str],
+                            synthesize: Callable[[str], AsyncIterator[bytes]],
+                            lookahead: int = 2) -> AsyncIterator[bytes]:
+    """Audio of each segment in order; up to ``lookahead`` segments are synthesized ahead."""
+    slots = asyncio.Semaphore(max(1, lookahead))
+    outputs: "asyncio.Queue[Optional[asyncio.Queue]]" = asyncio.Queue()
+    tasks = []
+
+    async def synth(segment: str, out: asyncio.Queue):
+        try:
+            async for chunk in synthesize(segment):
+                if chunk:
+                    await out.put(chunk)
+        except Exception as e:
+            await out.put(e)
+        finally:
+            await out.put(None)
+
+    async def feed():
+        try:
+            async for segment in segments:
+                # Released by the consumer once it has played the segment, bounding buffered audio
+                await slots.acquire()
+                out: asyncio.Queue = asyncio.Queue()
+                tasks.append(asyncio.create_task(synth(segment, out)))
+                await outputs.put(out)
+        finally:
+            await outputs.put(None)
+
+    feeder = asyncio.create_task(feed())
+    try:
+        while True:
+            out = await outputs.get()
+            if out is None:
+                break
+            while True:
+                item = await out.get()
+                if item is None:
+                    break
+                if isinstance(item, Exception):
+                    raise item
+                yield item
+            slots.release()
+        # Surface an error from the text stream after everything before it was played
+        await feeder
+    finally:
+        feeder.cancel()
+        for task in tasks:
+            task.cancel()
@@ -0,0 +1,271 @@
+"""
+Session-state backends - where parked sessions live between connections
+
+All backends store opaque serialized session blobs under a resume token with
+a TTL, and ``take`` is atomic (get + delete) so a session can only be resumed
+once, on one node.
+
+- MemoryBackend: in-process dict; sessions survive reconnects to this node only.
+- SQLiteBackend: a file on local or shared disk; survives process restarts and
+  can be shared by nodes on the same host.
+- TCPBackend: client for SessionStateServer, a small stand-in for a shared
+  store (Redis-like) that several nodes can use at once.
+
+Select one with SESSION_BACKEND (memory | sqlite | tcp).
+"""
+
+import abc
+import asyncio
+import json
+import logging
+import sqlite3
+import struct
+import threading
+import time
+from typing import Dict, Optional, Tuple
+
+import config
+
+logger = logging.getLogger(__name__)
+
+
+class SessionBackend(abc.ABC):
+    """Interface for session-state storage."""
+
+    @abc.abstractmethod
+    async def put(self, token: str, blob: bytes, ttl: float):
+        ...
+
+    @abc.abstractmethod
+    async def take(self, token: str) -> Optional[bytes]:
+        """Atomically fetch and remove a session. None if missing or expired."""
+
+    @abc.abstractmethod
+    async def delete(self, token: str):
+        ...
+
+    @abc.abstractmethod
+    async def count(self) -> int:
+        ...
+
+    async def close(self):
+        pass
+
+
+class MemoryBackend(SessionBackend):
+    """Process-local store."""
+
+    def __init__(self):
+        self._items: Dict[str, Tuple[float, bytes]] = {}
+
+    def _purge(self, now: float):
+        for token in [t for t, (expires, _) in self._items.items() if expires <= now]:
+            del self._items[token]
+
+    async def put(self, token: str, blob: bytes, ttl: float):
+        now = time.time()
+        self._purge(now)
+        self._items[token] = (now + ttl, blob)
+
+    async def take(self, token: str) -> Optional[bytes]:
+        item = self._items.pop(token, None)
+        if item is None or item[0] <= time.time():
+            return None
+        return item[1]
+
+    async def delete(self, token: str):
+        self._items.pop(token, None)
+
+    async def count(self) -> int:
+        self._purge(time.time())
+        return len(self._items)
+
+
+class SQLiteBackend(SessionBackend):
+    """SQLite file store; queries run in a worker thread."""
+
+    def __init__(self, path: str = config.SESSION_SQLITE_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None, timeout=5.0)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS sessions (token TEXT PRIMARY KEY, blob BLOB NOT NULL, expires_at REAL NOT NULL)"
+        )
+
+    def _put(self, token: str, blob: bytes, ttl: float):
+        now = time.time()
+        with self._lock:
+            self._conn.execute("DELETE FROM sessions WHERE expires_at <= ?", (now,))
+            self._conn.execute(
+                "INSERT OR REPLACE INTO sessions (token, blob, expires_at) VALUES (?, ?, ?)",
+                (token, sqlite3.Binary(blob), now + ttl),
+            )
+
+    def _take(self, token: str) -> Optional[bytes]:
+        with self._lock:
+            # IMMEDIATE takes the write lock up front, so two nodes can't both claim
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = self._conn.execute(
+                    "SELECT blob, expires_at FROM sessions WHERE token = ?", (token,)
+                ).fetchone()
+                if row is not None:
+                    self._conn.execute("DELETE FROM sessions WHERE token = ?", (token,))
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        if row is None or row[1] <= time.time():
+            return None
+        return bytes(row[0])
+
+    def _delete(self, token: str):
+        with self._lock:
+            self._conn.execute("DELETE FROM sessions WHERE token = ?", (token,))
+
+    def _count(self) -> int:
+        with self._lock:
+            return self._conn.execute(
+                "SELECT COUNT(*) FROM sessions WHERE expires_at > ?", (time.time(),)
+            ).fetchone()[0]
+
+    async def put(self, token: str, blob: bytes, ttl: float):
+        await asyncio.to_thread(self._put, token, blob, ttl)
+
+    async def take(self, token: str) -> Optional[bytes]:
+        return await asyncio.to_thread(self._take, token)
+
+    async def delete(self, token: str):
+        await asyncio.to_thread(self._delete, token)
+
+    async def count(self) -> int:
+        return await asyncio.to_thread(self._count)
+
+    async def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+# --- TCP stand-in for a shared store ---
+#
+# Frame: <I header_len> <header JSON> <I blob_len> <blob>
+# Requests: {"op": "put"|"take"|"delete"|"count", "token": ..., "ttl": ...}
+# Responses: {"ok": true, "found": bool, "count": int} plus an optional blob
+
+_LEN = struct.Struct("<I")
+
+
+async def _write_frame(writer: asyncio.StreamWriter, header: dict, blob: bytes = b""):
+    raw = json.dumps(header, separators=(",", ":")).encode("utf-8")
+    writer.write(_LEN.pack(len(raw)) + raw + _LEN.pack(len(blob)) + blob)
+    await writer.drain()
+
+
+async def _read_frame(reader: asyncio.StreamReader) -> Tuple[dict, bytes]:
+    (header_len,) = _LEN.unpack(await reader.readexactly(_LEN.size))
+    header = json.loads(await reader.readexactly(header_len))
+    (blob_len,) = _LEN.unpack(await reader.readexactly(_LEN.size))
+    blob = await reader.readexactly(blob_len) if blob_len else b""
+    return header, blob
+
+
+class SessionStateServer:
+    """Serves a MemoryBackend over TCP so several voice nodes can share it."""
+
+    def __init__(self, host: str = config.SESSION_TCP_HOST, port: int = config.SESSION_TCP_PORT):
+        self.host = host
+        self.port = port
+        self.backend = MemoryBackend()
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            while True:
+                request, blob = await _read_frame(reader)
+                op, token = request.get("op"), request.get("token", "")
+                if op == "put":
+                    await self.backend.put(token, blob, float(request.get("ttl", config.SESSION_RESUME_TTL_S)))
+                    await _write_frame(writer, {"ok": True})
+                elif op == "take":
+                    found = await self.backend.take(token)
+                    await _write_frame(writer, {"ok": True, "found": found is not None}, found or b"")
+                elif op == "delete":
+                    await self.backend.delete(token)
+                    await _write_frame(writer, {"ok": True})
+                elif op == "count":
+                    await _write_frame(writer, {"ok": True, "count": await self.backend.count()})
+                else:
+                    await _write_frame(writer, {"ok": False, "error": f"unknown op {op}"})
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+    async def serve_forever(self):
+        server = await asyncio.start_server(self._handle, self.host, self.port)
+        logger.info(f"🗄️ Session state server listening on {self.host}:{self.port}")
+        async with server:
+            await server.serve_forever()
+
+
+class TCPBackend(SessionBackend):
+    """Client for SessionStateServer; one pipelined connection, requests serialized."""
+
+    def __init__(self, host: str = config.SESSION_TCP_HOST, port: int = config.SESSION_TCP_PORT,
+                 timeout: float = 2.0):
+        self.host = host
+        self.port = port
+        self.timeout = timeout
+        self._reader: Optional[asyncio.StreamReader] = None
+        self._writer: Optional[asyncio.StreamWriter] = None
+        self._lock = asyncio.Lock()
+
+    async def _request(self, header: dict, blob: bytes = b"") -> Tuple[dict, bytes]:
+        async with self._lock:
+            for attempt in range(2):
+                try:
+                    if self._writer is None:
+                        self._reader, self._writer = await asyncio.wait_for(
+                            asyncio.open_connection(self.host, self.port), timeout=self.timeout
+                        )
+                    await _write_frame(self._writer, header, blob)
+                    return await asyncio.wait_for(_read_frame(self._reader), timeout=self.timeout)
+                except (ConnectionError, asyncio.IncompleteReadError, asyncio.TimeoutError):
+                    # Reconnect once; the state server may have restarted
+                    await self._reset()
+                    if attempt:
+                        raise
+
+    async def _reset(self):
+        writer, self._reader, self._writer = self._writer, None, None
+        if writer is not None:
+            writer.close()
+
+    async def put(self, token: str, blob: bytes, ttl: float):
+        await self._request({"op": "put", "token": token, "ttl": ttl}, blob)
+
+    async def take(self, token: str) -> Optional[bytes]:
+        response, blob = await self._request({"op": "take", "token": token})
+        return blob if response.get("found") else None
+
+    async def delete(self, token: str):
+        await self._request({"op": "delete", "token": token})
+
+    async def count(self) -> int:
+        response, _ = await self._request({"op": "count"})
+        return int(response.get("count", 0))
+
+    async def close(self):
+        await self._reset()
+
+
+def create_backend(kind: Optional[str] = None) -> SessionBackend:
+    """Build the backend named by ``kind`` (defaults to config.SESSION_BACKEND)."""
+    kind = (kind or config.SESSION_BACKEND).lower()
+    if kind == "sqlite":
+        return SQLiteBackend()
+    if kind == "tcp":
+        return TCPBackend()
+    if kind != "memory":
+        logger.warning(f"⚠️ Unknown SESSION_BACKEND '{kind}', using memory")
+    return MemoryBackend()
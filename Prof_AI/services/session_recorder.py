@@ -0,0 +1,152 @@
+"""
+Session Recorder - capture a live voice session for offline replay
+
+A session file is an 8-byte magic header followed by a zlib stream of records:
+
+    <B kind> <d offset_s> <I length> <payload>
+
+``offset_s`` is seconds since the recording started. Record kinds:
+
+- META      JSON: sample rate, language, wall-clock start
+- AUDIO_IN  raw inbound PCM16 frame, exactly as the client sent it
+- STT_EVENT JSON: one event from the STT service (speech_started, final, ...)
+- TURN      JSON: user text, LLM text with first-token/total timings, and the
+            TTS byte timeline as [[offset_s, nbytes], ...] (audio not stored)
+
+Compression and file writes run on a single background writer thread so the
+event loop never touches the disk.
+"""
+
+import json
+import logging
+import os
+import struct
+import threading
+import time
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterator, List, NamedTuple, Optional
+
+import config
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b"AUMSESS1"
+
+META = 1
+AUDIO_IN = 2
+STT_EVENT = 3
+TURN = 4
+
+_HEADER = struct.Struct("<BdI")
+_FLUSH_BYTES = 64 * 1024
+
+# One writer thread for all recordings keeps per-file writes in order
+_writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="session-recorder")
+
+
+class Record(NamedTuple):
+    kind: int
+    offset: float
+    payload: bytes
+
+    def json(self):
+        return json.loads(self.payload.decode("utf-8"))
+
+
+class SessionRecorder:
+    """Append-only recorder for one client session."""
+
+    def __init__(self, path: str, sample_rate: int = 16000, language: str = "en"):
+        self.path = path
+        self.started = time.monotonic()
+        self.bytes_in = 0
+        self._buffer = bytearray()
+        self._compressor = zlib.compressobj(6)
+        self._lock = threading.Lock()
+        self._closed = False
+        self._file = None
+        self.meta(sample_rate=sample_rate, language=language, started_at=time.time())
+
+    @classmethod
+    def for_client(cls, client_id, **kwargs) -> "SessionRecorder":
+        name = f"{time.strftime('%Y%m%d-%H%M%S')}-{client_id}.aumrec"
+        return cls(os.path.join(config.SESSION_RECORDING_DIR, name), **kwargs)
+
+    def offset(self) -> float:
+        return time.monotonic() - self.started
+
+    # --- Record types ---
+
+    def meta(self, **fields):
+        """Session parameters; a later META (e.g. on stt_stream_start) supersedes earlier ones."""
+        self._append(META, json.dumps(fields).encode("utf-8"))
+
+    def audio_in(self, pcm16_bytes: bytes):
+        self.bytes_in += len(pcm16_bytes)
+        self._append(AUDIO_IN, pcm16_bytes)
+
+    def stt_event(self, event: dict):
+        self._append(STT_EVENT, json.dumps(event, separators=(",", ":")).encode("utf-8"))
+
+    def turn(self, started_offset: float, text: str, llm: Optional[dict], tts: List[List[float]], cancelled: bool):
+        self._append(TURN, json.dumps({
+            "text": text,
+            "llm": llm,
+            "tts": tts,
+            "cancelled": cancelled,
+        }, separators=(",", ":")).encode("utf-8"), offset=started_offset)
+
+    # --- Writing ---
+
+    def _append(self, kind: int, payload: bytes, offset: Optional[float] = None):
+        if self._closed:
+            return
+        header = _HEADER.pack(kind, self.offset() if offset is None else offset, len(payload))
+        self._buffer += header
+        self._buffer += payload
+        if len(self._buffer) >= _FLUSH_BYTES:
+            self._submit(bytes(self._buffer), final=False)
+            self._buffer.clear()
+
+    def _submit(self, raw: bytes, final: bool):
+        return _writer.submit(self._write, raw, final)
+
+    def _write(self, raw: bytes, final: bool):
+        with self._lock:
+            if self._file is None:
+                os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+                self._file = open(self.path, "wb")
+                self._file.write(MAGIC)
+            data = self._compressor.compress(raw)
+            if final:
+                data += self._compressor.flush()
+            if data:
+                self._file.write(data)
+            if final:
+                self._file.close()
+
+    def close(self):
+        """Flush remaining records and close the file. Returns the writer future."""
+        if self._closed:
+            return None
+        self._closed = True
+        future = self._submit(bytes(self._buffer), final=True)
+        self._buffer.clear()
+        logger.info(f"📼 Session recording saved: {self.path}")
+        return future
+
+
+def read_session(path: str) -> Iterator[Record]:
+    """Yield the records of a session file in order."""
+    with open(path, "rb") as f:
+        if f.read(len(MAGIC)) != MAGIC:
+            raise ValueError(f"{path} is not a session recording")
+        # decompressobj tolerates a stream truncated by a crash
+        data = zlib.decompressobj().decompress(f.read())
+    pos = 0
+    while pos + _HEADER.size <= len(data):
+        kind, offset, length = _HEADER.unpack_from(data, pos)
+        pos += _HEADER.size
+        yield Record(kind, offset, data[pos:pos + length])
+        pos += length
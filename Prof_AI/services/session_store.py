@@ -0,0 +1,167 @@
+"""
+Session Store - parks disconnected sessions so a reconnect can resume them
+
+When a client's WebSocket drops, its portable state (compressed conversation
+history, language, STT config) is serialized into the configured session
+backend under the client's resume token. A reconnect presenting the token
+within SESSION_RESUME_TTL_S claims it back - on this node or, with a shared
+backend, on any node: no greeting, history restored, STT restarted with the
+saved config.
+
+The provider service itself (warm HTTP connections) cannot leave the process;
+it is kept in a local cache for the same TTL and reused when the reconnect
+lands on this node again.
+"""
+
+import json
+import logging
+import secrets
+import struct
+import time
+from typing import Dict, List, Optional
+
+import config
+from services.session_backends import SessionBackend, create_backend
+from utils.history_codec import decode_history, encode_history
+from utils.metrics import metrics
+from utils.timing_wheel import TimingWheel
+
+logger = logging.getLogger(__name__)
+
+_SNAPSHOT_VERSION = 1
+_SNAPSHOT_HEADER = struct.Struct("<BI")
+
+
+def new_resume_token() -> str:
+    return secrets.token_urlsafe(24)
+
+
+class ParkedSession:
+    """State kept for a disconnected session while it can still be resumed."""
+
+    __slots__ = ("language", "stt_config", "stt_suspended", "history_blob", "parked_at", "node", "service")
+
+    def __init__(self, language: str, stt_config: Optional[dict], stt_suspended: bool,
+                 history_blob: Optional[bytes], parked_at: Optional[float] = None,
+                 node: str = config.NODE_ID, service=None):
+        self.language = language
+        self.stt_config = stt_config
+        self.stt_suspended = stt_suspended
+        self.history_blob = history_blob
+        self.parked_at = time.time() if parked_at is None else parked_at
+        self.node = node
+        # Local only: the warm provider service, if the session was parked here
+        self.service = service
+
+    @classmethod
+    def capture(cls, service, language: str, stt_config: Optional[dict], stt_suspended: bool) -> "ParkedSession":
+        """Snapshot a live session; the service's history is moved into the snapshot."""
+        history: List[dict] = service.conversation_history
+        blob = encode_history(history) if history else None
+        service.conversation_history = []
+        return cls(language, stt_config, stt_suspended, blob, service=service)
+
+    def restore_history(self, service):
+        if self.history_blob is not None:
+            service.conversation_history = decode_history(self.history_blob) + service.conversation_history
+            self.history_blob = None
+
+    # --- Serialization: <B version> <I meta_len> <meta JSON> <history zlib blob> ---
+
+    def to_bytes(self) -> bytes:
+        meta = json.dumps({
+            "language": self.language,
+            "stt_config": self.stt_config,
+            "stt_suspended": self.stt_suspended,
+            "parked_at": self.parked_at,
+            "node": self.node,
+        }, separators=(",", ":")).encode("utf-8")
+        return _SNAPSHOT_HEADER.pack(_SNAPSHOT_VERSION, len(meta)) + meta + (self.history_blob or b"")
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "ParkedSession":
+        version, meta_len = _SNAPSHOT_HEADER.unpack_from(data)
+        if version != _SNAPSHOT_VERSION:
+            raise ValueError(f"Unsupported session snapshot version {version}")
+        start = _SNAPSHOT_HEADER.size
+        meta = json.loads(data[start:start + meta_len])
+        history_blob = data[start + meta_len:] or None
+        return cls(meta["language"], meta["stt_config"], meta["stt_suspended"], history_blob,
+                   parked_at=meta["parked_at"], node=meta.get("node", ""))
+
+
+class SessionStore:
+    """Parks sessions in a (possibly shared) backend and caches warm services locally."""
+
+    def __init__(self, backend: Optional[SessionBackend] = None,
+                 ttl: float = config.SESSION_RESUME_TTL_S, tick: float = config.IDLE_TICK_S):
+        self.backend = backend or create_backend()
+        self.ttl = ttl
+        self.wheel = TimingWheel(tick=tick)
+        self._services: Dict[str, object] = {}
+
+    @property
+    def local_count(self) -> int:
+        """Sessions parked with a warm service in this process."""
+        return len(self._services)
+
+    def start(self):
+        self.wheel.start()
+
+    def stop(self):
+        self.wheel.stop()
+
+    async def close(self):
+        self.stop()
+        for token in list(self._services):
+            await self._expire_service(token)
+        await self.backend.close()
+
+    async def park(self, token: str, session: ParkedSession):
+        blob = session.to_bytes()
+        await self.backend.put(token, blob, self.ttl)
+        if session.service is not None:
+            self._services[token] = session.service
+            self.wheel.schedule(token, self.ttl, lambda: self._expire_service(token))
+        metrics.inc("sessions_parked")
+        metrics.observe("session_snapshot_bytes", len(blob))
+        metrics.set_gauge("sessions_parked_local", len(self._services))
+
+    async def claim(self, token: str) -> Optional[ParkedSession]:
+        """Take a parked session back. Returns None if the token is unknown or expired."""
+        service = self._services.pop(token, None)
+        self.wheel.cancel(token)
+        metrics.set_gauge("sessions_parked_local", len(self._services))
+        try:
+            blob = await self.backend.take(token)
+        except Exception as e:
+            logger.error(f"❌ Session backend unavailable, cannot resume: {e}")
+            metrics.inc("session_backend_errors")
+            blob = None
+        if blob is None:
+            metrics.inc("resume_token_misses")
+            if service is not None:
+                await self._disconnect(service)
+            return None
+
+        session = ParkedSession.from_bytes(blob)
+        session.service = service
+        metrics.inc("sessions_resumed")
+        if service is None:
+            metrics.inc("sessions_resumed_remote")
+        metrics.observe("session_resume_gap_ms", max(0.0, time.time() - session.parked_at) * 1000)
+        return session
+
+    async def _expire_service(self, token: str):
+        service = self._services.pop(token, None)
+        metrics.set_gauge("sessions_parked_local", len(self._services))
+        if service is not None:
+            metrics.inc("sessions_resume_expired")
+            await self._disconnect(service)
+
+    @staticmethod
+    async def _disconnect(service):
+        try:
+            await service.disconnect()
+        except Exception as e:
+            logger.debug(f"Error disconnecting parked session: {e}")
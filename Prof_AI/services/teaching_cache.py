@@ -0,0 +1,240 @@
+"""
+Teaching Cache - generated teaching scripts shared across sessions and restarts
+
+A teaching script depends only on the prompt (module, sub-topic, content and
+language), the model and the prompt version, yet TeachingService called the
+LLM for every start_class. Scripts are stored in SQLite under a hash of those
+inputs, so a lesson is generated once per content change:
+
+- Single flight: concurrent requests for a script that is being generated
+  follow that generation instead of starting their own. Followers of a
+  streamed generation receive its chunks as they arrive, and the generation
+  runs as its own task, so a caller that times out still leaves a cached
+  script behind for the next one.
+- Streaming callers that hit the cache get the text re-chunked at word
+  boundaries, the shape they would have received from the LLM.
+- Entries expire after TEACHING_CACHE_TTL_S; the least recently used are
+  evicted past TEACHING_CACHE_MAX_MB. Bumping the caller's prompt version
+  changes every key, so old scripts are never served and age out.
+"""
+
+import asyncio
+import hashlib
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+from typing import AsyncIterator, Awaitable, Callable, Dict, List, Optional
+
+import config
+from utils.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+# Cached text is replayed to streaming callers in chunks of about this many characters
+STREAM_CHUNK_CHARS = 48
+
+_WORDS = re.compile(r"\S+\s*|\s+")
+
+
+def _chunk(text: str, size: int = STREAM_CHUNK_CHARS) -> List[str]:
+    chunks, current = [], ""
+    for word in _WORDS.findall(text):
+        current += word
+        if len(current) >= size:
+            chunks.append(current)
+            current = ""
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+def _always(text: str) -> bool:
+    return True
+
+
+class _Flight:
+    """One generation in progress; followers replay its chunks and wait for more."""
+
+    def __init__(self):
+        self.chunks: List[str] = []
+        self.done = False
+        self.error: Optional[BaseException] = None
+        self._changed = asyncio.Event()
+
+    def _notify(self):
+        self._changed.set()
+        self._changed = asyncio.Event()
+
+    def append(self, chunk: str):
+        self.chunks.append(chunk)
+        self._notify()
+
+    def finish(self, error: Optional[BaseException] = None):
+        self.error = error
+        self.done = True
+        self._notify()
+
+    async def follow(self) -> AsyncIterator[str]:
+        sent = 0
+        while True:
+            changed = self._changed
+            while sent < len(self.chunks):
+                yield self.chunks[sent]
+                sent += 1
+            if self.done:
+                if self.error is not None:
+                    raise self.error
+                return
+            await changed.wait()
+
+
+class TeachingCache:
+    """Persistent, size-bounded cache of teaching scripts with single-flight generation."""
+
+    def __init__(self, path: str = config.TEACHING_CACHE_PATH,
+                 max_bytes: int = int(config.TEACHING_CACHE_MAX_MB * 1024 * 1024),
+                 ttl_s: float = config.TEACHING_CACHE_TTL_S):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.ttl_s = ttl_s
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+        self._flights: Dict[str, _Flight] = {}
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.evictions = 0
+
+    @staticmethod
+    def key(prompt: str, language: str, version) -> str:
+        """Cache key of a script: everything the LLM output depends on."""
+        raw = "\x00".join([str(version), config.LLM_MODEL_NAME, language, prompt])
+        return hashlib.blake2b(raw.encode("utf-8"), digest_size=20).hexdigest()
+
+    # --- Storage ---
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            self._conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None, timeout=5.0)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS scripts ("
+                "key TEXT PRIMARY KEY, language TEXT, text TEXT, size INTEGER, created_at REAL, used_at REAL)"
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS scripts_used_at ON scripts (used_at)")
+        return self._conn
+
+    def _get(self, key: str) -> Optional[str]:
+        now = time.time()
+        with self._lock:
+            conn = self._connect()
+            row = conn.execute("SELECT text, created_at FROM scripts WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            if row[1] + self.ttl_s <= now:
+                conn.execute("DELETE FROM scripts WHERE key = ?", (key,))
+                return None
+            conn.execute("UPDATE scripts SET used_at = ? WHERE key = ?", (now, key))
+        return row[0]
+
+    def _put(self, key: str, language: str, text: str):
+        now = time.time()
+        size = len(text.encode("utf-8"))
+        with self._lock:
+            conn = self._connect()
+            conn.execute("DELETE FROM scripts WHERE created_at <= ?", (now - self.ttl_s,))
+            conn.execute(
+                "INSERT OR REPLACE INTO scripts (key, language, text, size, created_at, used_at) VALUES (?, ?, ?, ?, ?, ?)",
+                (key, language, text, size, now, now),
+            )
+            total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM scripts").fetchone()[0]
+            while total > self.max_bytes:
+                row = conn.execute("SELECT key, size FROM scripts ORDER BY used_at LIMIT 1").fetchone()
+                if row is None:
+                    break
+                conn.execute("DELETE FROM scripts WHERE key = ?", (row[0],))
+                total -= row[1]
+                self.evictions += 1
+                metrics.inc("teaching_cache_evictions")
+
+    # --- Generation ---
+
+    async def _produce(self, key: str, language: str, flight: _Flight, source: AsyncIterator[str],
+                       cacheable: Callable[[str], bool]):
+        error = None
+        try:
+            async for chunk in source:
+                flight.append(chunk)
+            text = "".join(flight.chunks)
+            if text.strip() and cacheable(text):
+                await asyncio.to_thread(self._put, key, language, text)
+        except Exception as e:
+            error = e
+            logger.warning(f"⚠️ Teaching script generation failed: {e}")
+        finally:
+            self._flights.pop(key, None)
+            flight.finish(error)
+
+    async def stream(self, key: str, language: str, open_stream: Callable[[], AsyncIterator[str]],
+                     cacheable: Callable[[str], bool] = _always) -> AsyncIterator[str]:
+        """The script's chunks: from the cache, a generation in flight, or a new one."""
+        flight = self._flights.get(key)
+        if flight is None:
+            text = await asyncio.to_thread(self._get, key)
+            if text is not None:
+                self.hits += 1
+                metrics.inc("teaching_cache_hits")
+                for chunk in _chunk(text):
+                    yield chunk
+                return
+            # Checked again: another caller may have started generating during the lookup
+            flight = self._flights.get(key)
+        if flight is not None:
+            self.coalesced += 1
+            metrics.inc("teaching_cache_coalesced")
+        else:
+            self.misses += 1
+            metrics.inc("teaching_cache_misses")
+            flight = self._flights[key] = _Flight()
+            # Own task: callers giving up (timeouts, disconnects) must not abort the generation
+            asyncio.ensure_future(self._produce(key, language, flight, open_stream(), cacheable))
+        async for chunk in flight.follow():
+            yield chunk
+
+    async def generate(self, key: str, language: str, generate: Callable[[], Awaitable[str]],
+                       cacheable: Callable[[str], bool] = _always) -> str:
+        """The whole script, generated at most once across concurrent callers."""
+
+        async def one_chunk():
+            yield await generate()
+
+        return "".join([chunk async for chunk in self.stream(key, language, one_chunk, cacheable)])
+
+    # --- Reporting ---
+
+    def _summary(self) -> Dict[str, Dict[str, int]]:
+        with self._lock:
+            rows = self._connect().execute(
+                "SELECT language, COUNT(*), COALESCE(SUM(size), 0) FROM scripts GROUP BY language"
+            ).fetchall()
+        return {language: {"entries": count, "bytes": size} for language, count, size in rows}
+
+    def stats(self) -> Dict[str, object]:
+        lookups = self.hits + self.misses + self.coalesced
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "hit_rate": round((self.hits + self.coalesced) / lookups, 4) if lookups else None,
+            "evictions": self.evictions,
+            "in_flight": len(self._flights),
+            "languages": self._summary(),
+        }
+
+
+# Shared by every session in the process
+teaching_cache = TeachingCache() if config.TEACHING_CACHE_ENABLED else None
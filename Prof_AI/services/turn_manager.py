@@ -0,0 +1,287 @@
+"""
+Turn Manager - cancellable conversation turns for the real-time voice path
+
+A turn covers STT final → LLM stream → TTS stream → WebSocket send and runs as
+a single asyncio task. Barge-in cancels that task, which aborts the LLM HTTP
+stream, closes the ElevenLabs context and drops any audio frames that were
+queued but not yet sent.
+
+If no reply audio is ready FILLER_DELAY_S into the turn, a short pre-rendered
+filler phrase is queued ahead of it and closed by its own ``audio_end``
+(marked ``filler``), so clients that play on audio_end start it right away.
+The reply audio then follows through the same queue, so the two never
+overlap on the wire, and barge-in flushes both.
+"""
+
+import asyncio
+import base64
+import json
+import logging
+import time
+from typing import Optional
+
+from websockets.exceptions import ConnectionClosed
+
+import config
+from services.canned_audio import canned_audio
+from utils.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+# TurnManager's default filler delay: FILLER_DELAY_S, or none if FILLER_ENABLED is off
+_FROM_CONFIG = object()
+
+
+def _update_filler_rate():
+    turns = metrics.counter("turns_started")
+    if turns:
+        metrics.set_gauge("filler_rate", round(metrics.counter("fillers_played") / turns, 4))
+
+
+class ConversationTurn:
+    """One user utterance and the agent's streamed reply."""
+
+    def __init__(self, turn_id: int, text: str, service, websocket,
+                 filler_delay: Optional[float] = None, recorder=None):
+        self.turn_id = turn_id
+        self.text = text
+        self.service = service
+        self.websocket = websocket
+        self.audio_queue: asyncio.Queue = asyncio.Queue()
+        self.task: Optional[asyncio.Task] = None
+        self.started_at = time.monotonic()
+        self.response_text = ""
+        self.bytes_sent = 0
+        self._first_audio_at: Optional[float] = None
+        self.filler_delay = filler_delay
+        self.filler_played = False
+        self._reply_audio_queued = False
+        # Optional SessionRecorder: LLM timings and the TTS byte timeline
+        self.recorder = recorder
+        self._llm_timing: Optional[dict] = None
+        self._tts_timeline = []
+        self.cancelled = False
+
+    def start(self) -> "ConversationTurn":
+        self.task = asyncio.create_task(self._run())
+        return self
+
+    @property
+    def done(self) -> bool:
+        return self.task is None or self.task.done()
+
+    async def _send(self, payload: dict) -> bool:
+        try:
+            if self.websocket.close_code is not None:
+                return False
+            await self.websocket.send(json.dumps(payload))
+            return True
+        except ConnectionClosed:
+            return False
+
+    async def _run(self):
+        sender = None
+        filler = None
+        llm_stream = None
+        tts_stream = None
+        try:
+            logger.info(f"🤖 Turn {self.turn_id}: processing '{self.text}'")
+
+            # The sender runs for the whole turn so a filler can play while we wait
+            sender = asyncio.create_task(self._drain_audio())
+            if self.filler_delay is not None:
+                filler = asyncio.create_task(self._play_filler(self.filler_delay))
+
+            # LLM stream (cancellation closes the HTTP response)
+            parts = []
+            llm_stream = self.service.get_llm_response_stream(self.text)
+            async for delta in llm_stream:
+                if not parts:
+                    first_token = time.monotonic() - self.started_at
+                    metrics.observe("llm_first_token_ms", first_token * 1000)
+                    if self.recorder is not None:
+                        self._llm_timing = {"text": "", "first_token_s": first_token, "total_s": None}
+                parts.append(delta)
+                if self._llm_timing is not None:
+                    self._llm_timing["text"] += delta
+            self.response_text = "".join(parts).strip()
+            if self._llm_timing is not None:
+                self._llm_timing["total_s"] = time.monotonic() - self.started_at
+            if not self.response_text:
+                return
+
+            if not await self._send({'type': 'agent_response', 'text': self.response_text}):
+                return
+
+            # TTS stream feeds the outbound queue; the sender drains it to the client
+            tts_stream = self.service.text_to_speech_stream(self.response_text)
+            tts_started = time.monotonic()
+            async for chunk in tts_stream:
+                if sender.done():
+                    break
+                if chunk and self.recorder is not None:
+                    self._tts_timeline.append([round(time.monotonic() - tts_started, 4), len(chunk)])
+                if chunk:
+                    self._reply_audio_queued = True
+                    self.audio_queue.put_nowait((chunk, False))
+            self._reply_audio_queued = True
+            self.audio_queue.put_nowait(None)
+            await sender
+
+            await self._send({'type': 'audio_end'})
+            metrics.observe("turn_total_ms", (time.monotonic() - self.started_at) * 1000)
+            logger.info(f"✅ Turn {self.turn_id} completed: {self.bytes_sent} bytes")
+
+        except asyncio.CancelledError:
+            self.cancelled = True
+            raise
+        except Exception as e:
+            logger.error(f"❌ Turn {self.turn_id} failed: {e}")
+            metrics.inc("turn_errors")
+            await self._send({
+                'type': 'error',
+                'message': 'Sorry, I had trouble processing that.'
+            })
+        finally:
+            if filler is not None and not filler.done():
+                filler.cancel()
+            for stream in (tts_stream, llm_stream):
+                if stream is not None:
+                    try:
+                        await stream.aclose()
+                    except Exception:
+                        pass
+            if sender is not None and not sender.done():
+                sender.cancel()
+            if self.recorder is not None:
+                self.recorder.turn(
+                    self.started_at - self.recorder.started, self.text, self._llm_timing,
+                    self._tts_timeline, cancelled=self.cancelled,
+                )
+
+    async def _play_filler(self, delay: float):
+        """Queue a filler phrase if no reply audio has been queued after ``delay``."""
+        await asyncio.sleep(delay)
+        if self._reply_audio_queued:
+            return
+        audio = canned_audio.filler()
+        if audio is None:
+            metrics.inc("fillers_unavailable")
+            return
+        self.filler_played = True
+        self.audio_queue.put_nowait((audio, True))
+        metrics.inc("fillers_played")
+        _update_filler_rate()
+        logger.info(f"🫧 Turn {self.turn_id}: no reply after {delay * 1000:.0f}ms, playing filler")
+
+    async def _drain_audio(self):
+        while True:
+            item = await self.audio_queue.get()
+            if item is None:
+                return
+            chunk, is_filler = item
+            payload = {
+                'type': 'audio_chunk',
+                'audio': base64.b64encode(chunk).decode('utf-8')
+            }
+            if is_filler:
+                payload['filler'] = True
+            if not await self._send(payload):
+                return
+            if is_filler:
+                if not await self._send({'type': 'audio_end', 'filler': True}):
+                    return
+                continue
+            if self._first_audio_at is None:
+                self._first_audio_at = time.monotonic()
+                metrics.observe("turn_first_audio_ms", (self._first_audio_at - self.started_at) * 1000)
+            self.bytes_sent += len(chunk)
+
+    async def cancel(self) -> int:
+        """Cancel the turn and flush queued audio. Returns the number of dropped frames."""
+        if self.task is not None and not self.task.done():
+            self.task.cancel()
+            try:
+                await self.task
+            except asyncio.CancelledError:
+                pass
+            except Exception:
+                pass
+
+        flushed = 0
+        while not self.audio_queue.empty():
+            if self.audio_queue.get_nowait() is not None:
+                flushed += 1
+        return flushed
+
+
+class TurnManager:
+    """Owns the active turn of a single client connection."""
+
+    def __init__(self, service, websocket, filler_delay: Optional[float] = _FROM_CONFIG):
+        """``filler_delay=None`` turns the filler off for this connection."""
+        self.service = service
+        self.websocket = websocket
+        self.active: Optional[ConversationTurn] = None
+        self._next_turn_id = 0
+        if filler_delay is _FROM_CONFIG:
+            filler_delay = config.FILLER_DELAY_S if config.FILLER_ENABLED else None
+        self.filler_delay = filler_delay
+        self.recorder = None
+
+    @property
+    def is_active(self) -> bool:
+        return self.active is not None and not self.active.done
+
+    async def start_turn(self, text: str) -> ConversationTurn:
+        """Start a new turn, superseding any turn still in flight."""
+        await self.cancel_active()
+        self._next_turn_id += 1
+        self.active = ConversationTurn(
+            self._next_turn_id, text, self.service, self.websocket,
+            filler_delay=self.filler_delay, recorder=self.recorder,
+        ).start()
+        metrics.inc("turns_started")
+        _update_filler_rate()
+        return self.active
+
+    async def cancel_active(self) -> int:
+        """
+        Cancel the running turn, if any, and tell the client to drop the
+        audio it buffered for it. Returns the number of dropped frames.
+        """
+        turn, self.active = self.active, None
+        if turn is None or turn.done:
+            return 0
+        flushed = await turn.cancel()
+        metrics.inc("turns_cancelled")
+        if turn.filler_played:
+            metrics.inc("fillers_interrupted")
+        try:
+            if self.websocket.close_code is None:
+                await self.websocket.send(json.dumps({'type': 'tts_interrupted'}))
+        except ConnectionClosed:
+            pass
+        return flushed
+
+    async def barge_in(self) -> bool:
+        """
+        Abort the in-flight turn because the user started speaking.
+
+        Returns True if a turn was interrupted. The time from the call to the
+        turn being fully torn down is recorded as ``barge_in_to_silence_ms``.
+        """
+        if not self.is_active:
+            return False
+
+        started = time.monotonic()
+        flushed = await self.cancel_active()
+
+        elapsed_ms = (time.monotonic() - started) * 1000
+        metrics.observe("barge_in_to_silence_ms", elapsed_ms)
+        metrics.inc("barge_ins")
+        logger.info(f"⏹️ Barge-in: turn cancelled in {elapsed_ms:.0f}ms, flushed {flushed} queued frames")
+        return True
+
+    async def close(self):
+        await self.cancel_active()
@@ -30,12 +30,32 @@ if [ ! -f ".env" ]; then
     echo ""
 fi
 
-# Kill any existing processes on ports
+# Stop whatever listens on a port (not the clients connected to it): SIGTERM
+# first so the voice server can drain its callers, SIGKILL only if it is
+# still there after the grace period
+stop_port() {
+    local port=$1
+    local grace=${2:-5}
+    local pids
+    pids=$(lsof -ti:$port -sTCP:LISTEN 2>/dev/null)
+    [ -z "$pids" ] && return 0
+    kill -TERM $pids 2>/dev/null || true
+    for _ in $(seq 1 $grace); do
+        sleep 1
+        pids=$(lsof -ti:$port -sTCP:LISTEN 2>/dev/null)
+        [ -z "$pids" ] && return 0
+    done
+    echo "⚠️  Port $port still busy after ${grace}s, forcing stop"
+    kill -9 $pids 2>/dev/null || true
+}
+
+# Stop any existing processes on ports
 echo "🧹 Cleaning up existing processes..."
-lsof -ti:8766 | xargs kill -9 2>/dev/null || true
-lsof -ti:8000 | xargs kill -9 2>/dev/null || true
+stop_port 8766 $(( ${DRAIN_TIMEOUT_S:-10} + 5 ))
+stop_port 8000
 
-# Start the WebSocket server in background
+# Start the WebSocket server in background; it writes the serving PID here
+export VOICE_PID_FILE="$PWD/voice_server.pid"
 echo "🚀 Starting WebSocket server on port 8766..."
 python run_simple_audio_server.py &
 SERVER_PID=$!
@@ -84,7 +104,8 @@ echo "║                                                              ║"
 echo "║  📝 Simple Client (Text):                                   ║"
 echo "║     http://localhost:8000/simple-audio-client.html          ║"
 echo "║                                                              ║"
-echo "║  🛑 To stop: Press Ctrl+C                                   ║"
+echo "║  🛑 To stop: Press Ctrl+C (active calls are drained)        ║"
+echo "║  🔁 Hot restart: kill -USR2 \$(cat voice_server.pid)          ║"
 echo "║                                                              ║"
 echo "╚══════════════════════════════════════════════════════════════╝"
 echo ""
@@ -97,11 +118,14 @@ if command -v open &> /dev/null; then
 fi
 
 # Function to cleanup on exit
+# After a hot restart (SIGUSR2) the serving process is no longer $SERVER_PID
+# but the child it handed the socket to, so the server is stopped by port
 cleanup() {
     echo ""
-    echo "🛑 Stopping servers..."
-    kill $SERVER_PID 2>/dev/null
+    echo "🛑 Stopping servers (draining active calls)..."
+    stop_port 8766 $(( ${DRAIN_TIMEOUT_S:-10} + 5 ))
     kill $HTTP_PID 2>/dev/null
+    wait $SERVER_PID 2>/dev/null
     echo "✅ Servers stopped"
     exit 0
 }
@@ -0,0 +1,38 @@
+"""
+Utilities package for the AUM voice server.
+
+Cross-cutting helpers (metrics, timing, resilience) shared by the server
+and the provider services.
+"""
+
+from .metrics import (
+    RollingWindow,
+    MetricsRegistry,
+    metrics
+)
+from .timing_wheel import TimingWheel
+from .history_codec import encode_history, decode_history
+from .log_pipeline import configure_logging
+from .loop_watchdog import LoopWatchdog, BlockingCallDetected
+from .event_loop import install_event_loop
+from .resilience import ProviderUnavailable, ProviderGovernor, governors
+from .json_stream import iter_json_array, JSONStreamError, NotAJSONArray
+
+__all__ = [
+    'RollingWindow',
+    'MetricsRegistry',
+    'metrics',
+    'TimingWheel',
+    'encode_history',
+    'decode_history',
+    'configure_logging',
+    'LoopWatchdog',
+    'BlockingCallDetected',
+    'install_event_loop',
+    'ProviderUnavailable',
+    'ProviderGovernor',
+    'governors',
+    'iter_json_array',
+    'JSONStreamError',
+    'NotAJSONArray'
+]
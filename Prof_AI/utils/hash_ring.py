@@ -0,0 +1,59 @@
+"""
+Consistent-hash ring for sticky routing of voice sessions to nodes.
+
+A load balancer (or a node redirecting a client) maps a stable key - the
+resume token or caller id - to a node. Each node owns many virtual points on
+the ring, so adding or removing a node only moves about 1/N of the keys.
+"""
+
+import bisect
+import hashlib
+from typing import Dict, Iterable, List, Optional, Tuple
+
+
+def _hash(value: str) -> int:
+    return int.from_bytes(hashlib.md5(value.encode("utf-8")).digest()[:8], "big")
+
+
+class HashRing:
+    """Consistent hashing with virtual nodes."""
+
+    def __init__(self, nodes: Iterable[str] = (), vnodes: int = 128):
+        self.vnodes = vnodes
+        self._points: List[Tuple[int, str]] = []
+        self._nodes: Dict[str, None] = {}
+        for node in nodes:
+            self.add(node)
+
+    def __len__(self) -> int:
+        return len(self._nodes)
+
+    def __contains__(self, node: str) -> bool:
+        return node in self._nodes
+
+    @property
+    def nodes(self) -> List[str]:
+        return list(self._nodes)
+
+    def add(self, node: str):
+        if node in self._nodes:
+            return
+        self._nodes[node] = None
+        for i in range(self.vnodes):
+            bisect.insort(self._points, (_hash(f"{node}#{i}"), node))
+
+    def remove(self, node: str):
+        if self._nodes.pop(node, 0) is None:
+            self._points = [point for point in self._points if point[1] != node]
+
+    def node_for(self, key: str, exclude: Iterable[str] = ()) -> Optional[str]:
+        """The node owning ``key``, skipping any in ``exclude`` (e.g. a draining node)."""
+        if not self._points:
+            return None
+        excluded = set(exclude)
+        start = bisect.bisect(self._points, (_hash(key), ""))
+        for i in range(len(self._points)):
+            node = self._points[(start + i) % len(self._points)][1]
+            if node not in excluded:
+                return node
+        return None
@@ -0,0 +1,83 @@
+"""
+Adaptive hedging policy for latency-critical upstream requests.
+
+The policy keeps a rolling window of first-byte times for the primary path
+and derives the hedge deadline from a high percentile of it: if the primary
+request has produced nothing by then, the caller fires a backup request and
+uses whichever answers first.
+"""
+
+from utils.metrics import RollingWindow, metrics
+
+
+class HedgePolicy:
+    """Deadline and bookkeeping for one hedged request type (e.g. ``tts``)."""
+
+    def __init__(
+        self,
+        name: str,
+        initial_deadline: float,
+        min_deadline: float,
+        max_deadline: float,
+        percentile: float = 95.0,
+        min_samples: int = 20,
+        window: int = 256,
+    ):
+        self.name = name
+        self.initial_deadline = initial_deadline
+        self.min_deadline = min_deadline
+        self.max_deadline = max_deadline
+        self.percentile = percentile
+        self.min_samples = min_samples
+        self.first_byte = RollingWindow(window)
+        self.requests = 0
+        self.hedged = 0
+
+    def deadline(self) -> float:
+        """Current hedge deadline in seconds."""
+        if len(self.first_byte) < self.min_samples:
+            deadline = self.initial_deadline
+        else:
+            deadline = self.first_byte.percentile(self.percentile)
+        deadline = min(self.max_deadline, max(self.min_deadline, deadline))
+        metrics.set_gauge(f"{self.name}_hedge_deadline_ms", round(deadline * 1000, 1))
+        return deadline
+
+    def observe_first_byte(self, seconds: float):
+        self.first_byte.add(seconds)
+        metrics.observe(f"{self.name}_first_byte_ms", seconds * 1000)
+
+    def observe_censored(self, seconds: float):
+        """
+        A hedge loser still silent after ``seconds``: its first byte time is
+        at least that. Dropping it would leave only the primaries fast
+        enough to win, biasing the percentile (and so the deadline) low.
+        """
+        self.first_byte.add(seconds)
+        metrics.inc(f"{self.name}_first_byte_censored")
+
+    def record_request(self):
+        self.requests += 1
+        metrics.inc(f"{self.name}_requests")
+        self._update_rate()
+
+    def record_hedge(self):
+        self.hedged += 1
+        metrics.inc(f"{self.name}_hedged")
+        self._update_rate()
+
+    def record_winner(self, winner: str):
+        metrics.inc(f"{self.name}_hedge_wins_{winner}")
+
+    def record_saved(self, seconds: float):
+        """Latency the backup saved compared with waiting for the primary."""
+        saved_ms = max(0.0, seconds) * 1000
+        metrics.observe(f"{self.name}_hedge_latency_saved_ms", saved_ms)
+        metrics.inc(f"{self.name}_hedge_latency_saved_ms_total", saved_ms)
+
+    @property
+    def hedge_rate(self) -> float:
+        return self.hedged / self.requests if self.requests else 0.0
+
+    def _update_rate(self):
+        metrics.set_gauge(f"{self.name}_hedge_rate", round(self.hedge_rate, 4))
@@ -0,0 +1,24 @@
+"""
+Compact encoding for conversation history.
+
+Histories are a list of ``{"role", "content"}`` dicts. They are stored as
+zlib-compressed compact JSON so idle or parked sessions keep only a few
+hundred bytes per conversation instead of the live Python objects.
+"""
+
+import json
+import zlib
+from typing import Dict, List
+
+
+def encode_history(history: List[Dict[str, str]], level: int = 6) -> bytes:
+    """Serialize and compress a conversation history."""
+    raw = json.dumps(history, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    return zlib.compress(raw, level)
+
+
+def decode_history(blob: bytes) -> List[Dict[str, str]]:
+    """Inverse of ``encode_history``. An empty blob decodes to an empty history."""
+    if not blob:
+        return []
+    return json.loads(zlib.decompress(blob).decode("utf-8"))
@@ -0,0 +1,102 @@
+"""
+Incremental reader for large top-level JSON arrays.
+
+Yields each array element already parsed, reading the file in fixed-size
+chunks so only the current element and one window of text are held at a
+time. Elements are decoded straight from the window with the C scanner
+(json.JSONDecoder.raw_decode), so the file is scanned once, at json.load
+speed; the window only grows when a single element is larger than it.
+"""
+
+import json
+import re
+from typing import Any, Iterator
+
+_WHITESPACE = re.compile(r"[ \t\n\r]*")
+# What may follow an element; anything else (e.g. "1" then ".5") may be a cut-off number
+_AFTER_ELEMENT = frozenset(" \t\n\r,]")
+
+
+class JSONStreamError(ValueError):
+    """The file is not a well-formed top-level JSON array."""
+
+
+class NotAJSONArray(JSONStreamError):
+    """The file's top-level value is not an array."""
+
+
+class _Window:
+    """A sliding window of decoded text over the file."""
+
+    def __init__(self, f, chunk_size: int):
+        self.f = f
+        self.chunk_size = chunk_size
+        self.text = ""
+        self.pos = 0
+        self.eof = False
+
+    def fill(self):
+        """Drop consumed text and read more; larger reads as an element outgrows the window."""
+        try:
+            chunk = self.f.read(max(self.chunk_size, len(self.text) - self.pos))
+        except UnicodeDecodeError as e:
+            raise JSONStreamError(str(e)) from e
+        self.eof = not chunk
+        self.text = self.text[self.pos:] + chunk
+        self.pos = 0
+
+    def peek(self) -> str:
+        """The next non-whitespace character, or "" at end of file."""
+        while True:
+            self.pos = _WHITESPACE.match(self.text, self.pos).end()
+            if self.pos < len(self.text):
+                return self.text[self.pos]
+            if self.eof:
+                return ""
+            self.fill()
+
+    def next_char(self) -> str:
+        """Like peek, but consumes the character."""
+        char = self.peek()
+        self.pos += len(char)
+        return char
+
+    def decode(self, decoder: json.JSONDecoder) -> Any:
+        """Decode the value at the cursor, reading more until it is known to be complete."""
+        while True:
+            try:
+                value, end = decoder.raw_decode(self.text, self.pos)
+            except json.JSONDecodeError as e:
+                if self.eof:
+                    raise JSONStreamError(e.msg) from e
+            else:
+                if self.eof or (end < len(self.text) and self.text[end] in _AFTER_ELEMENT):
+                    self.pos = end
+                    return value
+            self.fill()
+
+
+def iter_json_array(path: str, chunk_size: int = 1 << 20) -> Iterator[Any]:
+    """Each element of the JSON array in ``path``, parsed, in order."""
+    decoder = json.JSONDecoder()
+    with open(path, "r", encoding="utf-8-sig") as f:
+        window = _Window(f, chunk_size)
+        if window.next_char() != "[":
+            raise NotAJSONArray("expected a JSON array")
+
+        if window.peek() == "]":
+            window.next_char()
+            if window.next_char():
+                raise JSONStreamError("unexpected data after the array")
+            return
+
+        while True:
+            window.peek()
+            yield window.decode(decoder)
+            separator = window.next_char()
+            if separator == "]":
+                if window.next_char():
+                    raise JSONStreamError("unexpected data after the array")
+                return
+            if separator != ",":
+                raise JSONStreamError("expected ',' or ']' after an element")
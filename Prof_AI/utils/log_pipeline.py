@@ -0,0 +1,154 @@
+"""
+Queue-backed logging pipeline that keeps formatting and I/O off the event loop.
+
+The event loop only builds a LogRecord and puts it on a bounded queue; message
+interpolation, JSON/text formatting and the write to stderr happen in a
+QueueListener thread. Hot-path categories (``aum.audio``, ``aum.stt``) can be
+raised to a higher level or sampled per profile, and records are dropped (and
+counted) rather than blocking when the queue is full.
+
+Hot-path call sites should log lazily (``log.debug("%d bytes", n)``) and never
+pass audio payloads as arguments.
+"""
+
+import atexit
+import json
+import logging
+import logging.handlers
+import queue
+import random
+from typing import Dict, Optional
+
+import config
+from utils.metrics import metrics
+
+# Hot-path logger categories
+AUDIO = "aum.audio"
+STT = "aum.stt"
+
+TEXT_FORMAT = '%(asctime)s - %(levelname)s - %(message)s'
+
+LOG_PROFILES: Dict[str, dict] = {
+    "development": {
+        "level": "INFO",
+        "format": "text",
+        "category_levels": {},
+        "sample_rates": {},
+    },
+    "debug": {
+        "level": "DEBUG",
+        "format": "text",
+        "category_levels": {},
+        "sample_rates": {},
+    },
+    "production": {
+        "level": "INFO",
+        "format": "json",
+        "category_levels": {AUDIO: "WARNING", STT: "INFO"},
+        "sample_rates": {AUDIO: 0.01, STT: 0.1},
+    },
+}
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line: ts, level, logger, msg (+ exc)."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": round(record.created, 3),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False)
+
+
+class SamplingFilter(logging.Filter):
+    """Keep a fraction of sub-WARNING records per logger category."""
+
+    def __init__(self, sample_rates: Dict[str, float]):
+        super().__init__()
+        # Longest prefix first so "aum.audio.ws" beats "aum.audio"
+        self.sample_rates = sorted(sample_rates.items(), key=lambda kv: -len(kv[0]))
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= logging.WARNING or not self.sample_rates:
+            return True
+        for prefix, rate in self.sample_rates:
+            if record.name == prefix or record.name.startswith(prefix + "."):
+                if rate >= 1.0 or random.random() < rate:
+                    return True
+                metrics.inc("log_records_sampled_out")
+                return False
+        return True
+
+
+class _DeferredQueueHandler(logging.handlers.QueueHandler):
+    """QueueHandler that defers formatting to the listener and never blocks."""
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # The stock handler formats here, on the caller's thread. The queue is
+        # in-process, so the listener can interpolate args itself.
+        return record
+
+    def enqueue(self, record: logging.LogRecord):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            metrics.inc("log_records_dropped")
+
+
+_listener: Optional[logging.handlers.QueueListener] = None
+
+
+def configure_logging(profile: Optional[str] = None) -> str:
+    """
+    Route the root logger through the async pipeline using ``profile``
+    (defaults to config.LOG_PROFILE). Safe to call more than once.
+
+    Returns the name of the profile that was applied.
+    """
+    global _listener
+
+    name = (profile or config.LOG_PROFILE).lower()
+    settings = LOG_PROFILES.get(name)
+    if settings is None:
+        logging.getLogger(__name__).warning(f"⚠️ Unknown LOG_PROFILE '{name}', using development")
+        name, settings = "development", LOG_PROFILES["development"]
+
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+    output = logging.StreamHandler()
+    output.setFormatter(JsonFormatter() if settings["format"] == "json" else logging.Formatter(TEXT_FORMAT))
+
+    records: queue.Queue = queue.Queue(maxsize=config.LOG_QUEUE_SIZE)
+    handler = _DeferredQueueHandler(records)
+    handler.addFilter(SamplingFilter(settings["sample_rates"]))
+
+    root = logging.getLogger()
+    for existing in list(root.handlers):
+        root.removeHandler(existing)
+    root.addHandler(handler)
+    root.setLevel(config.LOG_LEVEL or settings["level"])
+
+    for category in (AUDIO, STT):
+        logging.getLogger(category).setLevel(settings["category_levels"].get(category, logging.NOTSET))
+
+    _listener = logging.handlers.QueueListener(records, output, respect_handler_level=True)
+    _listener.start()
+    return name
+
+
+def shutdown_logging():
+    """Flush queued records and stop the listener thread."""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+atexit.register(shutdown_logging)
@@ -0,0 +1,173 @@
+"""
+Event-loop watchdog: continuous loop-lag measurement and blocking-call capture.
+
+A heartbeat task on the loop sleeps for ``interval`` and records how late it
+woke up (``loop_lag_ms``). A monitor thread watches the heartbeat; if the loop
+has not beaten for longer than ``threshold`` it grabs the loop thread's stack
+while the blocking call is still on it, so the report points at the offending
+line rather than at whatever runs after it.
+
+Stalls are published as metrics (``loop_stalls``, ``loop_stall_ms``) and a
+rate-limited warning. In strict mode (for tests) leaving the watchdog raises
+BlockingCallDetected if any stall exceeded the threshold::
+
+    async with LoopWatchdog(threshold=0.05, strict=True):
+        await code_under_test()
+"""
+
+import asyncio
+import logging
+import sys
+import threading
+import time
+import traceback
+from typing import List, Optional
+
+import config
+from utils.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+
+class BlockingCallDetected(AssertionError):
+    """Raised in strict mode when the event loop was blocked past the threshold."""
+
+
+class Stall:
+    """One period during which the loop did not run."""
+
+    __slots__ = ("started", "duration", "task", "stack")
+
+    def __init__(self, started: float, task: Optional[str], stack: str):
+        self.started = started
+        self.duration = 0.0
+        self.task = task
+        self.stack = stack
+
+    def describe(self) -> str:
+        return f"blocked {self.duration * 1000:.0f}ms in task {self.task or '?'}:\n{self.stack}"
+
+
+class LoopWatchdog:
+    """Measures event-loop lag and captures the stack of blocking callbacks."""
+
+    def __init__(
+        self,
+        threshold: float = config.LOOP_STALL_THRESHOLD_S,
+        interval: float = config.LOOP_LAG_INTERVAL_S,
+        log_interval: float = config.LOOP_STALL_LOG_INTERVAL_S,
+        strict: bool = config.LOOP_WATCHDOG_STRICT,
+        max_stack_depth: int = 30,
+    ):
+        self.threshold = threshold
+        self.interval = interval
+        self.log_interval = log_interval
+        self.strict = strict
+        self.max_stack_depth = max_stack_depth
+        self.stalls: List[Stall] = []
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._loop_thread_id: Optional[int] = None
+        self._last_beat = time.monotonic()
+        self._current: Optional[Stall] = None
+        self._heartbeat: Optional[asyncio.Task] = None
+        self._monitor: Optional[threading.Thread] = None
+        self._stopped = threading.Event()
+        self._last_log = 0.0
+        self._suppressed = 0
+
+    # --- Lifecycle ---
+
+    def start(self):
+        """Start watching the running loop. Must be called from the loop thread."""
+        if self._heartbeat is not None:
+            return
+        self._loop = asyncio.get_running_loop()
+        self._loop_thread_id = threading.get_ident()
+        self._last_beat = time.monotonic()
+        self._stopped.clear()
+        self._heartbeat = asyncio.create_task(self._beat())
+        self._monitor = threading.Thread(target=self._watch, name="loop-watchdog", daemon=True)
+        self._monitor.start()
+        logger.info(f"🐕 Loop watchdog started (threshold {self.threshold * 1000:.0f}ms)")
+
+    async def stop(self):
+        """Stop watching. In strict mode, raise if any stall was recorded."""
+        self._stopped.set()
+        if self._heartbeat is not None:
+            self._heartbeat.cancel()
+            try:
+                await self._heartbeat
+            except asyncio.CancelledError:
+                pass
+            self._heartbeat = None
+        if self._monitor is not None:
+            self._monitor.join(timeout=1.0)
+            self._monitor = None
+        self._close_stall(time.monotonic())
+        if self.strict and self.stalls:
+            raise BlockingCallDetected(
+                f"{len(self.stalls)} blocking call(s) over {self.threshold * 1000:.0f}ms:\n\n"
+                + "\n\n".join(stall.describe() for stall in self.stalls)
+            )
+
+    async def __aenter__(self) -> "LoopWatchdog":
+        self.start()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.stop()
+
+    # --- Loop side ---
+
+    async def _beat(self):
+        while True:
+            expected = time.monotonic() + self.interval
+            await asyncio.sleep(self.interval)
+            now = time.monotonic()
+            lag = max(0.0, now - expected)
+            metrics.observe("loop_lag_ms", lag * 1000)
+            self._last_beat = now
+            if self._current is not None:
+                self._close_stall(now)
+
+    # --- Monitor thread ---
+
+    def _watch(self):
+        poll = max(0.005, self.threshold / 4)
+        while not self._stopped.wait(poll):
+            # A beat is due every `interval`; anything past that is blocking time
+            overdue = time.monotonic() - self._last_beat - self.interval
+            if overdue >= self.threshold and self._current is None:
+                self._current = self._capture()
+
+    def _capture(self) -> Stall:
+        frame = sys._current_frames().get(self._loop_thread_id)
+        stack = "".join(traceback.format_stack(frame, limit=self.max_stack_depth)) if frame else "<no frame>"
+        task_name = None
+        try:
+            task = asyncio.current_task(self._loop)
+            task_name = task.get_name() if task is not None else None
+        except RuntimeError:
+            pass
+        return Stall(self._last_beat + self.interval, task_name, stack)
+
+    # --- Reporting ---
+
+    def _close_stall(self, now: float):
+        stall, self._current = self._current, None
+        if stall is None:
+            return
+        stall.duration = now - stall.started
+        self.stalls.append(stall)
+        if not self.strict:
+            del self.stalls[:-100]
+        metrics.inc("loop_stalls")
+        metrics.observe("loop_stall_ms", stall.duration * 1000)
+
+        if now - self._last_log < self.log_interval:
+            self._suppressed += 1
+            return
+        suppressed, self._suppressed = self._suppressed, 0
+        self._last_log = now
+        note = f" ({suppressed} more since last report)" if suppressed else ""
+        logger.warning(f"🐢 Event loop {stall.describe()}{note}")
@@ -0,0 +1,107 @@
+"""
+In-process metrics registry for the voice server.
+
+Counters, gauges and rolling-window histograms shared by every session in the
+process. Snapshots are plain dicts so they can be sent straight over the
+WebSocket (``get_metrics``) or serialized by any other exporter.
+"""
+
+import math
+import threading
+import time
+from collections import deque
+from typing import Deque, Dict, Optional
+
+
+class RollingWindow:
+    """Fixed-size window of recent samples with percentile lookups."""
+
+    def __init__(self, size: int = 1024):
+        self._samples: Deque[float] = deque(maxlen=size)
+        self.count = 0
+        self.total = 0.0
+
+    def add(self, value: float):
+        self._samples.append(value)
+        self.count += 1
+        self.total += value
+
+    def percentile(self, pct: float) -> Optional[float]:
+        """Return the nearest-rank percentile of the window, or None if empty."""
+        if not self._samples:
+            return None
+        ordered = sorted(self._samples)
+        rank = max(0, min(len(ordered) - 1, math.ceil(pct / 100.0 * len(ordered)) - 1))
+        return ordered[rank]
+
+    def __len__(self) -> int:
+        return len(self._samples)
+
+    def summary(self) -> Dict[str, Optional[float]]:
+        return {
+            "count": self.count,
+            "mean": (self.total / self.count) if self.count else None,
+            "p50": self.percentile(50),
+            "p95": self.percentile(95),
+            "p99": self.percentile(99),
+        }
+
+
+class MetricsRegistry:
+    """Thread-safe registry of named counters, gauges and histograms."""
+
+    def __init__(self, window_size: int = 1024):
+        self._lock = threading.Lock()
+        self._window_size = window_size
+        self._counters: Dict[str, float] = {}
+        self._gauges: Dict[str, float] = {}
+        self._histograms: Dict[str, RollingWindow] = {}
+        self.started_at = time.time()
+
+    def inc(self, name: str, value: float = 1):
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + value
+
+    def set_gauge(self, name: str, value: float):
+        with self._lock:
+            self._gauges[name] = value
+
+    def observe(self, name: str, value: float):
+        with self._lock:
+            window = self._histograms.get(name)
+            if window is None:
+                window = self._histograms[name] = RollingWindow(self._window_size)
+            window.add(value)
+
+    def counter(self, name: str) -> float:
+        with self._lock:
+            return self._counters.get(name, 0)
+
+    def gauge(self, name: str) -> Optional[float]:
+        with self._lock:
+            return self._gauges.get(name)
+
+    def histogram(self, name: str) -> Optional[RollingWindow]:
+        with self._lock:
+            return self._histograms.get(name)
+
+    def snapshot(self) -> Dict[str, dict]:
+        """Return a JSON-serializable copy of every metric."""
+        with self._lock:
+            return {
+                "uptime_s": round(time.time() - self.started_at, 3),
+                "counters": dict(self._counters),
+                "gauges": dict(self._gauges),
+                "histograms": {name: w.summary() for name, w in self._histograms.items()},
+            }
+
+    def reset(self):
+        with self._lock:
+            self._counters.clear()
+            self._gauges.clear()
+            self._histograms.clear()
+            self.started_at = time.time()
+
+
+# Process-wide registry shared by the server and services
+metrics = MetricsRegistry()
@@ -0,0 +1,339 @@
+"""
+Shared resilience layer for upstream providers (OpenAI, ElevenLabs, Deepgram).
+
+Every provider gets one ProviderGovernor per process, combining:
+
+- a circuit breaker over a sliding window of recent calls, tripping on error
+  rate or slow-call rate and probing recovery in half-open state;
+- a concurrency semaphore capping in-flight calls across all sessions;
+- a token bucket capping the call start rate.
+
+When the breaker is open, or a call would queue longer than the configured
+limit, ``ProviderUnavailable`` is raised immediately so callers can fail fast
+to a fallback instead of piling up on 30-60 s timeouts.
+"""
+
+import asyncio
+import logging
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import Deque, Dict, Optional, Tuple
+
+import config
+from utils.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+
+class ProviderUnavailable(Exception):
+    """Raised when a provider call is rejected without being attempted."""
+
+
+class CircuitBreaker:
+    """Error-rate / latency based circuit breaker with half-open probing."""
+
+    CLOSED = "closed"
+    HALF_OPEN = "half_open"
+    OPEN = "open"
+    _STATE_VALUES = {CLOSED: 0, HALF_OPEN: 1, OPEN: 2}
+
+    def __init__(
+        self,
+        name: str,
+        failure_rate: float = 0.5,
+        slow_call_s: float = 5.0,
+        slow_call_rate: float = 0.8,
+        window: int = 20,
+        min_calls: int = 5,
+        open_s: float = 15.0,
+        half_open_probes: int = 1,
+    ):
+        self.name = name
+        self.failure_rate = failure_rate
+        self.slow_call_s = slow_call_s
+        self.slow_call_rate = slow_call_rate
+        self.min_calls = min_calls
+        self.open_s = open_s
+        self.half_open_probes = half_open_probes
+        self.state = self.CLOSED
+        self._outcomes: Deque[Tuple[bool, bool]] = deque(maxlen=window)
+        self._opened_at = 0.0
+        self._probes_in_flight = 0
+        self._publish()
+
+    def allow(self) -> bool:
+        """Return True if a call may be attempted now."""
+        if self.state == self.OPEN:
+            if time.monotonic() - self._opened_at < self.open_s:
+                return False
+            self._transition(self.HALF_OPEN)
+        if self.state == self.HALF_OPEN:
+            if self._probes_in_flight >= self.half_open_probes:
+                return False
+            self._probes_in_flight += 1
+        return True
+
+    @property
+    def is_closed(self) -> bool:
+        return self.state == self.CLOSED
+
+    @property
+    def cooling_down(self) -> bool:
+        """True while the breaker is open and not yet ready to probe."""
+        return self.state == self.OPEN and time.monotonic() - self._opened_at < self.open_s
+
+    def record_success(self, latency_s: float):
+        slow = latency_s >= self.slow_call_s
+        if self.state == self.HALF_OPEN:
+            self._probes_in_flight = max(0, self._probes_in_flight - 1)
+            if slow:
+                self._trip(f"slow probe ({latency_s:.1f}s)")
+            else:
+                self._transition(self.CLOSED)
+            return
+        self._outcomes.append((True, slow))
+        self._evaluate()
+
+    def record_failure(self):
+        if self.state == self.HALF_OPEN:
+            self._probes_in_flight = max(0, self._probes_in_flight - 1)
+            self._trip("failed probe")
+            return
+        self._outcomes.append((False, False))
+        self._evaluate()
+
+    def release_probe(self):
+        """Give back a half-open probe slot for a call that ended without an outcome."""
+        if self.state == self.HALF_OPEN:
+            self._probes_in_flight = max(0, self._probes_in_flight - 1)
+
+    def _evaluate(self):
+        calls = len(self._outcomes)
+        if self.state != self.CLOSED or calls < self.min_calls:
+            return
+        failures = sum(1 for ok, _ in self._outcomes if not ok)
+        slow = sum(1 for _, is_slow in self._outcomes if is_slow)
+        if failures / calls >= self.failure_rate:
+            self._trip(f"error rate {failures}/{calls}")
+        elif slow / calls >= self.slow_call_rate:
+            self._trip(f"slow-call rate {slow}/{calls}")
+
+    def _trip(self, reason: str):
+        logger.warning(f"⚡ Circuit breaker '{self.name}' opened: {reason}")
+        self._opened_at = time.monotonic()
+        self._transition(self.OPEN)
+        metrics.inc(f"{self.name}_breaker_trips")
+
+    def _transition(self, state: str):
+        if state == self.state:
+            return
+        previous, self.state = self.state, state
+        if state == self.CLOSED:
+            self._outcomes.clear()
+            logger.info(f"✅ Circuit breaker '{self.name}' closed")
+        if state != self.HALF_OPEN:
+            self._probes_in_flight = 0
+        logger.debug(f"🔧 Breaker '{self.name}': {previous} → {state}")
+        self._publish()
+
+    def _publish(self):
+        metrics.set_gauge(f"{self.name}_breaker_state", self._STATE_VALUES[self.state])
+
+
+class TokenBucket:
+    """Async token bucket; waiters are served in FIFO order."""
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    async def acquire(self):
+        if self.rate <= 0:
+            return
+        async with self._lock:
+            while True:
+                self._refill()
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+
+
+class _Call:
+    """Handle given to callers inside ``ProviderGovernor.call``."""
+
+    __slots__ = ("started", "first_byte_at", "failed")
+
+    def __init__(self):
+        self.started = time.monotonic()
+        self.first_byte_at: Optional[float] = None
+        self.failed = False
+
+    def mark_first_byte(self):
+        if self.first_byte_at is None:
+            self.first_byte_at = time.monotonic()
+
+    def fail(self):
+        """Record the call as failed even though no exception escaped."""
+        self.failed = True
+
+    @property
+    def latency(self) -> float:
+        end = self.first_byte_at if self.first_byte_at is not None else time.monotonic()
+        return end - self.started
+
+
+class ProviderGovernor:
+    """Circuit breaker + concurrency limit + rate limit for one provider."""
+
+    def __init__(
+        self,
+        name: str,
+        max_concurrency: int,
+        rate_per_s: float,
+        burst: float,
+        max_queue_wait_s: float,
+        breaker: CircuitBreaker,
+    ):
+        self.name = name
+        self.max_concurrency = max_concurrency
+        self.max_queue_wait_s = max_queue_wait_s
+        self.breaker = breaker
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._bucket = TokenBucket(rate_per_s, burst)
+        self.inflight = 0
+        self.waiting = 0
+
+    @property
+    def available(self) -> bool:
+        """True unless the breaker is open and still cooling down."""
+        return not self.breaker.cooling_down
+
+    async def acquire(self) -> float:
+        """
+        Reserve a call slot. Returns the queue wait in seconds.
+
+        Raises ProviderUnavailable if the breaker rejects the call or the slot
+        cannot be obtained within ``max_queue_wait_s``.
+        """
+        if not self.breaker.allow():
+            metrics.inc(f"{self.name}_rejected")
+            raise ProviderUnavailable(f"{self.name} circuit open")
+
+        started = time.monotonic()
+        self.waiting += 1
+        metrics.set_gauge(f"{self.name}_queue_depth", self.waiting)
+        try:
+            await asyncio.wait_for(self._take_slot(), timeout=self.max_queue_wait_s)
+        except asyncio.TimeoutError:
+            self.breaker.release_probe()
+            metrics.inc(f"{self.name}_rejected")
+            raise ProviderUnavailable(f"{self.name} queue wait exceeded {self.max_queue_wait_s}s")
+        except BaseException:
+            self.breaker.release_probe()
+            raise
+        finally:
+            self.waiting -= 1
+            metrics.set_gauge(f"{self.name}_queue_depth", self.waiting)
+
+        waited = time.monotonic() - started
+        metrics.observe(f"{self.name}_queue_wait_ms", waited * 1000)
+        self.inflight += 1
+        metrics.set_gauge(f"{self.name}_inflight", self.inflight)
+        return waited
+
+    async def _take_slot(self):
+        await self._semaphore.acquire()
+        try:
+            await self._bucket.acquire()
+        except BaseException:
+            self._semaphore.release()
+            raise
+
+    def release(self):
+        self.inflight -= 1
+        metrics.set_gauge(f"{self.name}_inflight", self.inflight)
+        self._semaphore.release()
+
+    def record_success(self, latency_s: float):
+        metrics.inc(f"{self.name}_calls")
+        self.breaker.record_success(latency_s)
+
+    def record_failure(self):
+        metrics.inc(f"{self.name}_calls")
+        metrics.inc(f"{self.name}_failures")
+        self.breaker.record_failure()
+
+    @asynccontextmanager
+    async def call(self):
+        """
+        Run one upstream call under the governor.
+
+        An escaping exception counts as a failure; cancellation counts as
+        neither. Streaming callers should ``mark_first_byte()`` so the breaker
+        judges latency by time-to-first-byte rather than total duration.
+        """
+        await self.acquire()
+        handle = _Call()
+        try:
+            yield handle
+        except asyncio.CancelledError:
+            self.breaker.release_probe()
+            raise
+        except GeneratorExit:
+            self.breaker.release_probe()
+            raise
+        except Exception:
+            self.record_failure()
+            raise
+        else:
+            if handle.failed:
+                self.record_failure()
+            else:
+                self.record_success(handle.latency)
+        finally:
+            self.release()
+
+    def stats(self) -> Dict[str, object]:
+        return {
+            "breaker": self.breaker.state,
+            "inflight": self.inflight,
+            "waiting": self.waiting,
+            "max_concurrency": self.max_concurrency,
+        }
+
+
+def _governor_from_config(name: str) -> ProviderGovernor:
+    prefix = name.upper()
+    breaker = CircuitBreaker(
+        name,
+        failure_rate=config.BREAKER_FAILURE_RATE,
+        slow_call_s=getattr(config, f"{prefix}_SLOW_CALL_S"),
+        slow_call_rate=config.BREAKER_SLOW_CALL_RATE,
+        window=config.BREAKER_WINDOW,
+        min_calls=config.BREAKER_MIN_CALLS,
+        open_s=config.BREAKER_OPEN_S,
+    )
+    return ProviderGovernor(
+        name,
+        max_concurrency=getattr(config, f"{prefix}_MAX_CONCURRENCY"),
+        rate_per_s=getattr(config, f"{prefix}_RATE_PER_S"),
+        burst=getattr(config, f"{prefix}_BURST"),
+        max_queue_wait_s=config.PROVIDER_MAX_QUEUE_WAIT_S,
+        breaker=breaker,
+    )
+
+
+# Process-wide governors, one per upstream provider
+governors: Dict[str, ProviderGovernor] = {
+    name: _governor_from_config(name) for name in ("openai", "elevenlabs", "deepgram")
+}
@@ -0,0 +1,106 @@
+"""
+Hashed timing wheel for cheap per-session timers.
+
+Scheduling, rescheduling and cancelling are O(1) and a tick only touches the
+timers in the current slot, so thousands of idle sessions cost almost nothing
+between deadlines. Resolution is one tick; timers may fire up to one tick late.
+"""
+
+import asyncio
+import inspect
+import logging
+import time
+from typing import Any, Callable, Dict, Hashable, List, Optional, Set
+
+logger = logging.getLogger(__name__)
+
+
+class _Timer:
+    __slots__ = ("key", "rounds", "slot", "callback")
+
+    def __init__(self, key: Hashable, rounds: int, slot: int, callback: Callable[[], Any]):
+        self.key = key
+        self.rounds = rounds
+        self.slot = slot
+        self.callback = callback
+
+
+class TimingWheel:
+    """Single-level hashed timing wheel driven by an asyncio task."""
+
+    def __init__(self, tick: float = 1.0, slots: int = 512):
+        if tick <= 0 or slots <= 0:
+            raise ValueError("tick and slots must be positive")
+        self.tick = tick
+        self._slots: List[Dict[Hashable, _Timer]] = [dict() for _ in range(slots)]
+        self._timers: Dict[Hashable, _Timer] = {}
+        self._cursor = 0
+        self._task: Optional[asyncio.Task] = None
+        # Tasks started by async callbacks; the loop only keeps weak references
+        self._callback_tasks: Set[asyncio.Task] = set()
+
+    def __len__(self) -> int:
+        return len(self._timers)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._timers
+
+    def schedule(self, key: Hashable, delay: float, callback: Callable[[], Any]):
+        """Fire ``callback`` after ``delay`` seconds, replacing any timer for ``key``."""
+        self.cancel(key)
+        ticks = max(1, int(-(-delay // self.tick)))  # ceil, at least one tick
+        n_slots = len(self._slots)
+        slot = (self._cursor + ticks) % n_slots
+        rounds = (ticks - 1) // n_slots
+        timer = _Timer(key, rounds, slot, callback)
+        self._slots[slot][key] = timer
+        self._timers[key] = timer
+
+    def cancel(self, key: Hashable) -> bool:
+        timer = self._timers.pop(key, None)
+        if timer is None:
+            return False
+        self._slots[timer.slot].pop(key, None)
+        return True
+
+    def advance(self) -> int:
+        """Move the wheel one tick forward and run due callbacks. Returns how many fired."""
+        self._cursor = (self._cursor + 1) % len(self._slots)
+        bucket = self._slots[self._cursor]
+        due = []
+        for key, timer in list(bucket.items()):
+            if timer.rounds > 0:
+                timer.rounds -= 1
+                continue
+            del bucket[key]
+            del self._timers[key]
+            due.append(timer)
+
+        for timer in due:
+            try:
+                result = timer.callback()
+                if inspect.isawaitable(result):
+                    task = asyncio.ensure_future(result)
+                    self._callback_tasks.add(task)
+                    task.add_done_callback(self._callback_tasks.discard)
+            except Exception as e:
+                logger.error(f"❌ Timer callback failed for {timer.key}: {e}")
+        return len(due)
+
+    async def run(self):
+        """Drive the wheel in real time until cancelled."""
+        next_tick = time.monotonic() + self.tick
+        while True:
+            await asyncio.sleep(max(0.0, next_tick - time.monotonic()))
+            next_tick += self.tick
+            self.advance()
+
+    def start(self) -> asyncio.Task:
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self.run())
+        return self._task
+
+    def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None